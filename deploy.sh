@@ -54,6 +54,7 @@ sleep 10
 # Run migrations
 echo -e "${GREEN}Running database migrations...${NC}"
 docker-compose exec -T backend python manage.py migrate --noinput
+docker-compose exec -T backend python manage.py createcachetable
 
 # Collect static files
 echo -e "${GREEN}Collecting static files...${NC}"
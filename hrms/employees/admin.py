@@ -1,21 +1,64 @@
 from django.contrib import admin
-from .models import Department, Employee, Attendance
+from django.db import transaction
+from .counters import apply_employee_changes, today_statuses
+from .models import Department, Employee, Attendance, Job
+from .rollups import apply_attendance_changes
+from .search import search_query
 
 
 @admin.register(Department)
 class DepartmentAdmin(admin.ModelAdmin):
-    list_display = ['id', 'name', 'created_at', 'updated_at']
+    list_display = ['id', 'name', 'employee_count', 'created_at', 'updated_at']
     search_fields = ['name']
     ordering = ['name']
+    # Maintained by employees.counters; reconcile_department_counters corrects them
+    readonly_fields = ['employee_count', 'attendance_date', 'present_today', 'absent_today', 'counts_updated_at']
+
+    def save_model(self, request, obj, form, change):
+        """Save only the edited fields, so that counts changed since the form was loaded are kept."""
+        if change:
+            obj.save(update_fields=[*form.changed_data, 'updated_at'])
+        else:
+            super().save_model(request, obj, form, change)
 
 
 @admin.register(Employee)
 class EmployeeAdmin(admin.ModelAdmin):
     list_display = ['id', 'full_name', 'email', 'department', 'created_at']
-    search_fields = ['full_name', 'email']
+    search_fields = ['full_name', 'email', 'employee_id']
     list_filter = ['department', 'created_at']
     ordering = ['full_name']
 
+    def get_search_results(self, request, queryset, search_term):
+        """Search the indexed search_vector instead of ILIKE '%term%' scans of every column."""
+        query = search_query(search_term)
+        if query is None:
+            return queryset, False
+        return queryset.filter(search_vector=query), False
+
+    # Employees created, moved or deleted here are counted in their departments (employees.counters)
+
+    def save_model(self, request, obj, form, change):
+        moved = change and 'department' in form.changed_data
+        old_department = form.initial.get('department') if change else None
+        with transaction.atomic():
+            status = today_statuses([obj.pk]).get(obj.pk) if moved else None
+            super().save_model(request, obj, form, change)
+            apply_employee_changes([(old_department, obj.department_id, status)])
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            status = today_statuses([obj.pk]).get(obj.pk)
+            super().delete_model(request, obj)
+            apply_employee_changes([(obj.department_id, None, status)])
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            employees = list(queryset.values_list('pk', 'department_id'))
+            statuses = today_statuses([pk for pk, _ in employees])
+            super().delete_queryset(request, queryset)
+            apply_employee_changes([(department, None, statuses.get(pk)) for pk, department in employees])
+
 
 @admin.register(Attendance)
 class AttendanceAdmin(admin.ModelAdmin):
@@ -23,3 +66,39 @@ class AttendanceAdmin(admin.ModelAdmin):
     search_fields = ['employee__full_name', 'employee__email']
     list_filter = ['status', 'date', 'created_at']
     ordering = ['-date', 'employee']
+
+    # Attendance written here is folded into the monthly rollup and the
+    # department counters (employees.rollups), like the API's writes
+
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            # The stored row, not the form's initial values: it may have changed since the form was loaded
+            old = Attendance.objects.select_for_update().filter(pk=obj.pk).values_list(
+                'employee_id', 'date', 'status'
+            ).first() if change else None
+            super().save_model(request, obj, form, change)
+            changes = [(obj.employee_id, obj.date, None, obj.status)]
+            if old:
+                changes.insert(0, (*old, None))
+            apply_attendance_changes(changes)
+
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, Attendance.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            rows = list(queryset.select_for_update().values_list('employee_id', 'date', 'status'))
+            super().delete_queryset(request, queryset)
+            apply_attendance_changes([(*row, None) for row in rows])
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'status', 'progress', 'total', 'attempts', 'created_at', 'finished_at']
+    list_filter = ['status', 'kind']
+    ordering = ['-id']
+    # Jobs are queued through the API and updated by the workers (employees.jobs)
+    readonly_fields = [field.name for field in Job._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,145 @@
+"""
+Async versions of the read endpoints, for ASGI deployments (ASYNC_READ_VIEWS).
+
+``async_read_view(viewset, actions)`` builds a Django async view for a route.
+Plain GET requests whose query parameters the viewset lists in
+``async_query_params`` are answered by the viewset's ``alist``/``aretrieve``
+with the async ORM. Everything else (writes, ?cursor=, ?format=, other
+actions) goes to the regular DRF view through ``sync_to_async``, so behaviour
+is unchanged.
+
+Django's async ORM still runs each query on a worker thread through
+``sync_to_async``; psycopg is not used asynchronously. The gain is that the
+event loop, not a fixed pool of sync workers, holds requests that are waiting
+on the database.
+"""
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from employees import instrumentation
+
+
+class AsyncReadMixin:
+    """
+    Async list and retrieve for viewsets using ConditionalGetMixin.
+
+    Mirrors ConditionalGetMixin.list/retrieve, including the 304 handling and
+    the count reused by the pagination. Override ``aget_queryset`` when
+    get_queryset() itself queries the database.
+    """
+    # Query parameters the async path understands; any other sends the request to the sync view
+    async_query_params = frozenset({'page', 'page_size'})
+
+    async def aget_queryset(self):
+        return self.get_queryset()
+
+    async def aget_list_state(self, queryset):
+        return self.list_state(await queryset.order_by().aaggregate(**self.list_state_aggregates()))
+
+    async def aget_object(self):
+        queryset = self.filter_queryset(await self.aget_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        # Same errors as rest_framework.generics.get_object_or_404
+        try:
+            instance = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except queryset.model.DoesNotExist:
+            raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+        self.check_object_permissions(self.request, instance)
+        return instance
+
+    async def aconditional_response(self, state, use_if_modified_since, render):
+        etag = self.get_etag(state)
+        last_modified = self.get_last_modified(state)
+
+        if self.not_modified(etag, last_modified, use_if_modified_since):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = await render()
+        return self.tag_response(response, etag, last_modified)
+
+    async def alist(self, request, *args, **kwargs):
+        state = await self.aget_list_state(self.filter_queryset(await self.aget_queryset()))
+        self.known_count = state[0]
+        return await self.aconditional_response(
+            state, use_if_modified_since=False,
+            render=lambda: self.alist_response(request, *args, **kwargs),
+        )
+
+    async def alist_response(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(await self.aget_queryset())
+        page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+        if page is None:
+            return Response(self.get_serializer([obj async for obj in queryset], many=True).data)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+
+        async def render():
+            return Response(self.get_serializer(instance).data)
+
+        return await self.aconditional_response(
+            self.get_object_state(instance), use_if_modified_since=True, render=render,
+        )
+
+
+def async_read_view(viewset, actions):
+    """
+    Return an async view routing ``actions`` ({method: action}) to ``viewset``.
+
+    The async path skips DRF authentication, permission and throttling checks,
+    so it is only used when the viewset allows anyone and has no throttles.
+    """
+    drf_view = viewset.as_view(actions)
+
+    @sync_to_async
+    def fallback(request, *args, **kwargs):
+        response = drf_view(request, *args, **kwargs)
+        if not hasattr(response, 'render'):
+            return response
+        with instrumentation.measure('render'):
+            return response.render()
+
+    fast_path = (
+        all(issubclass(permission, AllowAny) for permission in viewset.permission_classes)
+        and not viewset.throttle_classes
+    )
+
+    async def view(request, *args, **kwargs):
+        action = actions.get(request.method.lower())
+        if not (fast_path and action and hasattr(viewset, f'a{action}')
+                and set(request.GET) <= viewset.async_query_params):
+            return await fallback(request, *args, **kwargs)
+
+        # Set up the viewset the way ViewSetMixin.as_view() and APIView.dispatch() do
+        self = viewset()
+        self.action_map = actions
+        for method, name in actions.items():
+            setattr(self, method, getattr(self, name))
+        if 'get' in actions and 'head' not in actions:
+            self.head = self.get
+        self.args = args
+        self.kwargs = kwargs
+        self.request = request = self.initialize_request(request, *args, **kwargs)
+        self.headers = self.default_response_headers
+        try:
+            self.format_kwarg = self.get_format_suffix(**kwargs)
+            request.accepted_renderer, request.accepted_media_type = self.perform_content_negotiation(request)
+            response = await getattr(self, f'a{action}')(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        response = self.finalize_response(request, response, *args, **kwargs)
+        # Rendering does no I/O, so do it here instead of on a worker thread
+        with instrumentation.measure('render'):
+            return response.render()
+
+    # As on DRF's views, for middleware that looks at the view class (ReplicaRoutingMiddleware)
+    view.cls = viewset
+    return csrf_exempt(view)
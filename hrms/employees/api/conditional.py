@@ -0,0 +1,130 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def _lookup(obj, path):
+    """Follow a 'related__field' path on an instance."""
+    for name in path.split('__'):
+        obj = getattr(obj, name)
+    return obj
+
+
+def _timestamp(value):
+    return int(value.timestamp()) if value is not None else None
+
+
+class ConditionalGetMixin:
+    """
+    Strong ETags and Last-Modified for list and retrieve, computed without serializing.
+
+    A list's state is the row count plus the maxima of ``conditional_fields``
+    over the filtered queryset: one aggregate query. A single object's state is
+    the value of those fields on the instance. Inserts and updates move a
+    maximum and deletes change the count, so the ETag changes with any write
+    that changes the response. If-None-Match is answered with 304 before the
+    page is fetched or serialized, and otherwise the count is handed to the
+    pagination so the list still costs no extra query.
+
+    If-Modified-Since is only honoured for single objects: a delete does not
+    move any maximum, so it cannot be detected from Last-Modified alone.
+    Keyset (?cursor=) pages are not tagged, since the aggregate would scan the
+    whole list that cursor mode is meant to avoid.
+    """
+    conditional_fields = ('updated_at',)
+
+    def get_list_state(self, queryset):
+        """Return the (count, *maxima) tuple identifying the state of a list."""
+        return self.list_state(queryset.order_by().aggregate(**self.list_state_aggregates()))
+
+    def list_state_aggregates(self):
+        return {
+            'count': Count('pk'),
+            **{f'max_{i}': Max(field) for i, field in enumerate(self.conditional_fields)},
+        }
+
+    def list_state(self, aggregates):
+        return (aggregates['count'],) + tuple(
+            aggregates[f'max_{i}'] for i in range(len(self.conditional_fields))
+        )
+
+    def get_object_state(self, instance):
+        return tuple(_lookup(instance, field) for field in self.conditional_fields)
+
+    def get_etag(self, state):
+        request = self.request
+        key = repr((
+            request.get_host(),
+            request.path,
+            sorted(request.query_params.lists()),
+            [value.isoformat() if hasattr(value, 'isoformat') else value for value in state],
+        ))
+        return '"%s"' % hashlib.sha256(key.encode()).hexdigest()[:32]
+
+    @staticmethod
+    def get_last_modified(state):
+        timestamps = [value for value in state if hasattr(value, 'timestamp')]
+        return max(timestamps) if timestamps else None
+
+    def not_modified(self, etag, last_modified, use_if_modified_since):
+        """Return True if the request's validators match the current state."""
+        if_none_match = self.request.headers.get('If-None-Match')
+        if if_none_match is not None:
+            if if_none_match.strip() == '*':
+                return True
+            tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+            return etag in tags
+
+        if_modified_since = self.request.headers.get('If-Modified-Since')
+        if use_if_modified_since and if_modified_since and last_modified is not None:
+            since = parse_http_date_safe(if_modified_since)
+            return since is not None and _timestamp(last_modified) <= since
+        return False
+
+    def conditional_response(self, state, use_if_modified_since, render):
+        """Answer with 304 if the client is up to date; otherwise call render() and tag it."""
+        etag = self.get_etag(state)
+        last_modified = self.get_last_modified(state)
+
+        if self.not_modified(etag, last_modified, use_if_modified_since):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = render()
+        return self.tag_response(response, etag, last_modified)
+
+    @staticmethod
+    def tag_response(response, etag, last_modified):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(_timestamp(last_modified))
+        # Let browsers keep the response but revalidate it on every use
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        if self.paginator is not None and self.paginator.cursor_query_param in request.query_params:
+            # Keyset pages exist to avoid whole-list scans; an aggregate would reintroduce one
+            return self.list_response(request, *args, **kwargs)
+
+        state = self.get_list_state(self.filter_queryset(self.get_queryset()))
+        # The pagination reuses the count instead of running its own COUNT(*)
+        self.known_count = state[0]
+        return self.conditional_response(
+            state, use_if_modified_since=False,
+            render=lambda: self.list_response(request, *args, **kwargs),
+        )
+
+    def list_response(self, request, *args, **kwargs):
+        """Build the full list response; called only when the client is out of date."""
+        return super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        return self.conditional_response(
+            self.get_object_state(instance), use_if_modified_since=True,
+            render=lambda: Response(self.get_serializer(instance).data),
+        )
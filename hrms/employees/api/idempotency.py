@@ -0,0 +1,161 @@
+"""
+Idempotency-Key support for the create endpoints.
+
+A client that may retry a POST sends a unique ``Idempotency-Key`` header with
+it, and the same key with every retry. The first request runs normally and its
+response is kept for IDEMPOTENCY_TTL seconds in the ``idempotency`` cache. A
+retry gets that response again, with ``Idempotent-Replayed: true``, without a
+query to the database:
+
+- the same key with a different body is rejected with 422
+- the same key while the first request is still running gets 409 and
+  ``Retry-After``; the first request holds the key for at most
+  IDEMPOTENCY_LOCK_TIMEOUT seconds
+- responses of 500 and above, errors raised before a response is built
+  (validation errors, 404) and streamed responses are not kept, so a retry
+  runs the request again
+
+Keys are scoped to the request path. The cache must be shared by every worker
+that can receive the retry, and its add() must be atomic across them: Redis
+when REDIS_URL is set, otherwise a table in the default database.
+"""
+import functools
+import hashlib
+import json
+import tempfile
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+from employees import metrics
+
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+# Response headers worth replaying; the rest are added again by the middleware
+REPLAYED_HEADERS = ('Location',)
+
+requests_total = metrics.counter(
+    'idempotency_requests_total',
+    'Create requests with an Idempotency-Key by result (new, replayed, mismatch, in_progress)',
+    ['result'],
+)
+
+
+def cache_key(path, key):
+    """The cache key of an Idempotency-Key sent to ``path``; hashed to fit any backend."""
+    return 'idempotency:' + hashlib.sha256(f'{path}\n{key}'.encode()).hexdigest()
+
+
+def _fingerprint(request):
+    """
+    Hash of the request, insensitive to key order and whitespace: the body,
+    with files hashed by content, and the query string if there is one.
+    """
+    data = request.data
+    if request.FILES:
+        files = {name: _file_digest(request, name) for name in request.FILES}
+        data = {'data': {name: value for name, value in data.items() if name not in files}, 'files': files}
+    if request.query_params:
+        data = {'body': data, 'query': request.query_params.dict()}
+    body = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def _file_digest(request, name):
+    """
+    Hash of the content of the uploaded file ``name``. A request body parsed as
+    a stream (employees.api.parsers) is copied to a temporary file while it is
+    hashed, which takes its place, so the view can still read it.
+    """
+    file = request.FILES[name]
+    copy = None if getattr(file, 'seekable', lambda: False)() else tempfile.SpooledTemporaryFile(
+        max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE,
+    )
+    digest = hashlib.sha256()
+    for chunk in iter(functools.partial(file.read, 64 * 1024), b''):
+        digest.update(chunk)
+        if copy is not None:
+            copy.write(chunk)
+    if copy is None:
+        file.seek(0)
+    else:
+        copy.seek(0)
+        request.FILES[name] = copy
+    return digest.hexdigest()
+
+
+def _error(status_code, message, headers=None):
+    return Response(
+        {'message': message, 'errors': {HEADER: [message]}},
+        status=status_code,
+        headers=headers,
+    )
+
+
+def idempotent(handler):
+    """Decorate a view's POST handler (``create``/``post``) to honour the Idempotency-Key header."""
+
+    @functools.wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return handler(view, request, *args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return _error(status.HTTP_400_BAD_REQUEST, f'{HEADER} must be 1 to {MAX_KEY_LENGTH} characters.')
+
+        store = caches[settings.IDEMPOTENCY_CACHE_ALIAS]
+        stored_key = cache_key(request.path, key)
+        fingerprint = _fingerprint(request)
+
+        # add() only succeeds for the first request with the key, which then holds it
+        if not store.add(stored_key, {'fingerprint': fingerprint}, settings.IDEMPOTENCY_LOCK_TIMEOUT):
+            record = store.get(stored_key)
+            if record is not None:
+                return _replay(record, fingerprint)
+            # Expired between add() and get(); run the request without a lock rather than fail it
+        requests_total.inc(result='new')
+
+        try:
+            response = handler(view, request, *args, **kwargs)
+        except BaseException:
+            store.delete(stored_key)
+            raise
+        # A streamed body (the import's CSV report) is not read to be kept
+        if response.status_code >= 500 or response.streaming:
+            store.delete(stored_key)
+        else:
+            store.set(stored_key, {
+                'fingerprint': fingerprint,
+                'status': response.status_code,
+                'data': response.data,
+                'headers': {name: response[name] for name in REPLAYED_HEADERS if name in response},
+            }, settings.IDEMPOTENCY_TTL)
+        return response
+
+    return wrapper
+
+
+def _replay(record, fingerprint):
+    """The response for a key that was already used: the stored one, or an error."""
+    if 'status' not in record:
+        requests_total.inc(result='in_progress')
+        return _error(
+            status.HTTP_409_CONFLICT,
+            f'A request with this {HEADER} is still being processed.',
+            headers={'Retry-After': '1'},
+        )
+    if record['fingerprint'] != fingerprint:
+        requests_total.inc(result='mismatch')
+        return _error(
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+            f'This {HEADER} was already used with a different request body.',
+        )
+    requests_total.inc(result='replayed')
+    return Response(record['data'], status=record['status'], headers={
+        **record['headers'], REPLAYED_HEADER: 'true',
+    })
@@ -0,0 +1,256 @@
+"""
+Bulk employee import from CSV or NDJSON files.
+
+Used by POST /employees/import/, its background jobs (employees.api.tasks)
+and the ``import_employees`` command. The file is read a line at a time and
+handled EMPLOYEE_IMPORT_CHUNK_SIZE rows at a time, so memory use depends on
+the chunk size rather than on the file. For each chunk:
+
+- every row is validated with EmployeeImportRowSerializer, and its department
+  is looked up by name in a dict loaded with one query at the start
+- one query finds the employees that already have one of the chunk's
+  employee IDs or emails, instead of a unique-constraint round trip per row;
+  repeats within the file are caught with sets of the values seen so far
+- the valid rows are written with one bulk INSERT, in a transaction of their
+  own, so a failed chunk does not undo the ones before it; the department
+  headcounts (employees.counters) are updated in the same transaction
+
+Rows that are not imported are reported with their line number, their values
+and the reasons. The report has the import's columns, so it can be corrected
+and imported again as it is.
+
+bulk_create does not send post_save, so the employee cache is invalidated
+here rather than by employees.signals.
+"""
+import codecs
+import csv
+import json
+from pathlib import PurePath
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from rest_framework import serializers
+
+from employees import cache
+from employees.counters import apply_employee_changes
+from employees.models import Department, Employee
+from employees.api.serializers import EmployeeImportRowSerializer
+
+
+COLUMNS = ('employee_id', 'full_name', 'email', 'department')
+REPORT_COLUMNS = ('line', *COLUMNS, 'errors')
+
+# File name suffixes of each format, for uploads that do not say
+SUFFIXES = {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}
+
+
+class ImportFileError(Exception):
+    """
+    The file cannot be read: missing CSV columns or invalid UTF-8. ``result``
+    holds what was imported before the error was reached.
+    """
+    result = None
+
+
+class ImportResult:
+    """Counts of an import and the rows that were not imported"""
+
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.rows = 0
+        self.created = 0
+        self.errors = []
+
+    @property
+    def summary(self):
+        """``created`` counts the rows that would be created in a dry run."""
+        return {'rows': self.rows, 'created': self.created, 'errors': len(self.errors)}
+
+    def add_error(self, line, record, errors):
+        values = record if isinstance(record, dict) else {}
+        self.errors.append({
+            'line': line,
+            **{column: values.get(column) for column in COLUMNS},
+            'errors': errors,
+        })
+
+
+def file_format(name):
+    """The format of a file named ``name`` from its suffix, or None."""
+    return SUFFIXES.get(PurePath(name or '').suffix.lower())
+
+
+def _decoded(file):
+    """The lines of a binary file (or any iterable of byte lines) as text."""
+    return codecs.iterdecode(file, 'utf-8-sig')
+
+
+def read_csv(file):
+    """Yield (line number, record) for each row of a CSV file with a header row."""
+    lines = _decoded(file)
+    try:
+        # Short rows get '' for their missing cells, so they fail as blank rather than null
+        reader = csv.DictReader(lines, restval='')
+        missing = [column for column in COLUMNS if column not in (reader.fieldnames or ())]
+        if missing:
+            raise ImportFileError(f'The CSV header is missing the column(s): {", ".join(missing)}.')
+        for row in reader:
+            yield reader.line_num, {column: row[column] for column in COLUMNS}
+    except (UnicodeDecodeError, csv.Error) as exc:
+        raise ImportFileError(f'Line {reader.line_num + 1}: {exc}') from exc
+
+
+def read_ndjson(file):
+    """
+    Yield (line number, record) for each non-blank line of an NDJSON file. A
+    line that is not a JSON object is yielded as None.
+    """
+    number = 0
+    try:
+        for number, line in enumerate(_decoded(file), 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            yield number, record if isinstance(record, dict) else None
+    except UnicodeDecodeError as exc:
+        raise ImportFileError(f'Line {number + 1}: {exc}') from exc
+
+
+READERS = {'csv': read_csv, 'ndjson': read_ndjson}
+
+
+def _chunks(records, size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class _Importer:
+    def __init__(self, result):
+        self.result = result
+        self.row_serializer = EmployeeImportRowSerializer()
+        self.departments = dict(Department.objects.values_list('name', 'id'))
+        # Values of the rows accepted so far, to reject repeats within the file
+        self.seen_employee_ids = set()
+        self.seen_emails = set()
+
+    def import_chunk(self, chunk):
+        first_error = len(self.result.errors)
+        self._import_chunk(chunk)
+        # Errors are found row by row and then by the lookups; report them in file order
+        self.result.errors[first_error:] = sorted(self.result.errors[first_error:], key=lambda error: error['line'])
+
+    def _import_chunk(self, chunk):
+        rows = []
+        for line, record in chunk:
+            self.result.rows += 1
+            if record is None:
+                self.result.add_error(line, record, {'non_field_errors': ['Each line must be a JSON object.']})
+                continue
+            try:
+                data = self.row_serializer.run_validation(record)
+            except serializers.ValidationError as exc:
+                self.result.add_error(line, record, exc.detail)
+                continue
+
+            errors = {}
+            if data['department'] not in self.departments:
+                errors['department'] = ['Department not found.']
+            if data['employee_id'] in self.seen_employee_ids:
+                errors['employee_id'] = ['Duplicate employee ID in this file.']
+            if data['email'] in self.seen_emails:
+                errors['email'] = ['Duplicate email in this file.']
+            if errors:
+                self.result.add_error(line, record, errors)
+                continue
+            self.seen_employee_ids.add(data['employee_id'])
+            self.seen_emails.add(data['email'])
+            rows.append((line, record, data))
+
+        if not rows:
+            return
+        existing = Employee.objects.filter(
+            Q(employee_id__in=[data['employee_id'] for _, _, data in rows])
+            | Q(email__in=[data['email'] for _, _, data in rows])
+        ).values_list('employee_id', 'email')
+        existing_employee_ids, existing_emails = set(), set()
+        for employee_id, email in existing:
+            existing_employee_ids.add(employee_id)
+            existing_emails.add(email)
+        new_rows = []
+        for line, record, data in rows:
+            errors = {}
+            # The same messages as POST /employees/
+            if data['employee_id'] in existing_employee_ids:
+                errors['employee_id'] = ['An employee with this employee ID already exists.']
+            if data['email'] in existing_emails:
+                errors['email'] = ['An employee with this email already exists.']
+            if errors:
+                self.result.add_error(line, record, errors)
+            else:
+                new_rows.append((line, record, data))
+
+        if not self.result.dry_run and new_rows:
+            try:
+                with transaction.atomic():
+                    Employee.objects.bulk_create([
+                        Employee(
+                            employee_id=data['employee_id'],
+                            full_name=data['full_name'],
+                            email=data['email'],
+                            department_id=self.departments[data['department']],
+                        )
+                        for _, _, data in new_rows
+                    ])
+                    apply_employee_changes([(None, self.departments[data['department']], None)
+                                            for _, _, data in new_rows])
+            except IntegrityError:
+                # Another writer created one of these employees after the lookups above
+                for line, record, _ in new_rows:
+                    self.result.add_error(line, record, {
+                        'non_field_errors': ['Employees were created concurrently. Please import this row again.']
+                    })
+                return
+        self.result.created += len(new_rows)
+
+
+def import_employees(records, chunk_size=None, dry_run=False, on_chunk=None):
+    """
+    Import the (line number, record) pairs of ``records``, as yielded by
+    read_csv() or read_ndjson(). Records are dicts with the COLUMNS as keys;
+    ``department`` is the department's name. With ``dry_run`` everything is
+    validated but nothing is written. ``on_chunk(result)`` is called after
+    each chunk, e.g. to report progress. Returns an ImportResult.
+    """
+    result = ImportResult(dry_run)
+    importer = _Importer(result)
+    try:
+        for chunk in _chunks(records, chunk_size or settings.EMPLOYEE_IMPORT_CHUNK_SIZE):
+            importer.import_chunk(chunk)
+            if on_chunk is not None:
+                on_chunk(result)
+    except ImportFileError as exc:
+        exc.result = result
+        raise
+    finally:
+        if result.created and not dry_run:
+            transaction.on_commit(cache.employees.invalidate)
+    return result
+
+
+def report_rows(result):
+    """The report of ``result`` as rows of REPORT_COLUMNS, with the errors as one text column."""
+    for error in result.errors:
+        messages = '; '.join(
+            f'{field}: {message}' for field, field_messages in error['errors'].items() for message in field_messages
+        )
+        yield [*(error[column] for column in REPORT_COLUMNS[:-1]), messages]
@@ -1,19 +1,255 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+import json
+from functools import partial, reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import InvalidPage, Paginator as DjangoPaginator
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+COUNT_EXACT = 'exact'
+COUNT_ESTIMATE = 'estimate'
+COUNT_NONE = 'none'
+COUNT_MODES = [COUNT_EXACT, COUNT_ESTIMATE, COUNT_NONE]
+
+
+def estimate_count(queryset):
+    """
+    Return the planner's row estimate for a queryset instead of running COUNT(*).
+
+    An unfiltered queryset uses pg_class.reltuples of the table (summed over its
+    partitions, if any); a filtered one uses the row estimate of its EXPLAIN plan.
+    Returns None when the table has never been analyzed.
+    """
+    queryset = queryset.order_by()
+    if not queryset.query.where:
+        table = queryset.model._meta.db_table
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT SUM(reltuples) FILTER (WHERE reltuples >= 0)
+                FROM pg_class
+                WHERE oid = %s::regclass
+                   OR oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = %s::regclass)
+                """,
+                [table, table],
+            )
+            estimate = cursor.fetchone()[0]
+        return None if estimate is None else int(estimate)
+
+    plan = json.loads(queryset.explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination over a unique ordering.
+
+    Each page is fetched with a WHERE clause on the ordering values of the last
+    row seen instead of an OFFSET, so every page costs the same at any depth.
+    The ordering is taken from the view's ``cursor_ordering`` and must identify
+    rows uniquely (append the primary key otherwise); fields must be non-null.
+    """
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+
+    def __init__(self, page_size, count_mode):
+        self.page_size = page_size
+        self.default_count_mode = count_mode
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.get_ordering(queryset, view)
+        self.count = self.get_count(queryset, request)
+
+        position, reverse = self.decode_cursor(request)
+        queryset = queryset.order_by(*self.order_by(reverse))
+        if position is not None:
+            queryset = queryset.filter(self.after(position, reverse))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.has_next = has_more if not reverse else position is not None
+        self.has_previous = has_more if reverse else position is not None
+        self.first = rows[0] if rows else None
+        self.last = rows[-1] if rows else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data
+        })
+
+    def get_ordering(self, queryset, view):
+        """Resolve the view's cursor_ordering to (column, descending) pairs."""
+        ordering = getattr(view, 'cursor_ordering', None) or ('pk',)
+        opts = queryset.model._meta
+        resolved = []
+        for name in ordering:
+            descending = name.startswith('-')
+            field_name = name.lstrip('-')
+            field = opts.pk if field_name == 'pk' else opts.get_field(field_name)
+            resolved.append((field, descending))
+        return resolved
+
+    def get_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param, self.default_count_mode)
+        if mode not in COUNT_MODES:
+            raise ValidationError({self.count_query_param: [f'Must be one of: {", ".join(COUNT_MODES)}.']})
+        if mode == COUNT_EXACT:
+            return queryset.count()
+        if mode == COUNT_ESTIMATE:
+            return estimate_count(queryset)
+        return None
+
+    def order_by(self, reverse):
+        return [
+            ('-' if descending != reverse else '') + field.attname
+            for field, descending in self.ordering
+        ]
+
+    def after(self, position, reverse):
+        """
+        Build the row-comparison filter for rows that come after ``position``.
+
+        For ordering (a, -b) this is ``a > :a OR (a = :a AND b < :b)``, with the
+        comparisons flipped when walking backwards.
+        """
+        clauses = []
+        for i, (field, descending) in enumerate(self.ordering):
+            lookup = 'lt' if descending != reverse else 'gt'
+            clause = Q(**{f'{field.attname}__{lookup}': position[i]})
+            for j, (prev_field, _) in enumerate(self.ordering[:i]):
+                clause &= Q(**{prev_field.attname: position[j]})
+            clauses.append(clause)
+        return reduce(or_, clauses)
+
+    def encode_cursor(self, row, reverse):
+        position = [self.position_value(field, row) for field, _ in self.ordering]
+        payload = json.dumps({'p': position, 'r': reverse}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    @staticmethod
+    def position_value(field, row):
+        """The row's value of an ordering field as a string; rows are instances or .values() dicts."""
+        if isinstance(row, dict):
+            value = row[field.attname]
+            return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+        return field.value_to_string(row)
+
+    def decode_cursor(self, request):
+        """Return (position, reverse) for the cursor in the request; the first page has no position."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)))
+            position = [
+                field.to_python(value)
+                for (field, _), value in zip(self.ordering, payload['p'], strict=True)
+            ]
+            return position, bool(payload['r'])
+        except (TypeError, ValueError, KeyError, binascii.Error, DjangoValidationError) as exc:
+            raise NotFound('Invalid cursor.') from exc
+
+    def get_next_link(self):
+        if not self.has_next or self.last is None:
+            return None
+        return self.get_link(self.encode_cursor(self.last, reverse=False))
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first is None:
+            return None
+        return self.get_link(self.encode_cursor(self.first, reverse=True))
+
+    def get_link(self, cursor):
+        url = remove_query_param(self.request.build_absolute_uri(), 'page')
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+
+class KnownCountPaginator(DjangoPaginator):
+    """Django paginator that reuses a row count already computed for this request"""
+
+    def __init__(self, *args, count=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if count is not None:
+            # Pre-populate the cached_property so no COUNT(*) is issued
+            self.__dict__['count'] = count
 
 
 class StandardResultsSetPagination(PageNumberPagination):
-    """Standard pagination class for HRMS APIs"""
+    """
+    Standard pagination class for HRMS APIs
+
+    Page numbers are used by default. Passing ``?cursor=`` (empty for the first
+    page) switches to keyset pagination on the view's ``cursor_ordering``, which
+    skips the OFFSET scan and, unless ``?count=exact|estimate`` is given, the
+    COUNT(*) as well. Both modes return the same count/next/previous/results shape.
+    """
     page_size = 50
     page_size_query_param = 'page_size'
     max_page_size = 100
+    cursor_query_param = 'cursor'
+
+    keyset = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param in request.query_params:
+            self.keyset = KeysetPagination(
+                page_size=self.get_page_size(request),
+                count_mode=settings.PAGINATION_CURSOR_COUNT_MODE,
+            )
+            return self.keyset.paginate_queryset(queryset, request, view)
+        # Views that already counted the rows (e.g. for an ETag) set known_count
+        self.django_paginator_class = partial(KnownCountPaginator, count=getattr(view, 'known_count', None))
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset for async views, fetching the page with the async ORM.
+
+        Only page-number mode is supported; async views hand ?cursor= requests
+        to the sync view.
+        """
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        count = getattr(view, 'known_count', None)
+        if count is None:
+            count = await queryset.acount()
+        paginator = KnownCountPaginator(queryset, page_size, count=count)
+        page_number = self.get_page_number(request, paginator)
+        try:
+            # The page's object_list is still a lazy sliced queryset here
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        return [obj async for obj in self.page.object_list]
 
     def get_paginated_response(self, data):
         """Return a paginated style Response object"""
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
         return Response({
             'count': self.page.paginator.count,
             'next': self.get_next_link(),
             'previous': self.get_previous_link(),
             'results': data
         })
-
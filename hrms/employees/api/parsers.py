@@ -0,0 +1,26 @@
+"""
+Parsers for file bodies sent to POST /employees/import/.
+
+The body is not parsed here. Its stream is handed to the view as
+``request.FILES['file']``, as a multipart upload would be, and read a line at
+a time by employees.api.imports. The format is passed on as
+``request.data['format']``.
+"""
+from rest_framework.parsers import BaseParser, DataAndFiles
+
+
+class StreamParser(BaseParser):
+    format = None
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return DataAndFiles({'format': self.format}, {'file': stream})
+
+
+class CSVParser(StreamParser):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class NDJSONParser(StreamParser):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
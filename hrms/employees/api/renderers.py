@@ -0,0 +1,159 @@
+"""
+Renderers for the streaming exports, the Prometheus metrics format and
+orjson-encoded JSON.
+
+DRF negotiates the format (?format=csv|ndjson or the Accept header); the view
+then feeds rows to ``stream()`` instead of building response data, so nothing
+is accumulated in memory. ``render()`` is only used for small, non-streamed
+payloads.
+"""
+import abc
+import csv
+import json
+from datetime import date, datetime
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def format_value(value):
+    """Render dates and datetimes the way the JSON API does; leave everything else alone."""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+class _Echo:
+    """File-like object whose write() returns the line instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+class StreamingRenderer(BaseRenderer, metaclass=abc.ABCMeta):
+    charset = 'utf-8'
+    # Rows encoded together per chunk handed to the WSGI server
+    rows_per_chunk = 500
+
+    def stream(self, columns, rows):
+        """Yield encoded chunks: a header (if the format has one) then the rows."""
+        header = self.header(columns)
+        if header:
+            yield header.encode(self.charset)
+        buffer = []
+        for row in rows:
+            buffer.append(self.line(columns, row))
+            if len(buffer) >= self.rows_per_chunk:
+                yield ''.join(buffer).encode(self.charset)
+                buffer = []
+        if buffer:
+            yield ''.join(buffer).encode(self.charset)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        columns = list(rows[0]) if rows else []
+        return b''.join(self.stream(columns, ([row[column] for column in columns] for row in rows)))
+
+    def header(self, columns):
+        return None
+
+    @abc.abstractmethod
+    def line(self, columns, row):
+        """The encoded line of ``row``, a sequence of values in the order of ``columns``."""
+
+
+class CSVRenderer(StreamingRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def __init__(self):
+        self.writer = csv.writer(_Echo())
+
+    def header(self, columns):
+        return self.writer.writerow(columns)
+
+    def line(self, columns, row):
+        return self.writer.writerow([format_value(value) for value in row])
+
+
+class NDJSONRenderer(StreamingRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def line(self, columns, row):
+        return json.dumps(
+            dict(zip(columns, (format_value(value) for value in row))),
+            ensure_ascii=False, separators=(',', ':'),
+        ) + '\n'
+
+
+def _prometheus_labels(labels, **extra):
+    labels = {**labels, **extra}
+    if not labels:
+        return ''
+    escaped = (
+        str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        for value in labels.values()
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+
+class PrometheusRenderer(BaseRenderer):
+    """
+    The ``metrics`` part of the metrics response in the Prometheus text format
+    (version 0.0.4), for ?format=prometheus or a Prometheus scrape.
+    """
+    media_type = 'text/plain'
+    format = 'prometheus'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        lines = []
+        for name, metric in data.get('metrics', {}).items():
+            lines.append(f'# HELP {name} {metric["description"]}')
+            lines.append(f'# TYPE {name} {metric["type"]}')
+            for sample in metric['samples']:
+                labels, value = sample['labels'], sample['value']
+                if metric['type'] != 'histogram':
+                    lines.append(f'{name}{_prometheus_labels(labels)} {value}')
+                    continue
+                for bound, count in value['buckets'].items():
+                    lines.append(f'{name}_bucket{_prometheus_labels(labels, le=bound)} {count}')
+                lines.append(f'{name}_sum{_prometheus_labels(labels)} {value["sum"]}')
+                lines.append(f'{name}_count{_prometheus_labels(labels)} {value["count"]}')
+        return ('\n'.join(lines) + '\n').encode(self.charset)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer producing the same bytes with orjson (FAST_JSON_RENDERER).
+
+    Anything orjson does not encode the same way as DRF (datetimes, Decimals,
+    lazy strings, ...) goes to DRF's encoder. Indented output and a missing
+    orjson package fall back to JSONRenderer.
+    """
+    options = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+               if orjson else 0)
+    default = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (orjson is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(data, default=self.default, option=self.options)
+        # Same escaping as JSONRenderer, so the output stays a strict JavaScript subset
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
@@ -0,0 +1,156 @@
+"""
+Fast read path for list endpoints (FAST_LIST_SERIALIZATION).
+
+Building a model instance per row and running every serializer field's
+``to_representation`` dominates the CPU time of a list page. ``RowSerializer``
+reads the same fields from ``.values()`` dicts instead. It is derived from the
+view's serializer class, so it always has the same field names, order and
+formats, and the response bytes are identical to the serializer's.
+
+Only plain model fields, ``source='relation.field'`` lookups and primary key
+relations are supported; a serializer with anything else (method fields,
+nested serializers) raises ImproperlyConfigured and must not use the mixin.
+"""
+import functools
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from rest_framework import ISO_8601, fields, relations
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer
+from rest_framework.settings import api_settings
+
+from employees import instrumentation
+
+
+# Fields whose value is not a column of the row
+UNSUPPORTED_FIELDS = (
+    relations.RelatedField, relations.ManyRelatedField, fields.SerializerMethodField, BaseSerializer,
+)
+
+
+# Formatter standing for the _datetime_formatter() of the current timezone,
+# which RowSerializer resolves once per page rather than once per value
+LOCAL_DATETIME = object()
+
+
+@functools.cache
+def _datetime_formatter(tz):
+    """DateTimeField.to_representation with the default format, in timezone ``tz``."""
+
+    def format_datetime(value):
+        value = value.astimezone(tz).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+    return format_datetime
+
+
+def _format_date(value):
+    return value.isoformat()
+
+
+def _formatter(field):
+    """
+    Return a function turning a database value into field's output, None if it
+    is unchanged, or LOCAL_DATETIME.
+    """
+    if isinstance(field, fields.DateTimeField):
+        fmt = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+        if fmt == ISO_8601 and not hasattr(field, 'timezone') and settings.USE_TZ:
+            return LOCAL_DATETIME
+        return field.to_representation
+    if isinstance(field, fields.DateField):
+        fmt = getattr(field, 'format', api_settings.DATE_FORMAT)
+        return _format_date if fmt == ISO_8601 else field.to_representation
+    if isinstance(field, (fields.CharField, fields.IntegerField, fields.ChoiceField, fields.BooleanField)):
+        # Database values are already the str/int/bool these fields output
+        return None
+    return field.to_representation
+
+
+class RowSerializer:
+    """Turn ``.values(*lookups)`` dicts into the output of ``serializer_class(many=True)``."""
+
+    def __init__(self, serializer_class):
+        self.columns = []
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, relations.PrimaryKeyRelatedField) and field.pk_field is None:
+                lookup = f'{field.source}_id'
+                formatter = None
+            elif not isinstance(field, UNSUPPORTED_FIELDS) and field.source != '*':
+                lookup = '__'.join(field.source_attrs)
+                formatter = _formatter(field)
+            else:
+                raise ImproperlyConfigured(
+                    f'{serializer_class.__name__}.{name} ({type(field).__name__}) cannot be read from .values().'
+                )
+            self.columns.append((name, lookup, formatter))
+        self.lookups = list(dict.fromkeys(lookup for _, lookup, _ in self.columns))
+
+    def to_representation(self, rows):
+        format_datetime = _datetime_formatter(timezone.get_current_timezone())
+        columns = [
+            (name, lookup, format_datetime if formatter is LOCAL_DATETIME else formatter)
+            for name, lookup, formatter in self.columns
+        ]
+        with instrumentation.measure('serialize'):
+            return [
+                {
+                    name: row[lookup] if formatter is None or row[lookup] is None else formatter(row[lookup])
+                    for name, lookup, formatter in columns
+                }
+                for row in rows
+            ]
+
+
+_row_serializers = {}
+
+
+def row_serializer(serializer_class):
+    """The (cached) RowSerializer for ``serializer_class``."""
+    if serializer_class not in _row_serializers:
+        _row_serializers[serializer_class] = RowSerializer(serializer_class)
+    return _row_serializers[serializer_class]
+
+
+class ValuesListMixin:
+    """
+    List with ``RowSerializer`` instead of the view's serializer when
+    FAST_LIST_SERIALIZATION is on. Goes before AsyncReadMixin and
+    ConditionalGetMixin, and replaces only the page fetch and serialization
+    in their ``list_response``/``alist_response``.
+    """
+
+    def list_response(self, request, *args, **kwargs):
+        if not settings.FAST_LIST_SERIALIZATION:
+            return super().list_response(request, *args, **kwargs)
+        rows = row_serializer(self.get_serializer_class())
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = queryset.values(*rows.lookups, *self.ordering_lookups(queryset, rows))
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(rows.to_representation(queryset))
+        return self.get_paginated_response(rows.to_representation(page))
+
+    async def alist_response(self, request, *args, **kwargs):
+        if not settings.FAST_LIST_SERIALIZATION:
+            return await super().alist_response(request, *args, **kwargs)
+        rows = row_serializer(self.get_serializer_class())
+        queryset = self.filter_queryset(await self.aget_queryset())
+        queryset = queryset.values(*rows.lookups, *self.ordering_lookups(queryset, rows))
+        page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+        if page is None:
+            return Response(rows.to_representation([row async for row in queryset]))
+        return self.get_paginated_response(rows.to_representation(page))
+
+    def ordering_lookups(self, queryset, rows):
+        """Columns of cursor_ordering that keyset pagination needs but the rows do not include."""
+        opts = queryset.model._meta
+        attnames = [
+            (opts.pk if name.lstrip('-') == 'pk' else opts.get_field(name.lstrip('-'))).attname
+            for name in getattr(self, 'cursor_ordering', None) or ('pk',)
+        ]
+        return [attname for attname in attnames if attname not in rows.lookups]
@@ -1,6 +1,30 @@
 from .department import DepartmentSerializer
-from .employee import EmployeeSerializer
-from .attendance import AttendanceSerializer
+from .employee import (
+    EmployeeSerializer, EmployeeSearchQuerySerializer, EmployeeImportRowSerializer, EmployeeImportQuerySerializer,
+)
+from .attendance import (
+    AttendanceSerializer, AttendanceBulkSerializer, AttendanceBulkRowSerializer, AttendanceExportQuerySerializer,
+)
+from .summary import (
+    AttendanceSummaryQuerySerializer, EmployeeAttendanceSummarySerializer,
+    DepartmentAttendanceSummarySerializer,
+)
+from .board import AttendanceBoardQuerySerializer, AttendanceBoardSerializer
+from .calendar import AttendanceCalendarQuerySerializer, AttendanceCalendarSerializer
+from .changes import ChangeFeedQuerySerializer
+from .jobs import (
+    JobSerializer, JobCreateSerializer, AttendanceExportJobSerializer, RollupRebuildJobSerializer,
+    CounterReconcileJobSerializer,
+)
 
-__all__ = ['DepartmentSerializer', 'EmployeeSerializer', 'AttendanceSerializer']
+__all__ = [
+    'DepartmentSerializer', 'EmployeeSerializer', 'EmployeeSearchQuerySerializer', 'EmployeeImportRowSerializer',
+    'EmployeeImportQuerySerializer', 'AttendanceSerializer',
+    'AttendanceBulkSerializer', 'AttendanceBulkRowSerializer', 'AttendanceExportQuerySerializer',
+    'AttendanceSummaryQuerySerializer', 'EmployeeAttendanceSummarySerializer',
+    'DepartmentAttendanceSummarySerializer', 'AttendanceBoardQuerySerializer', 'AttendanceBoardSerializer',
+    'AttendanceCalendarQuerySerializer', 'AttendanceCalendarSerializer', 'ChangeFeedQuerySerializer',
+    'JobSerializer', 'JobCreateSerializer', 'AttendanceExportJobSerializer', 'RollupRebuildJobSerializer',
+    'CounterReconcileJobSerializer',
+]
 
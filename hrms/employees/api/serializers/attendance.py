@@ -1,8 +1,10 @@
+from django.conf import settings
 from rest_framework import serializers
 from employees.models import Attendance
+from .base import TimedSerializerMixin
 
 
-class AttendanceSerializer(serializers.ModelSerializer):
+class AttendanceSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for Attendance model.
 
@@ -30,3 +32,48 @@ class AttendanceSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Status must be either 'PRESENT' or 'ABSENT'.")
         return value
 
+
+class AttendanceBulkRowSerializer(serializers.Serializer):
+    """A single (employee_id, date, status) row of a bulk attendance upload"""
+    employee_id = serializers.CharField()
+    date = serializers.DateField()
+    status = serializers.CharField()
+
+    def validate_employee_id(self, value):
+        """Validate that employee_id is not empty"""
+        if not value.strip():
+            raise serializers.ValidationError("Employee ID cannot be empty.")
+        return value.strip()
+
+    def validate_status(self, value):
+        """Validate status is PRESENT or ABSENT"""
+        if value not in ['PRESENT', 'ABSENT']:
+            raise serializers.ValidationError("Status must be either 'PRESENT' or 'ABSENT'.")
+        return value
+
+
+class AttendanceBulkSerializer(serializers.Serializer):
+    """
+    Envelope for a bulk attendance upload.
+
+    Only the shape of the batch is validated here; each record is validated
+    individually by the view with AttendanceBulkRowSerializer so that one bad
+    row is reported next to its index instead of rejecting the whole batch.
+    """
+    CONFLICT_SKIP = 'skip'
+    CONFLICT_OVERWRITE = 'overwrite'
+    CONFLICT_FAIL = 'fail'
+    CONFLICT_POLICIES = [CONFLICT_SKIP, CONFLICT_OVERWRITE, CONFLICT_FAIL]
+
+    conflict_policy = serializers.ChoiceField(choices=CONFLICT_POLICIES, default=CONFLICT_SKIP)
+    records = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=settings.ATTENDANCE_BULK_MAX_ROWS,
+    )
+
+
+class AttendanceExportQuerySerializer(serializers.Serializer):
+    """Query parameters for GET /attendance/export/ besides start_date/end_date"""
+    employee_id = serializers.CharField(required=False)
+    department = serializers.IntegerField(required=False)
@@ -0,0 +1,9 @@
+from employees import instrumentation
+
+
+class TimedSerializerMixin:
+    """Count the time spent in to_representation as the request's serialization time."""
+
+    def to_representation(self, instance):
+        with instrumentation.measure('serialize'):
+            return super().to_representation(instance)
@@ -0,0 +1,25 @@
+from django.utils import timezone
+from rest_framework import serializers
+from employees.models import Attendance
+from .base import TimedSerializerMixin
+
+
+UNMARKED = 'UNMARKED'
+
+
+class AttendanceBoardQuerySerializer(serializers.Serializer):
+    """Query parameters for GET /attendance/board/"""
+    date = serializers.DateField(default=timezone.localdate)
+    department = serializers.IntegerField(required=False)
+    status = serializers.ChoiceField(choices=[*Attendance.STATUS_CHOICES, (UNMARKED, 'Unmarked')], required=False)
+
+
+class AttendanceBoardSerializer(TimedSerializerMixin, serializers.Serializer):
+    """One employee's attendance on the board's date, from columns annotated by the view"""
+    employee = serializers.IntegerField(source='id', read_only=True)
+    employee_id = serializers.CharField(read_only=True)
+    full_name = serializers.CharField(read_only=True)
+    department = serializers.IntegerField(source='department_id', read_only=True)
+    department_name = serializers.CharField(source='department.name', read_only=True)
+    attendance_id = serializers.IntegerField(read_only=True, allow_null=True)
+    status = serializers.CharField(read_only=True)
@@ -0,0 +1,44 @@
+from datetime import date
+
+from django.utils import timezone
+from rest_framework import serializers
+from employees.rollups import calendar_days
+from .base import TimedSerializerMixin
+
+
+def current_year():
+    return timezone.localdate().year
+
+
+class AttendanceCalendarQuerySerializer(serializers.Serializer):
+    """Query parameters for GET /attendance/calendar/; the list parameters may be repeated"""
+    year = serializers.IntegerField(min_value=1, max_value=9999, default=current_year)
+    employee_id = serializers.ListField(child=serializers.CharField(), required=False, max_length=100)
+    department = serializers.IntegerField(required=False)
+    present_on = serializers.ListField(child=serializers.DateField(), required=False, max_length=366)
+    absent_on = serializers.ListField(child=serializers.DateField(), required=False, max_length=366)
+
+
+class AttendanceCalendarSerializer(TimedSerializerMixin, serializers.Serializer):
+    """One employee's year, from the rollup rows prefetched by the view"""
+    employee = serializers.IntegerField(source='id', read_only=True)
+    employee_id = serializers.CharField(read_only=True)
+    full_name = serializers.CharField(read_only=True)
+    department = serializers.IntegerField(source='department_id', read_only=True)
+    department_name = serializers.CharField(source='department.name', read_only=True)
+    months = serializers.SerializerMethodField()
+
+    def get_months(self, obj):
+        """Every month of the year; ``days`` has one character per day, P, A or - (no record)"""
+        rows = {row.month: row for row in obj.calendar_months}
+        months = []
+        for number in range(1, 13):
+            month = date(self.context['year'], number, 1)
+            row = rows.get(month)
+            months.append({
+                'month': month.strftime('%Y-%m'),
+                'present_count': row.present_count if row else 0,
+                'absent_count': row.absent_count if row else 0,
+                'days': calendar_days(month, row.present_mask, row.absent_mask) if row else calendar_days(month, 0, 0),
+            })
+        return months
@@ -0,0 +1,16 @@
+from rest_framework import serializers
+from employees.changes import OBJECT_TYPES, parse_position
+
+
+class ChangeFeedQuerySerializer(serializers.Serializer):
+    """Query parameters for GET /changes/; ``type`` may be repeated"""
+    updated_since = serializers.CharField(required=False, max_length=50)
+    type = serializers.ListField(child=serializers.ChoiceField(choices=OBJECT_TYPES), required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=1000, default=100)
+
+    def validate_updated_since(self, value):
+        """The position of a ``next`` token returned by the feed"""
+        try:
+            return parse_position(value)
+        except ValueError:
+            raise serializers.ValidationError('Not a position returned by the change feed.')
@@ -1,14 +1,29 @@
 from rest_framework import serializers
+from employees.counters import today_counts
 from employees.models import Department
+from .base import TimedSerializerMixin
 
 
-class DepartmentSerializer(serializers.ModelSerializer):
-    """Serializer for Department model"""
-    
+class DepartmentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """
+    Serializer for Department model.
+
+    The headcount and today's attendance counts are columns of the department
+    row (employees.counters), so they cost no query of their own.
+    """
+    present_today = serializers.SerializerMethodField()
+    absent_today = serializers.SerializerMethodField()
+
     class Meta:
         model = Department
-        fields = ['id', 'name', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        fields = ['id', 'name', 'employee_count', 'present_today', 'absent_today', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'employee_count', 'created_at', 'updated_at']
+
+    def get_present_today(self, obj):
+        return today_counts(obj)[0]
+
+    def get_absent_today(self, obj):
+        return today_counts(obj)[1]
 
     def validate_name(self, value):
         """Validate that department name is not empty"""
@@ -1,9 +1,15 @@
 from rest_framework import serializers
-from employees.models import Employee, Department
+from employees.models import Employee
+from .base import TimedSerializerMixin
 
 
-class EmployeeSerializer(serializers.ModelSerializer):
-    """Serializer for Employee model"""
+class EmployeeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """
+    Serializer for Employee model.
+
+    ``department`` is a PrimaryKeyRelatedField, which loads the department
+    (and rejects unknown IDs) itself, so it is not validated again here.
+    """
     department_name = serializers.CharField(source='department.name', read_only=True)
     
     class Meta:
@@ -29,11 +35,27 @@ class EmployeeSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Employee ID cannot be empty.")
         return value.strip()
 
-    def validate_department(self, value):
-        """Validate that department exists"""
-        if not value:
-            raise serializers.ValidationError("Department is required.")
-        if not Department.objects.filter(id=value.id).exists():
-            raise serializers.ValidationError("Department does not exist.")
-        return value
 
+class EmployeeSearchQuerySerializer(serializers.Serializer):
+    """Query parameters for GET /employees/search/"""
+    search = serializers.CharField(max_length=200)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
+
+
+class EmployeeImportRowSerializer(serializers.Serializer):
+    """One row of an employee import; the department is given by name"""
+    employee_id = serializers.CharField(max_length=255)
+    full_name = serializers.CharField(max_length=255)
+    email = serializers.EmailField(max_length=254)
+    department = serializers.CharField(max_length=255)
+
+    def validate_email(self, value):
+        """Store emails in lower case, as EmployeeSerializer does"""
+        return value.lower()
+
+
+class EmployeeImportQuerySerializer(serializers.Serializer):
+    """Query parameters for POST /employees/import/"""
+    dry_run = serializers.BooleanField(default=False)
+    # Queue the import as a background job (employees.api.tasks) and return the job
+    background = serializers.BooleanField(default=False)
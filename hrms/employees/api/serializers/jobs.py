@@ -0,0 +1,66 @@
+from rest_framework import serializers
+from rest_framework.reverse import reverse
+from employees.models import Job
+from .attendance import AttendanceExportQuerySerializer
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """A background job and, once it has one, the URL of its result file"""
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'kind', 'params', 'status', 'progress', 'total', 'attempts', 'max_attempts', 'result', 'error',
+            'download_url', 'created_at', 'started_at', 'finished_at',
+        ]
+        read_only_fields = fields
+
+    def get_download_url(self, obj):
+        if not obj.result_name:
+            return None
+        return reverse('job-download', kwargs={'pk': obj.pk}, request=self.context.get('request'))
+
+
+class AttendanceExportJobSerializer(AttendanceExportQuerySerializer):
+    """Parameters of an attendance_export job: those of GET /attendance/export/"""
+    format = serializers.ChoiceField(choices=['csv', 'ndjson'], default='csv')
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+
+
+class RollupRebuildJobSerializer(serializers.Serializer):
+    """Parameters of a rebuild_rollups job; an open bound rebuilds from the first or to the last month"""
+    start_month = serializers.DateField(input_formats=['%Y-%m'], required=False)
+    end_month = serializers.DateField(input_formats=['%Y-%m'], required=False)
+
+    def validate(self, attrs):
+        if attrs.get('start_month') and attrs.get('end_month') and attrs['start_month'] > attrs['end_month']:
+            raise serializers.ValidationError({'end_month': ['Must not be before start_month.']})
+        return attrs
+
+
+class CounterReconcileJobSerializer(serializers.Serializer):
+    """Parameters of a reconcile_counters job"""
+    dry_run = serializers.BooleanField(default=False)
+
+
+class JobCreateSerializer(serializers.Serializer):
+    """Body of POST /jobs/. Employee imports are queued by POST /employees/import/?background=true"""
+    # The kinds of job that can be queued here, and the serializer of their parameters
+    params_serializers = {
+        'attendance_export': AttendanceExportJobSerializer,
+        'rebuild_rollups': RollupRebuildJobSerializer,
+        'reconcile_counters': CounterReconcileJobSerializer,
+    }
+
+    kind = serializers.ChoiceField(choices=list(params_serializers))
+    params = serializers.DictField(default=dict)
+
+    def validate(self, attrs):
+        """The parameters are replaced by their JSON representation, with the defaults filled in"""
+        params = self.params_serializers[attrs['kind']](data=attrs['params'])
+        if not params.is_valid():
+            raise serializers.ValidationError({'params': params.errors})
+        attrs['params'] = params.data
+        return attrs
@@ -0,0 +1,51 @@
+from rest_framework import serializers
+from .base import TimedSerializerMixin
+
+
+class AttendanceSummaryQuerySerializer(serializers.Serializer):
+    """Query parameters for GET /attendance/summary/"""
+    GROUP_BY_EMPLOYEE = 'employee'
+    GROUP_BY_DEPARTMENT = 'department'
+
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    group_by = serializers.ChoiceField(choices=[GROUP_BY_EMPLOYEE, GROUP_BY_DEPARTMENT], default=GROUP_BY_EMPLOYEE)
+    department = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        """Validate that the range is not reversed"""
+        if attrs['start_date'] > attrs['end_date']:
+            raise serializers.ValidationError({'end_date': ['End date must be on or after start date.']})
+        return attrs
+
+
+def attendance_rate(obj):
+    """Share of recorded days marked PRESENT, or None if nothing was recorded"""
+    total = obj.present_count + obj.absent_count
+    return round(obj.present_count / total, 4) if total else None
+
+
+class EmployeeAttendanceSummarySerializer(TimedSerializerMixin, serializers.Serializer):
+    """Attendance summary row for one employee, from counts annotated by the view"""
+    employee_id = serializers.CharField(read_only=True)
+    full_name = serializers.CharField(read_only=True)
+    department = serializers.IntegerField(source='department_id', read_only=True)
+    department_name = serializers.CharField(source='department.name', read_only=True)
+    present_count = serializers.IntegerField(read_only=True)
+    absent_count = serializers.IntegerField(read_only=True)
+    attendance_rate = serializers.SerializerMethodField()
+
+    def get_attendance_rate(self, obj):
+        return attendance_rate(obj)
+
+
+class DepartmentAttendanceSummarySerializer(TimedSerializerMixin, serializers.Serializer):
+    """Attendance summary row for one department, from counts annotated by the view"""
+    department = serializers.IntegerField(source='id', read_only=True)
+    department_name = serializers.CharField(source='name', read_only=True)
+    present_count = serializers.IntegerField(read_only=True)
+    absent_count = serializers.IntegerField(read_only=True)
+    attendance_rate = serializers.SerializerMethodField()
+
+    def get_attendance_rate(self, obj):
+        return attendance_rate(obj)
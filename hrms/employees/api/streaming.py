@@ -0,0 +1,38 @@
+"""
+Streamed response bodies under ASGI.
+
+Django sends a StreamingHttpResponse whose content is a synchronous iterator
+to an ASGI server by reading the whole iterator into a list first, so an
+export would be held in memory and nothing sent until it is complete.
+``streaming_content()`` gives ASGI requests an asynchronous iterator instead.
+It produces each chunk with sync_to_async on the request's thread, where
+Django runs the sync view, so a cursor or transaction the iterator opened
+stays on its connection.
+"""
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+
+
+def is_asgi(request):
+    """Whether ``request`` (a Django or DRF request) is served over ASGI."""
+    return isinstance(getattr(request, '_request', request), ASGIRequest)
+
+
+async def pull(chunks):
+    """The chunks of the synchronous iterator ``chunks``, each produced on the request's thread."""
+    produce = sync_to_async(next)
+    try:
+        while True:
+            chunk = await produce(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        # Ends a transaction the iterator holds open if the client went away
+        if hasattr(chunks, 'close'):
+            await sync_to_async(chunks.close)()
+
+
+def streaming_content(request, chunks):
+    """``chunks`` as the content of a streaming response to ``request``."""
+    return pull(iter(chunks)) if is_asgi(request) else chunks
@@ -0,0 +1,119 @@
+"""
+The kinds of background job (employees.jobs), registered on import:
+
+- ``attendance_export``: GET /attendance/export/ written to a file
+- ``employee_import``: POST /employees/import/?background=true, with the
+  report of the rows not imported as its file
+- ``rebuild_rollups``: the rebuild_attendance_rollups command, one month per
+  transaction so that progress is reported and locks are held briefly
+- ``reconcile_counters``: the reconcile_department_counters command
+
+The API validates the parameters of a job before queueing it
+(employees.api.serializers.jobs).
+"""
+import os
+
+from django.db.models import Max, Min
+from django.utils.dateparse import parse_date
+
+from employees import jobs
+from employees.counters import reconcile_department_counters
+from employees.models import Attendance, AttendanceMonthlySummary
+from employees.rollups import month_start, next_month, rebuild_monthly_summaries
+from employees.api import imports
+from employees.api.renderers import CSVRenderer, NDJSONRenderer
+from employees.api.views.export import AttendanceExportView
+
+
+EXPORT_RENDERERS = {renderer.format: renderer for renderer in (CSVRenderer, NDJSONRenderer)}
+
+IMPORT_REPORT_NAME = 'employee-import-errors.csv'
+
+
+def import_input_name(file_format):
+    """The name of an import job's input file."""
+    return f'input.{file_format}'
+
+
+@jobs.register('attendance_export')
+def export_attendance(run):
+    renderer = EXPORT_RENDERERS[run.params.get('format', CSVRenderer.format)]()
+    queryset = AttendanceExportView.export_queryset(run.params)
+    run.progress(0, queryset.count())
+
+    def rows():
+        for done, row in enumerate(AttendanceExportView.iterate(queryset), 1):
+            # Written by the heartbeat, so counting costs no query
+            run.done = done
+            yield row
+
+    columns = [column for column, _ in AttendanceExportView.columns]
+    content_type = f'{renderer.media_type}; charset={renderer.charset}'
+    with run.open_result(f'attendance.{renderer.format}', content_type) as file:
+        for chunk in renderer.stream(columns, rows()):
+            file.write(chunk)
+    return {'rows': run.done}
+
+
+# A retry would report the rows imported by the failed attempt as duplicates
+@jobs.register('employee_import', max_attempts=1)
+def import_employees(run):
+    file_format, dry_run = run.params['format'], run.params.get('dry_run', False)
+    with open(run.input_path(import_input_name(file_format)), 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        run.progress(0, size)
+        try:
+            result = imports.import_employees(
+                imports.READERS[file_format](file), dry_run=dry_run,
+                on_chunk=lambda result: run.progress(file.tell()),
+            )
+        except imports.ImportFileError as exc:
+            write_import_report(run, exc.result)
+            raise jobs.JobFailed(str(exc), {'dry_run': dry_run, 'summary': exc.result.summary}) from exc
+    write_import_report(run, result)
+    return {'dry_run': dry_run, 'summary': result.summary}
+
+
+def write_import_report(run, result):
+    if result.errors:
+        with run.open_result(IMPORT_REPORT_NAME, f'{CSVRenderer.media_type}; charset={CSVRenderer.charset}') as file:
+            for chunk in CSVRenderer().stream(imports.REPORT_COLUMNS, imports.report_rows(result)):
+                file.write(chunk)
+
+
+@jobs.register('rebuild_rollups')
+def rebuild_rollups(run):
+    start, end = (parse_date(run.params.get(bound) or '') for bound in ('start_month', 'end_month'))
+    if start is None or end is None:
+        # An open range covers every month with attendance or with a summary row to delete
+        bounds = Attendance.objects.aggregate(first=Min('date'), last=Max('date'))
+        summary_bounds = AttendanceMonthlySummary.objects.aggregate(first=Min('month'), last=Max('month'))
+        start = start or min(filter(None, (bounds['first'], summary_bounds['first'])), default=None)
+        end = end or max(filter(None, (bounds['last'], summary_bounds['last'])), default=None)
+
+    months = []
+    month = start and month_start(start)
+    while month and month <= end:
+        months.append(month)
+        month = next_month(month)
+
+    rows = 0
+    run.progress(0, len(months))
+    for done, month in enumerate(months, 1):
+        rows += rebuild_monthly_summaries(month, month)
+        run.progress(done)
+    return {'months': len(months), 'rows': rows}
+
+
+@jobs.register('reconcile_counters')
+def reconcile_counters(run):
+    dry_run = run.params.get('dry_run', False)
+    drifted = reconcile_department_counters(dry_run=dry_run)
+    counts = ('employees', 'present', 'absent')
+    return {
+        'dry_run': dry_run,
+        'drifted': [
+            {'department': name, 'stored': dict(zip(counts, stored)), 'actual': dict(zip(counts, actual))}
+            for name, stored, actual in drifted
+        ],
+    }
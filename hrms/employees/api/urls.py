@@ -1,17 +1,34 @@
-from django.urls import path, include
+from django.conf import settings
+from django.urls import path, re_path, include
 from rest_framework.routers import DefaultRouter
-from employees.api.views import DepartmentViewSet, EmployeeViewSet, AttendanceViewSet
+from employees.api.views import (
+    DepartmentViewSet, EmployeeViewSet, EmployeeImportView, AttendanceViewSet, AttendanceBulkView,
+    AttendanceSummaryView, AttendanceBoardView, AttendanceCalendarView, AttendanceExportView, ChangeFeedView,
+    JobViewSet, MetricsView,
+)
+from employees.api.async_views import async_read_view
 
 # Create a router and register our viewsets
 router = DefaultRouter()
 router.register(r'departments', DepartmentViewSet, basename='department')
 router.register(r'employees', EmployeeViewSet, basename='employee')
+router.register(r'jobs', JobViewSet, basename='job')
+
+
+def read_view(viewset, actions):
+    """The view for a route whose GET is one of the read endpoints, async when enabled."""
+    if settings.ASYNC_READ_VIEWS:
+        return async_read_view(viewset, actions)
+    return viewset.as_view(actions)
+
 
 urlpatterns = [
+    # Ahead of the router, which would otherwise take "import" as an employee pk
+    path('employees/import/', EmployeeImportView.as_view(), name='employee-import'),
     # Nested attendance routes under employees
     path(
         'employees/<str:employee_id>/attendance/',
-        AttendanceViewSet.as_view({'get': 'list', 'post': 'create'}),
+        read_view(AttendanceViewSet, {'get': 'list', 'post': 'create'}),
         name='employee-attendance-list',
     ),
     path(
@@ -19,6 +36,30 @@ urlpatterns = [
         AttendanceViewSet.as_view({'delete': 'destroy'}),
         name='employee-attendance-detail',
     ),
+    path('attendance/bulk/', AttendanceBulkView.as_view(), name='attendance-bulk'),
+    path('attendance/summary/', AttendanceSummaryView.as_view(), name='attendance-summary'),
+    path('attendance/board/', AttendanceBoardView.as_view(), name='attendance-board'),
+    path('attendance/calendar/', AttendanceCalendarView.as_view(), name='attendance-calendar'),
+    path('attendance/export/', AttendanceExportView.as_view(), name='attendance-export'),
+    path('changes/', ChangeFeedView.as_view(), name='change-feed'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
+]
+
+if settings.ASYNC_READ_VIEWS:
+    # Take the read routes ahead of the router, with the same names and patterns
+    urlpatterns += [
+        re_path(r'^departments/$', read_view(DepartmentViewSet, {'get': 'list', 'post': 'create'}),
+                name='department-list'),
+        re_path(r'^employees/$', read_view(EmployeeViewSet, {'get': 'list', 'post': 'create'}),
+                name='employee-list'),
+        # Before the detail route, which would otherwise take "search" as a pk
+        re_path(r'^employees/search/$', EmployeeViewSet.as_view({'get': 'search'}), name='employee-search'),
+        re_path(r'^employees/(?P<pk>[^/.]+)/$',
+                read_view(EmployeeViewSet, {'get': 'retrieve', 'delete': 'destroy'}),
+                name='employee-detail'),
+    ]
+
+urlpatterns += [
     path('', include(router.urls)),
 ]
 
@@ -1,6 +1,17 @@
 from .department import DepartmentViewSet
-from .employee import EmployeeViewSet
-from .attendance import AttendanceViewSet
+from .employee import EmployeeViewSet, EmployeeImportView
+from .attendance import AttendanceViewSet, AttendanceBulkView
+from .summary import AttendanceSummaryView
+from .board import AttendanceBoardView
+from .calendar import AttendanceCalendarView
+from .export import AttendanceExportView
+from .changes import ChangeFeedView
+from .jobs import JobViewSet
+from .metrics import MetricsView
 
-__all__ = ['DepartmentViewSet', 'EmployeeViewSet', 'AttendanceViewSet']
+__all__ = [
+    'DepartmentViewSet', 'EmployeeViewSet', 'EmployeeImportView', 'AttendanceViewSet', 'AttendanceBulkView',
+    'AttendanceSummaryView', 'AttendanceBoardView', 'AttendanceCalendarView', 'AttendanceExportView',
+    'ChangeFeedView', 'JobViewSet', 'MetricsView',
+]
 
@@ -1,13 +1,51 @@
-from rest_framework import viewsets, mixins, status
+from asgiref.sync import sync_to_async
+from rest_framework import viewsets, mixins, generics, serializers, status
 from rest_framework.response import Response
-from django.db import IntegrityError
+from django.db import IntegrityError, connection, transaction
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from django.utils.dateparse import parse_date
+from employees import cache
 from employees.models import Attendance, Employee
-from employees.api.serializers import AttendanceSerializer
+from employees.rollups import ATTENDANCE_TABLE, apply_attendance_changes
+from employees.api.async_views import AsyncReadMixin
+from employees.api.conditional import ConditionalGetMixin
+from employees.api.idempotency import idempotent
+from employees.api.rows import ValuesListMixin
+from employees.api.serializers import (
+    AttendanceSerializer, AttendanceBulkSerializer, AttendanceBulkRowSerializer,
+)
+
+
+def filter_date_range(queryset, query_params):
+    """Apply the optional start_date/end_date (inclusive) filters; unparseable dates are ignored."""
+    # Filter by start date
+    start_date = query_params.get('start_date', None)
+    if start_date:
+        try:
+            start = parse_date(start_date)
+            if start:
+                queryset = queryset.filter(date__gte=start)
+        except (ValueError, TypeError):
+            pass
+
+    # Filter by end date
+    end_date = query_params.get('end_date', None)
+    if end_date:
+        try:
+            end = parse_date(end_date)
+            if end:
+                queryset = queryset.filter(date__lte=end)
+        except (ValueError, TypeError):
+            pass
+
+    return queryset
 
 
 class AttendanceViewSet(
+    ValuesListMixin,
+    AsyncReadMixin,
+    ConditionalGetMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.DestroyModelMixin,
@@ -20,44 +58,68 @@ class AttendanceViewSet(
     All operations are scoped to the employee identified by the URL.
     """
     serializer_class = AttendanceSerializer
+    # Matches Attendance.Meta.ordering; unique because of unique_together (employee, date)
+    cursor_ordering = ('-date', 'employee')
+    # employee name/email/id are part of each row, so employee changes move the ETag too
+    conditional_fields = ('updated_at', 'employee__updated_at')
+    async_query_params = frozenset({'page', 'page_size', 'start_date', 'end_date'})
 
     def _get_employee(self):
-        """Look up the employee from the URL kwargs (employee_id field)."""
-        employee_id = self.kwargs['employee_id']
-        return get_object_or_404(Employee, employee_id=employee_id)
+        """Look up the employee from the URL kwargs (employee_id field), once per request."""
+        if not hasattr(self, '_employee'):
+            employee_id = self.kwargs['employee_id']
+            self._employee = cache.employees.get_or_load(
+                ('employee_id', employee_id),
+                lambda: get_object_or_404(Employee, employee_id=employee_id),
+            )
+        return self._employee
 
     def get_queryset(self):
-        """Return attendance records for the employee, with optional date filters."""
-        employee = self._get_employee()
-        queryset = Attendance.objects.filter(employee=employee)
+        """
+        Return attendance records for the employee, with optional date filters.
 
-        # Filter by start date
-        start_date = self.request.query_params.get('start_date', None)
-        if start_date:
-            try:
-                start = parse_date(start_date)
-                if start:
-                    queryset = queryset.filter(date__gte=start)
-            except (ValueError, TypeError):
-                pass
-
-        # Filter by end date
-        end_date = self.request.query_params.get('end_date', None)
-        if end_date:
-            try:
-                end = parse_date(end_date)
-                if end:
-                    queryset = queryset.filter(date__lte=end)
-            except (ValueError, TypeError):
-                pass
+        The employee is matched through the join rather than looked up first;
+        only an empty list needs to know whether the employee exists.
+        """
+        # The serializer reads employee name/email/id on every row, so join it in
+        queryset = (
+            Attendance.objects.filter(employee__employee_id=self.kwargs['employee_id']).select_related('employee')
+        )
+        return filter_date_range(queryset, self.request.query_params)
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if self.is_empty(response):
+            # 404 for an unknown employee rather than an empty list
+            self._get_employee()
+        return response
 
-        return queryset
+    async def alist(self, request, *args, **kwargs):
+        response = await super().alist(request, *args, **kwargs)
+        if self.is_empty(response):
+            await sync_to_async(self._get_employee)()
+        return response
+
+    def is_empty(self, response):
+        """True if the list has no rows: a zero count, or a page without results."""
+        if getattr(self, 'known_count', None) == 0:
+            return True
+        return response.data is not None and not response.data['results']
 
     def perform_create(self, serializer):
         """Automatically assign the employee from the URL to the attendance record."""
         employee = self._get_employee()
-        serializer.save(employee=employee)
+        with transaction.atomic():
+            attendance = serializer.save(employee=employee)
+            apply_attendance_changes([(employee.pk, attendance.date, None, attendance.status)])
+
+    def perform_destroy(self, instance):
+        """Delete the record and remove it from the monthly rollup."""
+        with transaction.atomic():
+            instance.delete()
+            apply_attendance_changes([(instance.employee_id, instance.date, instance.status, None)])
 
+    @idempotent
     def create(self, request, *args, **kwargs):
         """Create attendance with duplicate handling."""
         serializer = self.get_serializer(data=request.data)
@@ -78,3 +140,235 @@ class AttendanceViewSet(
                 status=status.HTTP_409_CONFLICT
             )
 
+
+class AttendanceBulkView(generics.GenericAPIView):
+    """
+    Batch upsert of attendance rows: POST /attendance/bulk/
+
+    Every record is validated up front, employee_ids are resolved with a single
+    lookup and the batch is written with bulk INSERTs inside one transaction.
+    Existing (employee, date) rows are handled according to conflict_policy:
+
+    - skip: leave the existing row untouched and report it as a conflict
+      (INSERT ... ON CONFLICT DO NOTHING, which also skips a row another
+      request inserts meanwhile)
+    - overwrite: update the existing row's status, from the status it had, a
+      row inserted meanwhile included (INSERT ... ON CONFLICT DO UPDATE)
+    - fail: write nothing if any record conflicts or is invalid, or if a row
+      is inserted meanwhile
+    """
+    serializer_class = AttendanceBulkSerializer
+
+    BATCH_SIZE = 1000
+
+    @idempotent
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        policy = serializer.validated_data['conflict_policy']
+        records = serializer.validated_data['records']
+
+        results, rows = self._validate_records(records)
+        errors = [result for result in results if result['result'] == 'error']
+        if policy == AttendanceBulkSerializer.CONFLICT_FAIL and errors:
+            return self._rejected(results, status.HTTP_400_BAD_REQUEST,
+                                  f'{len(errors)} record(s) failed validation.')
+
+        try:
+            with transaction.atomic():
+                conflicts = self._write(rows, policy)
+                if policy == AttendanceBulkSerializer.CONFLICT_FAIL and conflicts:
+                    transaction.set_rollback(True)
+                    for row in conflicts:
+                        row['result']['result'] = 'conflict'
+                    return self._rejected(results, status.HTTP_409_CONFLICT,
+                                          f'{len(conflicts)} record(s) already exist.')
+        except IntegrityError:
+            return Response(
+                {
+                    'message': 'Validation failed',
+                    'errors': {
+                        'non_field_errors': ['Attendance was modified concurrently. Please retry the batch.']
+                    }
+                },
+                status=status.HTTP_409_CONFLICT
+            )
+
+        return Response({
+            'conflict_policy': policy,
+            'summary': self._summary(results),
+            'results': results,
+        })
+
+    def _validate_records(self, records):
+        """
+        Validate every record and resolve employee_ids with one query.
+
+        Returns the per-record result list (in request order) and the valid rows.
+        """
+        row_serializer = AttendanceBulkRowSerializer()
+        results = []
+        rows = []
+        seen = set()
+
+        for index, record in enumerate(records):
+            result = {
+                'index': index,
+                'employee_id': record.get('employee_id'),
+                'date': record.get('date'),
+                'result': None,
+            }
+            results.append(result)
+            try:
+                data = row_serializer.run_validation(record)
+            except serializers.ValidationError as exc:
+                result.update(result='error', errors=exc.detail)
+                continue
+
+            result.update(employee_id=data['employee_id'], date=data['date'].isoformat())
+            key = (data['employee_id'], data['date'])
+            if key in seen:
+                result.update(result='error', errors={
+                    'non_field_errors': ['Duplicate employee_id and date in this batch.']
+                })
+                continue
+            seen.add(key)
+            rows.append({**data, 'result': result})
+
+        employee_ids = {row['employee_id'] for row in rows}
+        employees = dict(
+            Employee.objects.filter(employee_id__in=employee_ids).values_list('employee_id', 'id')
+        )
+        valid_rows = []
+        for row in rows:
+            row['employee'] = employees.get(row['employee_id'])
+            if row['employee'] is None:
+                row['result'].update(result='error', errors={'employee_id': ['Employee not found.']})
+            else:
+                valid_rows.append(row)
+
+        return results, valid_rows
+
+    def _write(self, rows, policy):
+        """Insert or upsert the valid rows; return the rows that hit an existing record."""
+        if not rows:
+            return []
+
+        existing = self._lock(rows)
+        conflicts = [row for row in rows if (row['employee'], row['date']) in existing]
+        new_rows = [row for row in rows if (row['employee'], row['date']) not in existing]
+
+        if policy == AttendanceBulkSerializer.CONFLICT_FAIL:
+            if conflicts:
+                return conflicts
+            # A row another request inserted since the lookup fails the INSERT,
+            # and the whole batch with it
+            Attendance.objects.bulk_create([self._instance(row) for row in new_rows], batch_size=self.BATCH_SIZE)
+            conflict_result = 'conflict'
+            changes = []
+        else:
+            # Rows another request inserted since the lookup are not in RETURNING
+            inserted = self._insert(new_rows) if new_rows else set()
+            raced = [row for row in new_rows if (row['employee'], row['date']) not in inserted]
+            new_rows = [row for row in new_rows if (row['employee'], row['date']) in inserted]
+            conflicts += raced
+            if policy == AttendanceBulkSerializer.CONFLICT_OVERWRITE:
+                if raced:
+                    existing.update(self._lock(raced))
+                if conflicts:
+                    # Every row is locked by now, so this only updates; a raced row
+                    # deleted meanwhile is inserted again, from no previous status
+                    Attendance.objects.bulk_create(
+                        [self._instance(row) for row in conflicts],
+                        batch_size=self.BATCH_SIZE,
+                        update_conflicts=True,
+                        unique_fields=['employee', 'date'],
+                        update_fields=['status', 'updated_at'],
+                    )
+                conflict_result = 'updated'
+                changes = [
+                    (row['employee'], row['date'], existing.get((row['employee'], row['date'])), row['status'])
+                    for row in conflicts
+                ]
+            else:
+                conflict_result = 'conflict'
+                changes = []
+
+        changes += [(row['employee'], row['date'], None, row['status']) for row in new_rows]
+        apply_attendance_changes(changes)
+
+        for row in new_rows:
+            row['result']['result'] = 'created'
+        for row in conflicts:
+            row['result']['result'] = conflict_result
+        return conflicts
+
+    @staticmethod
+    def _lock(rows):
+        """Lock the existing records of ``rows``; returns {(employee, date): status}."""
+        return {
+            (employee_id, day): current_status
+            for employee_id, day, current_status in Attendance.objects.select_for_update()
+            .filter(
+                employee_id__in={row['employee'] for row in rows},
+                date__in={row['date'] for row in rows},
+            )
+            .order_by()
+            .values_list('employee_id', 'date', 'status')
+        }
+
+    def _insert(self, rows):
+        """
+        INSERT ... ON CONFLICT DO NOTHING the rows; returns the (employee, date)
+        keys of those inserted, as RETURNING reports them.
+        """
+        now = timezone.now()
+        inserted = set()
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), self.BATCH_SIZE):
+                batch = rows[start:start + self.BATCH_SIZE]
+                cursor.execute(
+                    f"""
+                    INSERT INTO {ATTENDANCE_TABLE} (employee_id, date, status, created_at, updated_at)
+                    SELECT employee_id, date, status, %s, %s
+                    FROM unnest(%s::integer[], %s::date[], %s::varchar[]) AS t(employee_id, date, status)
+                    ON CONFLICT (employee_id, date) DO NOTHING
+                    RETURNING employee_id, date
+                    """,
+                    [
+                        now, now,
+                        [row['employee'] for row in batch],
+                        [row['date'] for row in batch],
+                        [row['status'] for row in batch],
+                    ],
+                )
+                inserted.update(cursor.fetchall())
+        return inserted
+
+    @staticmethod
+    def _instance(row):
+        return Attendance(employee_id=row['employee'], date=row['date'], status=row['status'])
+
+    @staticmethod
+    def _summary(results):
+        summary = {'created': 0, 'updated': 0, 'conflict': 0, 'error': 0}
+        for result in results:
+            if result['result'] in summary:
+                summary[result['result']] += 1
+        return summary
+
+    def _rejected(self, results, status_code, message):
+        """Response for a conflict_policy=fail batch that was not written."""
+        for result in results:
+            if result['result'] is None:
+                result['result'] = 'skipped'
+        return Response(
+            {
+                'message': 'Validation failed',
+                'errors': {'non_field_errors': [f'{message} No records were written.']},
+                'conflict_policy': AttendanceBulkSerializer.CONFLICT_FAIL,
+                'summary': self._summary(results),
+                'results': results,
+            },
+            status=status_code
+        )
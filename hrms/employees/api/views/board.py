@@ -0,0 +1,52 @@
+from django.db.models import Count, F, FilteredRelation, Q, Value
+from django.db.models.functions import Coalesce
+from rest_framework import generics
+
+from employees.models import Employee
+from employees.api.conditional import ConditionalGetMixin
+from employees.api.rows import ValuesListMixin
+from employees.api.serializers import AttendanceBoardQuerySerializer, AttendanceBoardSerializer
+from employees.api.serializers.board import UNMARKED
+
+
+class AttendanceBoardView(ValuesListMixin, ConditionalGetMixin, generics.ListAPIView):
+    """
+    Every employee's attendance on one date, for the whole organisation:
+    GET /attendance/board/?date=&department=&status=PRESENT|ABSENT|UNMARKED
+
+    Employees are LEFT JOINed to their attendance row for the date, so a page
+    is a single query and employees without a row come back as UNMARKED. The
+    date defaults to today. Pages are ordered by employee and support ?cursor=.
+    """
+    serializer_class = AttendanceBoardSerializer
+    cursor_ordering = ('id',)
+    conditional_fields = ('updated_at', 'department__updated_at', 'day__updated_at')
+
+    def get_query_params(self):
+        if not hasattr(self, '_query_params'):
+            serializer = AttendanceBoardQuerySerializer(data=self.request.query_params)
+            serializer.is_valid(raise_exception=True)
+            self._query_params = serializer.validated_data
+        return self._query_params
+
+    def get_queryset(self):
+        params = self.get_query_params()
+        queryset = (
+            Employee.objects.select_related('department').order_by('id')
+            .alias(day=FilteredRelation('attendances', condition=Q(attendances__date=params['date'])))
+            .annotate(attendance_id=F('day__id'), status=Coalesce('day__status', Value(UNMARKED)))
+        )
+        if params.get('department') is not None:
+            queryset = queryset.filter(department_id=params['department'])
+        if params.get('status'):
+            # On the annotation: a filter on day__ would join the attendance a second time
+            queryset = queryset.filter(status=params['status'])
+        return queryset
+
+    def list_state_aggregates(self):
+        # Deleting an attendance row leaves the employee on the board, so the
+        # count of rows is not enough; the number of marked employees is
+        return {**super().list_state_aggregates(), 'marked': Count('day__id')}
+
+    def list_state(self, aggregates):
+        return super().list_state(aggregates) + (aggregates['marked'],)
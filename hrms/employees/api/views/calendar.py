@@ -0,0 +1,88 @@
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.db.models import Count, F, Prefetch, Q
+from django.db.models.lookups import Exact
+from rest_framework import generics
+
+from employees.models import Attendance, AttendanceMonthlySummary, Employee
+from employees.rollups import day_bit, month_start
+from employees.api.serializers import AttendanceCalendarQuerySerializer, AttendanceCalendarSerializer
+
+
+class AttendanceCalendarView(generics.ListAPIView):
+    """
+    Employees' attendance for a year, as one string of day statuses per month:
+    GET /attendance/calendar/?year=&employee_id=&department=&present_on=&absent_on=
+
+    Read from the masks of the monthly rollup, so an employee's year is at
+    most twelve rows however many days were recorded. ``present_on`` and
+    ``absent_on`` keep the employees present (absent) on every one of the
+    given dates. ``present_on`` tests the present mask of one rollup row per
+    employee and month involved. ``absent_on`` counts attendance rows through
+    the partial index on ABSENT rows, which are few. Pages are ordered by
+    employee and support ?cursor=.
+    """
+    serializer_class = AttendanceCalendarSerializer
+    cursor_ordering = ('id',)
+
+    def get_query_params(self):
+        if not hasattr(self, '_query_params'):
+            serializer = AttendanceCalendarQuerySerializer(data=self.request.query_params)
+            serializer.is_valid(raise_exception=True)
+            self._query_params = serializer.validated_data
+        return self._query_params
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), 'year': self.get_query_params()['year']}
+
+    def get_queryset(self):
+        params = self.get_query_params()
+        months = AttendanceMonthlySummary.objects.filter(month__year=params['year']).order_by('month')
+        queryset = (
+            Employee.objects.select_related('department').order_by('id')
+            .prefetch_related(Prefetch('monthly_summaries', queryset=months, to_attr='calendar_months'))
+        )
+        if params.get('employee_id'):
+            queryset = queryset.filter(employee_id__in=params['employee_id'])
+        if params.get('department') is not None:
+            queryset = queryset.filter(department_id=params['department'])
+        if params.get('present_on'):
+            queryset = queryset.filter(id__in=self.present_on_every(params['present_on']))
+        if params.get('absent_on'):
+            queryset = queryset.filter(id__in=self.absent_on_every(params['absent_on']))
+        return queryset
+
+    @staticmethod
+    def present_on_every(days):
+        """Ids of the employees whose rollup rows have the PRESENT bit of every day set."""
+        required = defaultdict(int)
+        for day in days:
+            required[month_start(day)] |= day_bit(day)
+        conditions = [
+            Q(month=month) & Q(Exact(F('present_mask').bitand(bits), bits))
+            for month, bits in required.items()
+        ]
+        # One matching row for each month involved
+        return (
+            AttendanceMonthlySummary.objects.filter(reduce(or_, conditions))
+            .order_by().values('employee_id')
+            .annotate(months=Count('*')).filter(months=len(required))
+            .values('employee_id')
+        )
+
+    @staticmethod
+    def absent_on_every(days):
+        """
+        Ids of the employees absent on every one of ``days``. ABSENT rows are
+        few, and counting them reads only the partial index on them, which is
+        quicker than testing the mask of every employee's month.
+        """
+        days = set(days)
+        return (
+            Attendance.objects.filter(status='ABSENT', date__in=days)
+            .order_by().values('employee_id')
+            .annotate(days=Count('*')).filter(days=len(days))
+            .values('employee_id')
+        )
@@ -0,0 +1,82 @@
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from employees.changes import ChangeLogPruned, format_position, head, read_changes
+from employees.models import Attendance, Department, Employee
+from employees.api.serializers import (
+    AttendanceSerializer, ChangeFeedQuerySerializer, DepartmentSerializer, EmployeeSerializer,
+)
+
+
+class ChangeFeedView(APIView):
+    """
+    What changed since a position: GET /changes/?updated_since=&type=&limit=
+
+    Results are ``{type, id, deleted, data}`` in change order, one per object
+    however often it changed, with ``data`` as the object's list endpoint
+    returns it (null for a deleted object). ``next`` is the position to pass
+    as ``updated_since`` on the next request; while ``has_more`` is true
+    there are further changes to fetch right away.
+
+    Without ``updated_since`` the results are empty and ``next`` is the
+    current position: a client reads it, downloads the lists, then polls
+    from it. A position older than the pruned tombstones (employees.changes)
+    gets 410 Gone, and the client starts over the same way.
+
+    The feed is always read from the default database, never a replica
+    (employees.db.router). A position is a snapshot's xmin: one handed out by
+    the primary, or by a replica further ahead, and then polled on a replica
+    that is behind would skip the changes that replica has not applied yet.
+    """
+    pagination_class = None
+    # Positions are only consistent on the default database (see above)
+    replica_reads = False
+
+    # How the changed objects of each type are loaded and serialized
+    sources = {
+        'department': (Department.objects.all(), DepartmentSerializer),
+        'employee': (Employee.objects.select_related('department'), EmployeeSerializer),
+        'attendance': (Attendance.objects.select_related('employee'), AttendanceSerializer),
+    }
+
+    def get(self, request, *args, **kwargs):
+        serializer = ChangeFeedQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        using = DEFAULT_DB_ALIAS
+        if 'updated_since' not in params:
+            return Response({'next': format_position(head(using)), 'has_more': False, 'results': []})
+        try:
+            rows, next_position, has_more = read_changes(
+                params['updated_since'], types=params.get('type'), limit=params['limit'], using=using,
+            )
+        except ChangeLogPruned:
+            return Response(
+                {
+                    'message': 'Change feed position expired',
+                    'errors': {
+                        'updated_since': ['Changes after this position have been pruned; download the lists again.']
+                    }
+                },
+                status=status.HTTP_410_GONE
+            )
+
+        # One query per type for the objects that still exist
+        data = {}
+        for object_type, (queryset, serializer_class) in self.sources.items():
+            pks = [pk for row_type, pk, deleted in rows if row_type == object_type and not deleted]
+            if pks:
+                objects = queryset.using(using).in_bulk(pks)
+                serialized = serializer_class(list(objects.values()), many=True, context={'request': request}).data
+                data.update({(object_type, item['id']): item for item in serialized})
+
+        results = []
+        for object_type, pk, deleted in rows:
+            item = None if deleted else data.get((object_type, pk))
+            # An object deleted since its change was logged is reported deleted;
+            # its tombstone comes later in the feed as well
+            results.append({'type': object_type, 'id': pk, 'deleted': item is None, 'data': item})
+        return Response({'next': format_position(next_position), 'has_more': has_more, 'results': results})
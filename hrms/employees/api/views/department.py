@@ -1,11 +1,21 @@
+from asgiref.sync import sync_to_async
 from rest_framework import viewsets, mixins, status
 from rest_framework.response import Response
 from django.db import IntegrityError
+from django.db.models import Max, ProtectedError
+from django.utils import timezone
+from employees import cache
+from employees.counters import today_counts_by_department
 from employees.models import Department
+from employees.api.async_views import AsyncReadMixin
+from employees.api.conditional import ConditionalGetMixin
+from employees.api.idempotency import idempotent
 from employees.api.serializers import DepartmentSerializer
 
 
 class DepartmentViewSet(
+    AsyncReadMixin,
+    ConditionalGetMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
@@ -15,7 +25,59 @@ class DepartmentViewSet(
     """ViewSet for Department model"""
     queryset = Department.objects.all()
     serializer_class = DepartmentSerializer
+    # The counters are maintained without touching updated_at (employees.counters),
+    # and move counts_updated_at instead
+    conditional_fields = ('updated_at',)
 
+    def get_list_state(self, queryset):
+        """
+        The ETag state of the department table. The rows and headcounts are served
+        from the reference cache; today's counts change with every attendance write
+        without invalidating it, so their last change is read on each request.
+        """
+        state = cache.departments.get_or_load(
+            ('state',), lambda: super(DepartmentViewSet, self).get_list_state(queryset)
+        )
+        counted = queryset.order_by().aggregate(latest=Max('counts_updated_at'))['latest']
+        # present_today and absent_today drop to zero when the day changes
+        return (*state, counted, timezone.localdate())
+
+    def get_object_state(self, instance):
+        return (*super().get_object_state(instance), instance.counts_updated_at, timezone.localdate())
+
+    def list_response(self, request, *args, **kwargs):
+        """List departments from the reference cache, with today's counts read on each request"""
+        # Pagination links are absolute, so the host is part of the key
+        key = ('list', request.get_host(), tuple(sorted(
+            (name, tuple(values)) for name, values in request.query_params.lists()
+        )))
+        loaded = []
+
+        def load():
+            loaded.append(True)
+            return super(DepartmentViewSet, self).list_response(request, *args, **kwargs).data
+
+        data = cache.departments.get_or_load(key, load)
+        if loaded:
+            # Just read from the department rows, counts included
+            return Response(data)
+        counts = today_counts_by_department([row['id'] for row in data['results']])
+        # The cached rows are shared with other requests, so they are copied rather than updated.
+        # A department deleted since, seen before the invalidation, counts nothing.
+        results = []
+        for row in data['results']:
+            present, absent = counts.get(row['id'], (0, 0))
+            results.append({**row, 'present_today': present, 'absent_today': absent})
+        return Response({**data, 'results': results})
+
+    async def aget_list_state(self, queryset):
+        # The reference cache is synchronous; on a miss its loader queries the database
+        return await sync_to_async(self.get_list_state)(queryset)
+
+    async def alist_response(self, request, *args, **kwargs):
+        return await sync_to_async(self.list_response)(request, *args, **kwargs)
+
+    @idempotent
     def create(self, request, *args, **kwargs):
         """Create a department with duplicate handling"""
         serializer = self.get_serializer(data=request.data)
@@ -39,19 +101,25 @@ class DepartmentViewSet(
     def destroy(self, request, *args, **kwargs):
         """Delete a department, but only if no employees reference it"""
         instance = self.get_object()
-        
-        # Check if any employees reference this department
-        if instance.employees.exists():
-            return Response(
-                {
-                    'message': 'Cannot delete department',
-                    'errors': {
-                        'non_field_errors': ['Cannot delete department because it has associated employees.']
-                    }
-                },
-                status=status.HTTP_409_CONFLICT
-            )
-        
-        self.perform_destroy(instance)
+
+        # The headcount answers without a query; the PROTECT foreign key still
+        # catches employees it has not counted (see employees.counters)
+        if instance.employee_count > 0:
+            return self.has_employees()
+        try:
+            self.perform_destroy(instance)
+        except ProtectedError:
+            return self.has_employees()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @staticmethod
+    def has_employees():
+        return Response(
+            {
+                'message': 'Cannot delete department',
+                'errors': {
+                    'non_field_errors': ['Cannot delete department because it has associated employees.']
+                }
+            },
+            status=status.HTTP_409_CONFLICT
+        )
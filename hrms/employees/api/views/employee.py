@@ -1,11 +1,33 @@
-from rest_framework import viewsets, mixins, status
+from rest_framework import generics, viewsets, mixins, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
-from django.db import IntegrityError
+from rest_framework.reverse import reverse
+from rest_framework.settings import api_settings
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
+from employees import jobs
+from employees.counters import apply_employee_changes, today_statuses
 from employees.models import Employee
-from employees.api.serializers import EmployeeSerializer
+from employees.search import filter_employees, typeahead
+from employees.api import imports, tasks
+from employees.api.async_views import AsyncReadMixin
+from employees.api.conditional import ConditionalGetMixin
+from employees.api.idempotency import idempotent
+from employees.api.parsers import CSVParser, NDJSONParser
+from employees.api.renderers import CSVRenderer
+from employees.api.rows import ValuesListMixin, row_serializer
+from employees.api.serializers import (
+    EmployeeSerializer, EmployeeSearchQuerySerializer, EmployeeImportQuerySerializer, JobSerializer,
+)
 
 
 class EmployeeViewSet(
+    ValuesListMixin,
+    AsyncReadMixin,
+    ConditionalGetMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.DestroyModelMixin,
@@ -13,9 +35,52 @@ class EmployeeViewSet(
     viewsets.GenericViewSet
 ):
     """ViewSet for Employee model"""
-    queryset = Employee.objects.all()
+    # department_name is read from the joined row instead of one query per employee
+    queryset = Employee.objects.select_related('department').order_by('id')
     serializer_class = EmployeeSerializer
+    cursor_ordering = ('id',)
+    # department_name is part of the response, so a department rename changes the ETag
+    conditional_fields = ('updated_at', 'department__updated_at')
+    async_query_params = frozenset({'page', 'page_size', 'search'})
 
+    def get_queryset(self):
+        """Employees, narrowed by ?search= to those with a word starting with each search word."""
+        queryset = super().get_queryset()
+        text = self.request.query_params.get('search')
+        if text:
+            queryset = filter_employees(queryset, text)
+        return queryset
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Typeahead: up to ?limit= (default 10, at most 50) employees for ?search=,
+        exact employee ID or email first, then names starting with the text,
+        then other matches. Not paginated.
+        """
+        params = EmployeeSearchQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        rows = row_serializer(self.get_serializer_class())
+        results = typeahead(
+            Employee.objects.values(*rows.lookups), params.validated_data['search'], params.validated_data['limit'],
+        )
+        return Response({'results': rows.to_representation(results)})
+
+    def perform_create(self, serializer):
+        """Create the employee and add them to their department's headcount."""
+        with transaction.atomic():
+            employee = serializer.save()
+            apply_employee_changes([(None, employee.department_id, None)])
+
+    def perform_destroy(self, instance):
+        """Delete the employee, with their attendance, and take them out of their department's counters."""
+        with transaction.atomic():
+            # Read first: today's attendance is deleted with the employee
+            status = today_statuses([instance.pk]).get(instance.pk)
+            instance.delete()
+            apply_employee_changes([(instance.department_id, None, status)])
+
+    @idempotent
     def create(self, request, *args, **kwargs):
         """Create an employee with duplicate handling"""
         serializer = self.get_serializer(data=request.data)
@@ -46,3 +111,74 @@ class EmployeeViewSet(
                 status=status.HTTP_409_CONFLICT
             )
 
+
+class EmployeeImportView(generics.GenericAPIView):
+    """
+    Import employees from a CSV or NDJSON file: POST /employees/import/?dry_run=&background=
+
+    The file is the request body (Content-Type: text/csv or
+    application/x-ndjson) or the ``file`` field of a multipart form, whose
+    format comes from its name or a ``format`` field. It is imported in chunks
+    by employees.api.imports. The response summarises the import and lists
+    the rows that were not imported. With Accept: text/csv (or ?format=csv),
+    it is that list as a CSV report instead.
+
+    With ?background=true the file is saved and imported by a worker instead
+    (employees.api.tasks): the response is 202 with the job, to be polled at
+    its Location (GET /jobs/{id}/), and the report is the job's download.
+    A retry with the same Idempotency-Key gets the first response, and so the
+    same job, instead of importing the file again.
+    """
+    parser_classes = [CSVParser, NDJSONParser, MultiPartParser]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, CSVRenderer]
+
+    @idempotent
+    def post(self, request, *args, **kwargs):
+        params = EmployeeImportQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({'file': ['Send the file as the request body or as the "file" field of a form.']})
+        file_format = request.data.get('format') or imports.file_format(getattr(upload, 'name', None))
+        if file_format not in imports.READERS:
+            raise ValidationError({'format': ['The file format must be csv or ndjson.']})
+        if params.validated_data['background']:
+            return self.enqueue(request, upload, file_format, params.validated_data['dry_run'])
+
+        try:
+            result = imports.import_employees(
+                imports.READERS[file_format](upload), dry_run=params.validated_data['dry_run'],
+            )
+        except imports.ImportFileError as exc:
+            return Response(
+                {'message': str(exc), 'errors': {'file': [str(exc)]}, 'summary': exc.result.summary},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if request.accepted_renderer.format == CSVRenderer.format:
+            response = StreamingHttpResponse(
+                request.accepted_renderer.stream(imports.REPORT_COLUMNS, imports.report_rows(result)),
+                content_type=f'{CSVRenderer.media_type}; charset={CSVRenderer.charset}',
+            )
+            response['Content-Disposition'] = 'attachment; filename="employee-import-errors.csv"'
+            return response
+        return Response({'dry_run': result.dry_run, 'summary': result.summary, 'errors': result.errors})
+
+    @staticmethod
+    def enqueue(request, upload, file_format, dry_run):
+        # The file is saved before the job is committed, so a worker never claims it first
+        with transaction.atomic():
+            job = jobs.enqueue('employee_import', {'format': file_format, 'dry_run': dry_run})
+            jobs.save_input(job, tasks.import_input_name(file_format), upload)
+        return Response(
+            JobSerializer(job, context={'request': request}).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': reverse('job-detail', kwargs={'pk': job.pk}, request=request)},
+        )
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        # Errors are reported as JSON like everywhere else, as by AttendanceExportView
+        if getattr(response, 'status_code', 200) >= 400 and not response.streaming:
+            request.accepted_renderer = JSONRenderer()
+            request.accepted_media_type = JSONRenderer.media_type
+        return super().finalize_response(request, response, *args, **kwargs)
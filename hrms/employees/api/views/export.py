@@ -0,0 +1,85 @@
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from rest_framework import generics
+from rest_framework.renderers import JSONRenderer
+
+from employees.models import Attendance
+from employees.api.renderers import CSVRenderer, NDJSONRenderer
+from employees.api.serializers import AttendanceExportQuerySerializer
+from employees.api.streaming import streaming_content
+from employees.api.views.attendance import filter_date_range
+
+
+class AttendanceExportView(generics.GenericAPIView):
+    """
+    Stream attendance across all employees as CSV or NDJSON:
+    GET /attendance/export/?format=csv|ndjson&start_date=&end_date=&employee_id=&department=
+
+    Rows are read as tuples through a server-side cursor, ATTENDANCE_EXPORT_CHUNK_SIZE
+    at a time, and encoded as they are sent, so memory use does not grow with
+    the size of the export. Under ASGI the chunks are produced as they are
+    sent too (employees.api.streaming). The columns match AttendanceSerializer
+    plus the department name.
+    """
+    renderer_classes = [CSVRenderer, NDJSONRenderer]
+    pagination_class = None
+
+    # (column, lookup) pairs, in output order
+    columns = [
+        ('id', 'id'),
+        ('employee', 'employee_id'),
+        ('employee_name', 'employee__full_name'),
+        ('employee_email', 'employee__email'),
+        ('employee_id', 'employee__employee_id'),
+        ('department', 'employee__department__name'),
+        ('date', 'date'),
+        ('status', 'status'),
+        ('created_at', 'created_at'),
+    ]
+
+    def get_queryset(self):
+        return self.export_queryset(self.request.query_params)
+
+    @classmethod
+    def export_queryset(cls, query_params):
+        """The rows of the export with the filters in ``query_params``; also used by export jobs."""
+        serializer = AttendanceExportQuerySerializer(data=query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        queryset = filter_date_range(Attendance.objects.all(), query_params)
+        if 'employee_id' in params:
+            queryset = queryset.filter(employee__employee_id=params['employee_id'])
+        if 'department' in params:
+            queryset = queryset.filter(employee__department_id=params['department'])
+        # Same order as Attendance.Meta.ordering, which attendance_date_employee_idx
+        # provides without a sort, so the first rows are sent right away
+        return queryset.order_by('-date', 'employee_id').values_list(
+            *(lookup for _, lookup in cls.columns)
+        )
+
+    def get(self, request, *args, **kwargs):
+        queryset = self.get_queryset()
+        renderer = request.accepted_renderer
+        chunks = renderer.stream([column for column, _ in self.columns], self.iterate(queryset))
+        response = StreamingHttpResponse(
+            streaming_content(request, chunks),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}',
+        )
+        response['Content-Disposition'] = f'attachment; filename="attendance.{renderer.format}"'
+        return response
+
+    @staticmethod
+    def iterate(queryset):
+        # Outside a transaction PostgreSQL cursors are declared WITH HOLD, which
+        # materializes the whole result on the server before the first fetch
+        with transaction.atomic():
+            yield from queryset.iterator(chunk_size=settings.ATTENDANCE_EXPORT_CHUNK_SIZE)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        # Errors (invalid filters, unsupported Accept) are reported as JSON like everywhere else
+        if getattr(response, 'status_code', 200) >= 400 and not response.streaming:
+            request.accepted_renderer = JSONRenderer()
+            request.accepted_media_type = JSONRenderer.media_type
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,91 @@
+from functools import partial
+
+from django.http import FileResponse
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.settings import api_settings
+
+from employees import jobs
+from employees.models import Job
+from employees.api import tasks  # noqa: F401 (registers the kinds of job)
+from employees.api.idempotency import idempotent
+from employees.api.renderers import CSVRenderer, NDJSONRenderer
+from employees.api.serializers import JobSerializer, JobCreateSerializer
+from employees.api.streaming import is_asgi, streaming_content
+
+
+class JobViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Background jobs, run by `manage.py run_worker` (employees.jobs):
+
+    - POST /jobs/ with ``{"kind": ..., "params": {...}}`` queues a job and
+      returns it with 202 and its Location; JobCreateSerializer lists the kinds
+      and their parameters
+    - GET /jobs/?status=&kind= lists the jobs, newest first
+    - GET /jobs/{id}/ is a job: its progress while it runs, then its result or
+      error, and a ``download_url`` once it has a result file
+    - GET /jobs/{id}/download/ is that file
+    """
+    queryset = Job.objects.order_by('-id')
+    serializer_class = JobSerializer
+    cursor_ordering = ('-id',)
+    # Bytes read from a result file per chunk sent under ASGI
+    download_chunk_size = 256 * 1024
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        for field in ('status', 'kind'):
+            value = self.request.query_params.get(field)
+            if value:
+                queryset = queryset.filter(**{field: value})
+        return queryset
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        serializer = JobCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = jobs.enqueue(serializer.validated_data['kind'], serializer.validated_data['params'])
+        return Response(
+            self.get_serializer(job).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': reverse('job-detail', kwargs={'pk': job.pk}, request=request)},
+        )
+
+    @action(
+        detail=True, methods=['get'],
+        renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, CSVRenderer, NDJSONRenderer],
+    )
+    def download(self, request, *args, **kwargs):
+        """The job's result file, sent as it was written"""
+        job = self.get_object()
+        path = jobs.result_path(job)
+        if path is None:
+            if job.status in (Job.SUCCEEDED, Job.FAILED):
+                message = 'The job has no file to download.'
+            else:
+                message = 'The job has not finished yet.'
+            return Response({'message': message, 'errors': {'status': [job.status]}}, status=status.HTTP_409_CONFLICT)
+        try:
+            file = open(path, 'rb')
+        except FileNotFoundError:
+            return Response(
+                {'message': 'The result file is missing.', 'errors': {'file': [f'{job.result_name} was not found.']}},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        response = FileResponse(file, as_attachment=True, filename=job.result_name, content_type=job.result_type)
+        if is_asgi(request):
+            # Sent as it is read rather than read whole first, as the export is (employees.api.streaming)
+            response.streaming_content = streaming_content(
+                request, iter(partial(file.read, self.download_chunk_size), b''),
+            )
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        # Errors are reported as JSON like everywhere else, as by AttendanceExportView
+        if getattr(response, 'status_code', 200) >= 400 and not response.streaming:
+            request.accepted_renderer = JSONRenderer()
+            request.accepted_media_type = JSONRenderer.media_type
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.db import connections
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from employees import cache, metrics
+from employees.db import router
+from employees.api.renderers import PrometheusRenderer
+
+
+class MetricsView(APIView):
+    """
+    Process-local metrics: GET /metrics/
+
+    Values are per worker process; with several gunicorn workers each one
+    reports its own counters. ?format=prometheus (or a Prometheus scrape)
+    returns the counters and histograms in the Prometheus text format.
+    """
+    pagination_class = None
+    renderer_classes = [JSONRenderer, PrometheusRenderer]
+
+    def get(self, request, *args, **kwargs):
+        return Response({
+            'metrics': metrics.snapshot(),
+            'reference_cache': {
+                namespace.namespace: {'local_entries': len(namespace.local)}
+                for namespace in cache.NAMESPACES
+            },
+            'database': {
+                'connection_mode': settings.DB_CONNECTION_MODE,
+                'pools': {
+                    connection.alias: connection.pool.get_stats()
+                    for connection in connections.all()
+                    if getattr(connection, 'pool', None) is not None
+                },
+                'replicas': router.replica_status(),
+            },
+        })
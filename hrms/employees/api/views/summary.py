@@ -0,0 +1,126 @@
+from datetime import timedelta
+
+from django.db.models import Case, F, Func, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from rest_framework import generics
+
+from employees.models import AttendanceMonthlySummary, Department, Employee
+from employees.rollups import days_mask, month_start, next_month
+from employees.api.serializers import (
+    AttendanceSummaryQuerySerializer, EmployeeAttendanceSummarySerializer,
+    DepartmentAttendanceSummarySerializer,
+)
+
+
+def split_range(start, end):
+    """
+    Split [start, end] into the months it touches and the days of those it
+    only partly covers.
+
+    Returns ``(first_month, last_month, {month: days_mask})``; a month covered
+    in full has no mask.
+    """
+    first_month, last_month = month_start(start), month_start(end)
+    partial = {}
+    # Only the months at the ends can be partial
+    for month in {first_month, last_month}:
+        month_end = next_month(month) - timedelta(days=1)
+        first_day, last_day = max(start, month), min(end, month_end)
+        if (first_day, last_day) != (month, month_end):
+            partial[month] = days_mask(first_day, last_day)
+    return first_month, last_month, partial
+
+
+class BitCount(Func):
+    """The number of bits set in an integer day mask"""
+    template = 'bit_count((%(expressions)s)::bit(32))::integer'
+    output_field = IntegerField()
+
+
+class AttendanceSummaryView(generics.ListAPIView):
+    """
+    Present/absent counts and attendance rate for a date range:
+    GET /attendance/summary/?start_date=&end_date=&group_by=employee|department
+
+    The counts are read from the AttendanceMonthlySummary rollup alone: whole
+    months from its counts, and the partial months at either end by counting
+    the bits of their days in its masks (employees.rollups). An employee's
+    counts are correlated subqueries, so only the rows on the requested page
+    are computed. A page of departments gets its counts from one query over
+    their employees' rollup rows, grouped by department.
+    """
+
+    def get_query_params(self):
+        if not hasattr(self, '_query_params'):
+            serializer = AttendanceSummaryQuerySerializer(data=self.request.query_params)
+            serializer.is_valid(raise_exception=True)
+            self._query_params = serializer.validated_data
+        return self._query_params
+
+    def grouped_by_department(self):
+        return self.get_query_params()['group_by'] == AttendanceSummaryQuerySerializer.GROUP_BY_DEPARTMENT
+
+    def get_serializer_class(self):
+        if self.grouped_by_department():
+            return DepartmentAttendanceSummarySerializer
+        return EmployeeAttendanceSummarySerializer
+
+    def get_queryset(self):
+        params = self.get_query_params()
+        department = params.get('department')
+
+        if self.grouped_by_department():
+            queryset = Department.objects.order_by('name')
+            if department is not None:
+                queryset = queryset.filter(id=department)
+            # Counted per page by paginate_queryset
+            return queryset
+
+        queryset = Employee.objects.select_related('department').order_by('id')
+        if department is not None:
+            queryset = queryset.filter(department_id=department)
+        first_month, last_month, partial = split_range(params['start_date'], params['end_date'])
+        months = (
+            AttendanceMonthlySummary.objects
+            .filter(employee=OuterRef('pk'), month__gte=first_month, month__lte=last_month)
+            .order_by().values('employee')
+        )
+        return queryset.annotate(**{
+            field: Coalesce(Subquery(months.annotate(total=total).values('total')), Value(0))
+            for field, total in self.count_totals(partial).items()
+        })
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None and self.grouped_by_department():
+            self.count_departments(page)
+        return page
+
+    def count_departments(self, departments):
+        """Set the counts of ``departments`` from their employees' rollup rows, in one grouped query."""
+        params = self.get_query_params()
+        first_month, last_month, partial = split_range(params['start_date'], params['end_date'])
+        totals = {
+            row['employee__department']: row
+            for row in AttendanceMonthlySummary.objects
+            .filter(employee__department__in=departments, month__gte=first_month, month__lte=last_month)
+            .order_by().values('employee__department')
+            .annotate(**self.count_totals(partial))
+        }
+        for department in departments:
+            row = totals.get(department.pk, {})
+            department.present_count = row.get('present_count', 0)
+            department.absent_count = row.get('absent_count', 0)
+
+    @staticmethod
+    def count_totals(partial):
+        """
+        Sums of the rollup rows' counts, as ``present_count`` and
+        ``absent_count``; a partial month counts its days in range instead.
+        """
+        totals = {}
+        for status in ('present', 'absent'):
+            count, mask = F(f'{status}_count'), F(f'{status}_mask')
+            days = [When(month=month, then=BitCount(mask.bitand(bits))) for month, bits in partial.items()]
+            totals[f'{status}_count'] = Sum(Case(*days, default=count) if days else count)
+        return totals
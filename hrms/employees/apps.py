@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class EmployeesConfig(AppConfig):
     name = 'employees'
+
+    def ready(self):
+        # Register the cache invalidation signal handlers
+        from . import signals  # noqa: F401
@@ -0,0 +1,303 @@
+"""
+In-process API benchmarks against a deterministic dataset.
+
+Every endpoint in ``employees/api/urls.py`` is requested through the Django
+test client, and its latency, query count and peak Python allocation are
+recorded. Results are compared with a committed JSON baseline, so a change to
+a viewset is measured rather than guessed.
+
+Writes run inside a transaction that is rolled back, so the dataset (and the
+reference caches, which are invalidated on commit) are the same for every
+endpoint and every run.
+"""
+import json
+import statistics
+import time
+import tracemalloc
+from contextlib import ExitStack
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.test import Client
+from django.urls import reverse
+
+from . import changes, fake_data, jobs
+from .api import idempotency
+from .api import tasks  # noqa: F401 (registers the kinds of job)
+from .api.serializers import JobCreateSerializer
+from .models import Attendance, Department, Employee, Job
+
+
+# Attendance ends here rather than today, so every run sees the same data
+END_DATE = date(2025, 12, 31)
+
+# Weekday attendance rows are roughly employees * days * 5 / 7
+SCALES = {
+    'tiny': {'departments': 10, 'employees': 100, 'days': 90},
+    'small': {'departments': 10, 'employees': 1_000, 'days': 1_400},
+    'large': {'departments': 50, 'employees': 100_000, 'days': 140},
+}
+
+# Latency and memory changes below these are noise, whatever the ratio
+LATENCY_NOISE_MS = 1.0
+MEMORY_NOISE_KIB = 64
+
+
+class Scenario:
+    """
+    One request to benchmark; ``prepare`` runs untimed before each write, and
+    ``setup(client, scenario)`` once before the first request, outside the
+    rolled-back transactions. Write data is sent as JSON unless a
+    ``content_type`` is given, in which case it is the body as it is.
+    """
+
+    def __init__(self, name, method, path, data=None, status=200, prepare=None, headers=None, content_type=None,
+                 setup=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.data = data
+        self.status = status
+        self.prepare = prepare
+        self.headers = headers
+        self.content_type = content_type
+        self.setup = setup
+
+    @property
+    def is_write(self):
+        return self.method != 'GET'
+
+
+def scenarios(scale):
+    """The requests to benchmark against a dataset seeded at ``scale``."""
+    employee = Employee.objects.select_related('department').get(
+        employee_id=fake_data.employee_id(SCALES[scale]['employees'] // 2 + 1)
+    )
+    latest = Attendance.objects.filter(employee=employee).order_by('-date').first()
+    month = {'start_date': END_DATE.replace(day=1).isoformat(), 'end_date': END_DATE.isoformat()}
+    quarter = {'start_date': (END_DATE - timedelta(days=77)).isoformat(), 'end_date': END_DATE.isoformat()}
+    next_day = (END_DATE + timedelta(days=1)).isoformat()
+    on_dates = [(END_DATE - timedelta(days=days)).isoformat() for days in (0, 7, 14)]
+    attendance_list = reverse('employee-attendance-list', args=[employee.employee_id])
+
+    def empty_department():
+        return reverse('department-detail', args=[Department.objects.create(name='Benchmark').pk])
+
+    def export_download(client, scenario):
+        job = finished_job('attendance_export', {'format': 'csv', 'department': employee.department_id, **month})
+        scenario.path = reverse('job-download', args=[job.pk])
+
+    bulk_records = [
+        {'employee_id': fake_data.employee_id(number), 'date': next_day, 'status': 'PRESENT'}
+        for number in range(1, min(100, SCALES[scale]['employees']) + 1)
+    ]
+    import_csv = 'employee_id,full_name,email,department\n' + ''.join(
+        f'IMPORT{number:04d},Imported Employee {number},imported.{number}@example.com,{employee.department.name}\n'
+        for number in range(1, 1001)
+    )
+    return [
+        Scenario('department list', 'GET', reverse('department-list')),
+        Scenario('department detail', 'GET', reverse('department-detail', args=[employee.department_id])),
+        Scenario('employee list', 'GET', reverse('employee-list'), {'page_size': 50}),
+        Scenario('employee list, last page', 'GET', reverse('employee-list'),
+                 {'page_size': 50, 'page': -(-SCALES[scale]['employees'] // 50)}),
+        Scenario('employee list, cursor', 'GET', reverse('employee-list'), {'cursor': '', 'page_size': 50}),
+        Scenario('employee detail', 'GET', reverse('employee-detail', args=[employee.pk])),
+        Scenario('employee search, typeahead', 'GET', reverse('employee-search'),
+                 {'search': employee.full_name.split()[-1][:4]}),
+        Scenario('employee list, search', 'GET', reverse('employee-list'),
+                 {'search': employee.full_name.split()[0], 'cursor': '', 'page_size': 50}),
+        Scenario('attendance list', 'GET', attendance_list, {'page_size': 50}),
+        Scenario('attendance list, one month', 'GET', attendance_list, {'page_size': 50, **month}),
+        Scenario('summary by employee', 'GET', reverse('attendance-summary'), {'page_size': 50, **quarter}),
+        Scenario('summary by department', 'GET', reverse('attendance-summary'),
+                 {'group_by': 'department', **quarter}),
+        Scenario('daily board', 'GET', reverse('attendance-board'),
+                 {'date': END_DATE.isoformat(), 'page_size': 50}),
+        Scenario('daily board, department', 'GET', reverse('attendance-board'),
+                 {'date': END_DATE.isoformat(), 'department': employee.department_id, 'page_size': 50}),
+        Scenario('daily board, cursor', 'GET', reverse('attendance-board'),
+                 {'date': END_DATE.isoformat(), 'cursor': '', 'page_size': 50}),
+        Scenario('calendar, one employee', 'GET', reverse('attendance-calendar'),
+                 {'year': END_DATE.year, 'employee_id': employee.employee_id}),
+        Scenario('calendar, page of employees', 'GET', reverse('attendance-calendar'),
+                 {'year': END_DATE.year, 'cursor': '', 'page_size': 50}),
+        Scenario('calendar, present on three dates', 'GET', reverse('attendance-calendar'),
+                 {'year': END_DATE.year, 'present_on': on_dates, 'page_size': 50}),
+        Scenario('calendar, absent on three dates', 'GET', reverse('attendance-calendar'),
+                 {'year': END_DATE.year, 'absent_on': on_dates, 'page_size': 50}),
+        Scenario('export csv, department month', 'GET', reverse('attendance-export'),
+                 {'format': 'csv', 'department': employee.department_id, **month}),
+        Scenario('changes, head', 'GET', reverse('change-feed')),
+        Scenario('changes, poll at head', 'GET', reverse('change-feed'),
+                 {'updated_since': changes.format_position(changes.head())}),
+        Scenario('changes, catch up 100 from the oldest', 'GET', reverse('change-feed'),
+                 {'updated_since': oldest_change_position(), 'limit': 100}),
+        Scenario('job list', 'GET', reverse('job-list'), {'page_size': 50}),
+        # The path is the download of the job run by the setup
+        Scenario('job download, department month csv', 'GET', None, setup=export_download),
+        Scenario('metrics', 'GET', reverse('metrics')),
+        Scenario('create department', 'POST', reverse('department-list'), {'name': 'Benchmark'}, 201),
+        Scenario('delete department', 'DELETE', None, status=204, prepare=empty_department),
+        Scenario('create employee', 'POST', reverse('employee-list'), {
+            'employee_id': 'BENCH0001', 'full_name': 'Bench Mark', 'email': 'bench.mark@example.com',
+            'department': employee.department_id,
+        }, 201),
+        Scenario('delete employee', 'DELETE', reverse('employee-detail', args=[employee.pk]), status=204),
+        Scenario('import employees, 1000 rows csv', 'POST', reverse('employee-import'), import_csv,
+                 content_type='text/csv'),
+        Scenario('create attendance', 'POST', attendance_list, {'date': next_day, 'status': 'PRESENT'}, 201),
+        Scenario('create attendance, duplicate', 'POST', attendance_list,
+                 {'date': latest.date.isoformat(), 'status': latest.status}, 409),
+        # The timed requests are replays of the response stored by the setup
+        Scenario('create attendance, idempotent retry', 'POST', attendance_list,
+                 {'date': next_day, 'status': 'PRESENT'}, 201, headers={'Idempotency-Key': f'benchmark-{scale}'},
+                 setup=keep_idempotent_response),
+        Scenario('delete attendance', 'DELETE',
+                 reverse('employee-attendance-detail', args=[employee.employee_id, latest.pk]), status=204),
+        Scenario('bulk attendance, 100 records', 'POST', reverse('attendance-bulk'),
+                 {'conflict_policy': 'skip', 'records': bulk_records}),
+        Scenario('create job', 'POST', reverse('job-list'),
+                 {'kind': 'reconcile_counters', 'params': {'dry_run': True}}, 202),
+    ]
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def keep_idempotent_response(client, scenario):
+    """
+    Store the response to replay for the scenario's Idempotency-Key. The first
+    request stores it in its own transaction, which is rolled back when the
+    idempotency cache is a database table, so it is stored again after.
+    """
+    store = caches[settings.IDEMPOTENCY_CACHE_ALIAS]
+    key = idempotency.cache_key(scenario.path, scenario.headers['Idempotency-Key'])
+    with transaction.atomic():
+        _timed_request(client, scenario, scenario.path)
+        record = store.get(key)
+        transaction.set_rollback(True)
+    store.set(key, record, settings.IDEMPOTENCY_TTL)
+
+
+def oldest_change_position():
+    """The oldest position the change feed still serves, as a client with no position starts from."""
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute(f'SELECT txid::text::bigint, seq FROM {changes.HORIZON_TABLE}')
+        return changes.format_position(cursor.fetchone())
+
+
+def finished_job(kind, params):
+    """
+    A succeeded job of ``kind`` with ``params`` and its result file, run here
+    unless an earlier benchmark run left one.
+    """
+    # Stored as POST /jobs/ stores them, with the defaults filled in
+    serializer = JobCreateSerializer(data={'kind': kind, 'params': params})
+    serializer.is_valid(raise_exception=True)
+    params = serializer.validated_data['params']
+    job = Job.objects.filter(kind=kind, params=params, status=Job.SUCCEEDED).order_by('-id').first()
+    if job is not None and jobs.result_path(job).exists():
+        return job
+    job = jobs.enqueue(kind, params)
+    while (claimed := jobs.claim('benchmark')) is not None:
+        jobs.run(claimed)
+    job.refresh_from_db()
+    if job.status != Job.SUCCEEDED:
+        raise BenchmarkError(f'The {kind} job did not succeed: {job.error}')
+    return job
+
+
+def send(client, scenario):
+    """Make the request and read the whole body; returns the elapsed seconds."""
+    if scenario.is_write:
+        with transaction.atomic():
+            path = scenario.prepare() if scenario.prepare else scenario.path
+            elapsed = _timed_request(client, scenario, path)
+            transaction.set_rollback(True)
+        return elapsed
+    return _timed_request(client, scenario, scenario.path)
+
+
+def _timed_request(client, scenario, path):
+    started = time.perf_counter()
+    if scenario.method == 'GET':
+        response = client.get(path, scenario.data, headers=scenario.headers)
+    elif scenario.content_type:
+        response = client.generic(
+            scenario.method, path, scenario.data, content_type=scenario.content_type, headers=scenario.headers,
+        )
+    else:
+        response = client.generic(
+            scenario.method, path, json.dumps(scenario.data) if scenario.data is not None else '',
+            content_type='application/json', headers=scenario.headers,
+        )
+    if response.streaming:
+        b''.join(response.streaming_content)
+    elapsed = time.perf_counter() - started
+    if response.status_code != scenario.status:
+        raise BenchmarkError(
+            f'{scenario.name}: expected {scenario.status}, got {response.status_code}: '
+            f'{response.getvalue()[:500] if not response.streaming else ""}'
+        )
+    return elapsed
+
+
+def measure(scenario, iterations, warmup=2, client=None):
+    """Latency percentiles, query count and peak allocation for one scenario."""
+    client = client or Client()
+    if scenario.setup:
+        scenario.setup(client, scenario)
+    for _ in range(warmup):
+        send(client, scenario)
+
+    # connection.queries is reset at the start of each request, so count with a
+    # wrapper, on every alias in case reads go to replicas
+    queries = []
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(
+                connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args))
+            )
+        send(client, scenario)
+
+    tracemalloc.start()
+    try:
+        send(client, scenario)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    latencies = sorted(send(client, scenario) * 1000 for _ in range(iterations))
+    return {
+        'p50_ms': round(statistics.median(latencies), 2),
+        'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2),
+        'mean_ms': round(statistics.fmean(latencies), 2),
+        # Savepoint statements around rolled-back writes are not the endpoint's
+        'queries': sum(1 for sql in queries if 'SAVEPOINT' not in sql),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def compare(baseline, current, threshold):
+    """
+    Return ``(endpoint, metric, baseline, current)`` for every regression.
+
+    Any extra query is a regression. Latency (p50) and peak memory regress
+    when they grow by more than ``threshold`` (0.25 = 25%) and by more than
+    the noise floor.
+    """
+    regressions = []
+    for name, result in current.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        if result['queries'] > old['queries']:
+            regressions.append((name, 'queries', old['queries'], result['queries']))
+        for metric, noise in (('p50_ms', LATENCY_NOISE_MS), ('peak_kib', MEMORY_NOISE_KIB)):
+            if result[metric] > old[metric] * (1 + threshold) and result[metric] - old[metric] > noise:
+                regressions.append((name, metric, old[metric], result[metric]))
+    return regressions
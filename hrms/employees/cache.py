@@ -0,0 +1,195 @@
+"""
+Read-through cache for reference data (departments and employee lookups).
+
+Two tiers are used: an LRU in each worker process and, when
+REFERENCE_CACHE_SHARED_ALIAS names a Django cache (e.g. Redis), a cache shared
+by all workers. Every namespace has a version number; invalidating a namespace
+bumps the version so all keys written under the old one become unreachable.
+
+The version lives in the shared backend when there is one, and every cached
+read checks it, so an invalidation in one worker is seen by every worker on its
+next read. Without one it lives in the reference_cache_versions table. Each
+worker reads it there at most once per REFERENCE_CACHE_VERSION_CHECK_SECONDS,
+so other workers see an invalidation within that interval; the worker that
+invalidates sees it at once. Only while the shared backend is unreachable does
+each worker fall back to a version of its own, and other workers then keep
+serving their local entries until REFERENCE_CACHE_LOCAL_TTL expires them.
+"""
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from . import metrics
+from .db import router
+from .models import ReferenceCacheVersion
+
+
+logger = logging.getLogger(__name__)
+
+VERSION_TABLE = ReferenceCacheVersion._meta.db_table
+
+requests_total = metrics.counter(
+    'reference_cache_requests_total',
+    'Reference cache reads by namespace and result (local_hit, shared_hit, miss)',
+    ['namespace', 'result'],
+)
+
+
+class LocalLRU:
+    """Thread-safe in-process LRU cache with a per-entry time to live"""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return (hit, value)."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False, None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return False, None
+            self._data.move_to_end(key)
+            return True, value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class ReferenceCache:
+    """A versioned, two-tier read-through cache namespace"""
+
+    _local_versions = itertools.count(1)
+
+    def __init__(self, namespace):
+        self.namespace = namespace
+        self._local = None
+        self._local_version = next(self._local_versions)
+        # (version, monotonic time read) from the version table, without a shared backend
+        self._checked = None
+
+    @property
+    def local(self):
+        if self._local is None:
+            self._local = LocalLRU(settings.REFERENCE_CACHE_LOCAL_SIZE, settings.REFERENCE_CACHE_LOCAL_TTL)
+        return self._local
+
+    @property
+    def shared(self):
+        alias = settings.REFERENCE_CACHE_SHARED_ALIAS
+        return caches[alias] if alias else None
+
+    @property
+    def version_key(self):
+        return f'refcache:{self.namespace}:version'
+
+    def get_or_load(self, key, loader):
+        """
+        Return the cached value for ``key``, calling ``loader()`` on a miss.
+
+        None is never cached, and exceptions raised by the loader (e.g. Http404)
+        propagate without caching anything.
+        """
+        if not settings.REFERENCE_CACHE_ENABLED:
+            return loader()
+
+        version = self.version()
+        hit, value = self.local.get((version, key))
+        if hit:
+            requests_total.inc(namespace=self.namespace, result='local_hit')
+            return value
+
+        shared_key = f'refcache:{self.namespace}:{version}:{key!r}'
+        value = self._shared_call('get', shared_key)
+        if value is not None:
+            requests_total.inc(namespace=self.namespace, result='shared_hit')
+            self.local.set((version, key), value)
+            return value
+
+        requests_total.inc(namespace=self.namespace, result='miss')
+        # A replica's copy could be older than the write that bumped the version
+        with router.reading_primary():
+            value = loader()
+        if value is not None:
+            self.local.set((version, key), value)
+            self._shared_call('set', shared_key, value, settings.REFERENCE_CACHE_SHARED_TTL)
+        return value
+
+    def version(self):
+        """Current namespace version, from the shared backend or else the database."""
+        if self.shared is None:
+            checked = self._checked
+            if checked is None or time.monotonic() - checked[1] >= settings.REFERENCE_CACHE_VERSION_CHECK_SECONDS:
+                # Read on the primary: a replica's version could predate the invalidation
+                with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+                    cursor.execute(f'SELECT version FROM {VERSION_TABLE} WHERE namespace = %s', [self.namespace])
+                    row = cursor.fetchone()
+                checked = self._checked = (row[0] if row else 0, time.monotonic())
+            return checked[0]
+        version = self._shared_call('get', self.version_key)
+        if version is None:
+            self._shared_call('add', self.version_key, time.time_ns(), None)
+            version = self._shared_call('get', self.version_key)
+        # Fall back to the local version if the shared backend is unavailable
+        return version if version is not None else self._local_version
+
+    def invalidate(self):
+        """Make every cached entry in this namespace unreachable."""
+        self._local_version = next(self._local_versions)
+        self.local.clear()
+        if self.shared is None:
+            with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    INSERT INTO {VERSION_TABLE} AS v (namespace, version) VALUES (%s, 1)
+                    ON CONFLICT (namespace) DO UPDATE SET version = v.version + 1
+                    RETURNING version
+                    """,
+                    [self.namespace],
+                )
+                self._checked = (cursor.fetchone()[0], time.monotonic())
+        else:
+            self._shared_call('set', self.version_key, time.time_ns(), None)
+
+    def clear_local(self):
+        self.local.clear()
+        self._checked = None
+
+    def _shared_call(self, method, *args):
+        shared = self.shared
+        if shared is None:
+            return None
+        try:
+            return getattr(shared, method)(*args)
+        except Exception:
+            # The shared tier is an optimisation; never fail a request because of it
+            logger.warning('Shared reference cache %s failed', method, exc_info=True)
+            return None
+
+
+departments = ReferenceCache('departments')
+employees = ReferenceCache('employees')
+
+NAMESPACES = [departments, employees]
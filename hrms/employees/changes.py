@@ -0,0 +1,132 @@
+"""
+The change feed: which departments, employees and attendance records changed
+since a position.
+
+Database triggers (migration 0010) record every insert, update and delete of
+the three tables in ``change_log``, one row per object holding its last
+change, so a deleted object stays behind as a tombstone. A change's position
+is (transaction id, sequence number): the writer's transaction id, then the
+order within it. Positions are handed to clients as "txid.seq" tokens.
+
+Transaction ids are assigned when a transaction starts writing, not when it
+commits, so a change can appear below positions a reader has already passed.
+The feed therefore returns only the changes of transactions older than the
+oldest one still running (the xmin of the reader's snapshot), which have all
+committed or rolled back. A long transaction holds the feed back until it
+ends, but never makes it skip a change.
+
+Tombstones are pruned after CHANGE_LOG_RETENTION_DAYS (prune_changes()); a
+client whose position is older than the last pruned one has to download the
+lists again.
+"""
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+
+
+CHANGE_LOG_TABLE = 'change_log'
+HORIZON_TABLE = 'change_log_horizon'
+
+OBJECT_TYPES = ('department', 'employee', 'attendance')
+
+
+class ChangeLogPruned(Exception):
+    """The requested position is older than the pruned part of the change log."""
+
+
+def parse_position(token):
+    """The (txid, seq) of a "txid.seq" token; ValueError if it is not one."""
+    txid, separator, seq = token.partition('.')
+    if not separator or not txid.isdigit() or not seq.isdigit():
+        raise ValueError(f'Not a change feed position: {token!r}')
+    return int(txid), int(seq)
+
+
+def format_position(position):
+    return '%d.%d' % position
+
+
+def head(using=DEFAULT_DB_ALIAS):
+    """The position after every change visible so far; a new client starts here."""
+    with connections[using].cursor() as cursor:
+        cursor.execute('SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint')
+        return cursor.fetchone()[0], 0
+
+
+def read_changes(since, types=None, limit=100, using=DEFAULT_DB_ALIAS):
+    """
+    Up to ``limit`` changes after position ``since``, in position order, as
+    ``(rows, next_position, has_more)``. Rows are
+    ``(object_type, object_id, deleted)``; ``types`` restricts them to some
+    of OBJECT_TYPES. ``using`` must not be a replica: a position from a
+    server further ahead would skip what the replica has not applied yet.
+
+    Raises ChangeLogPruned when tombstones after ``since`` have been pruned.
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'SELECT txid::text::bigint, seq, pg_snapshot_xmin(pg_current_snapshot())::text::bigint '
+            f'FROM {HORIZON_TABLE}'
+        )
+        horizon_txid, horizon_seq, xmin = cursor.fetchone()
+        if since < (horizon_txid, horizon_seq):
+            raise ChangeLogPruned(since)
+
+        # Each type's changes are a range scan of change_log_position_idx, merged in
+        # position order. The converted txid is renamed, or ORDER BY would sort by it
+        cursor.execute(
+            f"""
+            SELECT c.object_type, c.object_id, c.deleted, c.txid::text::bigint AS position, c.seq
+            FROM unnest(%(types)s::varchar[]) AS t (object_type)
+            CROSS JOIN LATERAL (
+                SELECT * FROM {CHANGE_LOG_TABLE}
+                WHERE object_type = t.object_type
+                  AND (txid, seq) > (%(txid)s::text::xid8, %(seq)s)
+                  AND txid < %(xmin)s::text::xid8
+                ORDER BY txid, seq
+                LIMIT %(limit)s
+            ) AS c
+            ORDER BY c.txid, c.seq
+            LIMIT %(limit)s
+            """,
+            {
+                'types': list(types or OBJECT_TYPES), 'txid': since[0], 'seq': since[1], 'xmin': xmin,
+                'limit': limit + 1,
+            },
+        )
+        rows = cursor.fetchall()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if has_more:
+        next_position = tuple(rows[-1][3:])
+    else:
+        # Every later change belongs to a transaction at or after xmin
+        next_position = max(since, (xmin, 0))
+    return [row[:3] for row in rows], next_position, has_more
+
+
+def prune_changes(before):
+    """
+    Delete the tombstones of objects deleted before the datetime ``before``,
+    and move the horizon up to the last of them. Returns how many were deleted.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH pruned AS (
+                DELETE FROM {CHANGE_LOG_TABLE}
+                WHERE deleted AND changed_at < %(before)s
+                  AND txid < pg_snapshot_xmin(pg_current_snapshot())
+                RETURNING txid, seq
+            ),
+            last AS (
+                SELECT txid, seq FROM pruned ORDER BY txid DESC, seq DESC LIMIT 1
+            ),
+            moved AS (
+                UPDATE {HORIZON_TABLE} AS h SET txid = last.txid, seq = last.seq
+                FROM last WHERE (last.txid, last.seq) > (h.txid, h.seq)
+            )
+            SELECT COUNT(*) FROM pruned
+            """,
+            {'before': before},
+        )
+        return cursor.fetchone()[0]
@@ -0,0 +1,241 @@
+"""
+Incremental maintenance of the department counters.
+
+Each department row holds its headcount (``employee_count``) and the number
+of its employees marked present and absent on ``attendance_date``, which is
+the day of the last counted change (normally today). They are maintained like
+the monthly rollup (employees.rollups): the code paths that write Employee or
+Attendance report what they changed, after writing it, and the changes are
+folded into per-department deltas and applied with a single UPDATE inside the
+caller's transaction.
+
+Only attendance for today (timezone.localdate()) is counted. The first change
+a department sees on a new day counts that day's attendance afresh from the
+attendance table instead of adding to yesterday's counts, so rows recorded in
+advance for today are included too. Until then the counts are stale, and the
+API reports zero for a department whose ``attendance_date`` is not today.
+
+Every department whose counts change is a row lock held until the writer
+commits, so concurrent writes to one department's counters queue up behind
+each other.
+"""
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import cache
+from .models import Attendance, Department, Employee
+
+
+DEPARTMENT_TABLE = Department._meta.db_table
+EMPLOYEE_TABLE = Employee._meta.db_table
+ATTENDANCE_TABLE = Attendance._meta.db_table
+
+
+def today_counts(department, today=None):
+    """(present, absent) of ``department`` today; zero if nothing has been counted today."""
+    if department.attendance_date != (today or timezone.localdate()):
+        return 0, 0
+    return department.present_today, department.absent_today
+
+
+def today_counts_by_department(department_pks):
+    """Map each of ``department_pks`` to its department's (present, absent) today, in one query."""
+    today = timezone.localdate()
+    return {
+        pk: (present, absent) if day == today else (0, 0)
+        for pk, day, present, absent in Department.objects.filter(pk__in=department_pks).values_list(
+            'pk', 'attendance_date', 'present_today', 'absent_today'
+        )
+    }
+
+
+def today_statuses(employee_pks):
+    """Map the pks of ``employee_pks`` with attendance today to its status."""
+    return dict(
+        Attendance.objects.filter(employee_id__in=employee_pks, date=timezone.localdate())
+        .order_by()
+        .values_list('employee_id', 'status')
+    )
+
+
+def _status_deltas(status, sign):
+    """The (present, absent) delta of adding (sign 1) or removing (-1) a ``status``."""
+    return (sign if status == 'PRESENT' else 0, sign if status == 'ABSENT' else 0)
+
+
+def apply_employee_changes(changes):
+    """
+    Fold employee changes into the department counters.
+
+    ``changes`` are ``(old_department_pk, new_department_pk, today_status)``
+    tuples: ``old_department_pk`` is None for a new employee and
+    ``new_department_pk`` is None for a deleted one. ``today_status`` is the
+    employee's attendance today (see today_statuses()), which leaves or joins
+    the department with them; it has to be read before a delete, since the
+    employee's attendance goes with them.
+    """
+    deltas = defaultdict(lambda: [0, 0, 0])
+    for old_department, new_department, status in changes:
+        if old_department == new_department:
+            continue
+        for department, sign in ((old_department, -1), (new_department, 1)):
+            if department is not None:
+                delta = deltas[department]
+                delta[0] += sign
+                present, absent = _status_deltas(status, sign)
+                delta[1] += present
+                delta[2] += absent
+    _apply(deltas, {})
+
+
+def apply_attendance_changes(changes):
+    """
+    Fold attendance changes, as reported to employees.rollups, into the
+    counters of the employees' departments. Changes to other days than today
+    are ignored without a query.
+    """
+    today = timezone.localdate()
+    deltas = defaultdict(lambda: [0, 0])
+    for employee_id, day, old_status, new_status in changes:
+        if day != today or old_status == new_status:
+            continue
+        delta = deltas[employee_id]
+        for status, sign in ((old_status, -1), (new_status, 1)):
+            present, absent = _status_deltas(status, sign)
+            delta[0] += present
+            delta[1] += absent
+    _apply({}, deltas, today)
+
+
+def _day_count(status):
+    """
+    SQL counting the ``status`` attendance of department ``d`` on %(today)s.
+    It is used on a department's first change of a day, instead of the
+    deltas: the change has already been written, so the count includes it.
+    """
+    return f"""(
+        SELECT COUNT(*) FROM {ATTENDANCE_TABLE} a JOIN {EMPLOYEE_TABLE} e ON e.id = a.employee_id
+        WHERE e.department_id = d.id AND a.date = %(today)s AND a.status = '{status}'
+    )"""
+
+
+def _apply(department_deltas, employee_deltas, today=None):
+    """
+    Add [employees, present, absent] deltas keyed by department pk and
+    [present, absent] deltas keyed by employee pk to the counters.
+    """
+    department_rows = sorted((key, delta) for key, delta in department_deltas.items() if any(delta))
+    employee_rows = sorted((key, delta) for key, delta in employee_deltas.items() if any(delta))
+    if not department_rows and not employee_rows:
+        return
+
+    today = today or timezone.localdate()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH changes (department_id, employees, present, absent) AS (
+                SELECT * FROM unnest(%(departments)s::integer[], %(employees)s::integer[],
+                                     %(department_present)s::integer[], %(department_absent)s::integer[])
+                UNION ALL
+                SELECT e.department_id, 0, c.present, c.absent
+                FROM unnest(%(employee_pks)s::integer[], %(employee_present)s::integer[],
+                            %(employee_absent)s::integer[]) AS c (employee_id, present, absent)
+                JOIN {EMPLOYEE_TABLE} e ON e.id = c.employee_id
+            ),
+            totals AS (
+                SELECT department_id, SUM(employees) AS employees, SUM(present) AS present,
+                       SUM(absent) AS absent
+                FROM changes GROUP BY department_id
+            ),
+            -- Lock in pk order, so that concurrent writers cannot deadlock on each other's departments
+            locked AS MATERIALIZED (
+                SELECT id FROM {DEPARTMENT_TABLE} WHERE id IN (SELECT department_id FROM totals)
+                ORDER BY id FOR UPDATE
+            )
+            UPDATE {DEPARTMENT_TABLE} AS d SET
+                employee_count = d.employee_count + t.employees,
+                present_today = CASE WHEN d.attendance_date = %(today)s THEN d.present_today + t.present
+                                     ELSE {_day_count('PRESENT')} END,
+                absent_today = CASE WHEN d.attendance_date = %(today)s THEN d.absent_today + t.absent
+                                    ELSE {_day_count('ABSENT')} END,
+                attendance_date = %(today)s,
+                counts_updated_at = %(now)s
+            FROM totals t JOIN locked ON locked.id = t.department_id
+            WHERE d.id = t.department_id
+            """,
+            {
+                'departments': [key for key, _ in department_rows],
+                'employees': [delta[0] for _, delta in department_rows],
+                'department_present': [delta[1] for _, delta in department_rows],
+                'department_absent': [delta[2] for _, delta in department_rows],
+                'employee_pks': [key for key, _ in employee_rows],
+                'employee_present': [delta[0] for _, delta in employee_rows],
+                'employee_absent': [delta[1] for _, delta in employee_rows],
+                'today': today,
+                'now': timezone.now(),
+            },
+        )
+    # The headcount is part of the cached department list; today's counts are read per request
+    if any(delta[0] for _, delta in department_rows):
+        transaction.on_commit(cache.departments.invalidate)
+
+
+def reconcile_department_counters(dry_run=False):
+    """
+    Recompute every department's counters from the employee and attendance
+    tables, with today as their attendance date.
+
+    The departments are locked first, so writes made meanwhile wait and are
+    added on top of the recomputed counts instead of being lost. Returns
+    (name, stored, actual) for each department whose counts had drifted,
+    with the counts as (employees, present, absent) tuples. With ``dry_run``
+    nothing is changed.
+    """
+    today = timezone.localdate()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'SELECT id FROM {DEPARTMENT_TABLE} ORDER BY id FOR UPDATE')
+        cursor.execute(
+            f"""
+            WITH actual AS (
+                SELECT d.id,
+                       (SELECT COUNT(*) FROM {EMPLOYEE_TABLE} e WHERE e.department_id = d.id) AS employees,
+                       COALESCE(a.present, 0) AS present, COALESCE(a.absent, 0) AS absent
+                FROM {DEPARTMENT_TABLE} d
+                LEFT JOIN (
+                    SELECT e.department_id,
+                           COUNT(*) FILTER (WHERE a.status = 'PRESENT') AS present,
+                           COUNT(*) FILTER (WHERE a.status = 'ABSENT') AS absent
+                    FROM {ATTENDANCE_TABLE} a JOIN {EMPLOYEE_TABLE} e ON e.id = a.employee_id
+                    WHERE a.date = %(today)s
+                    GROUP BY e.department_id
+                ) a ON a.department_id = d.id
+            )
+            UPDATE {DEPARTMENT_TABLE} AS d SET
+                employee_count = actual.employees,
+                present_today = actual.present,
+                absent_today = actual.absent,
+                attendance_date = %(today)s,
+                counts_updated_at = %(now)s
+            FROM actual, {DEPARTMENT_TABLE} AS stored
+            WHERE d.id = actual.id AND stored.id = actual.id
+              AND (stored.attendance_date, stored.employee_count, stored.present_today, stored.absent_today)
+                  IS DISTINCT FROM (%(today)s, actual.employees, actual.present, actual.absent)
+            RETURNING d.name, stored.attendance_date, stored.employee_count, stored.present_today,
+                      stored.absent_today, actual.employees, actual.present, actual.absent
+            """,
+            {'today': today, 'now': timezone.now()},
+        )
+        drifted = []
+        for name, day, employees, present, absent, *actual in cursor.fetchall():
+            # Counts of another day are reported as zero, so only a wrong headcount
+            # or today's attendance recorded in advance is drift for them
+            stored = (employees, present, absent) if day == today else (employees, 0, 0)
+            if stored != tuple(actual):
+                drifted.append((name, stored, tuple(actual)))
+        if dry_run:
+            transaction.set_rollback(True)
+        elif any(stored[0] != actual[0] for _, stored, actual in drifted):
+            transaction.on_commit(cache.departments.invalidate)
+    return sorted(drifted)
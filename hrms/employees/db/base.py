@@ -0,0 +1,45 @@
+"""
+PostgreSQL backend that records connection metrics.
+
+Used as DATABASES ENGINE 'employees.db'. Behaviour is Django's PostgreSQL
+backend; every connection opened (or, in pool mode, checked out of the pool)
+is counted along with the time it took, which includes the TCP/TLS handshake
+and authentication, or the wait for a free pooled connection.
+"""
+import time
+
+from django.db.backends.postgresql import base
+
+from employees import instrumentation, metrics
+
+
+connections_opened = metrics.counter(
+    'db_connections_opened_total',
+    'Database connections opened; in pool mode, connections checked out of the pool',
+    ['alias'],
+)
+connection_wait_seconds = metrics.counter(
+    'db_connection_wait_seconds_total',
+    'Seconds spent opening database connections or waiting for a pooled one',
+    ['alias'],
+)
+connections_reused = metrics.counter(
+    'db_connections_reused_total',
+    'Requests that started with a connection kept open by an earlier request',
+    ['alias'],
+)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_new_connection(self, conn_params):
+        started = time.perf_counter()
+        try:
+            return super().get_new_connection(conn_params)
+        finally:
+            elapsed = time.perf_counter() - started
+            connection_wait_seconds.inc(elapsed, alias=self.alias)
+            connections_opened.inc(alias=self.alias)
+            timings = instrumentation.current()
+            if timings is not None:
+                timings.connect += elapsed
@@ -0,0 +1,66 @@
+"""
+Django's DatabaseCache with writes of one statement each.
+
+DatabaseCache counts the rows of its table before every write, then reads
+the key and writes it in a transaction: six queries, one of them a COUNT(*)
+that grows with the table. Here add() and set() are a single
+INSERT ... ON CONFLICT. PostgreSQL makes add() atomic across workers: of two
+requests adding the same key, the second finds the first's row and adds
+nothing. Instead of culling live keys once MAX_ENTRIES is reached, each write
+deletes up to ``cull_batch`` expired ones in the same statement.
+
+The table is created by ``manage.py createcachetable``.
+"""
+import base64
+import pickle
+from datetime import datetime, timezone
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.db import DatabaseCache
+from django.db import connections, router
+from django.utils.timezone import now as tz_now
+
+
+class UpsertDatabaseCache(DatabaseCache):
+    # Expired keys deleted by each write
+    cull_batch = 100
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._upsert(key, value, timeout, replace=False)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._upsert(key, value, timeout, replace=True)
+
+    def _upsert(self, key, value, timeout, replace):
+        """Write ``key``; unless ``replace``, only if it is missing or expired. Returns whether it was written."""
+        connection = connections[router.db_for_write(self.cache_model_class)]
+        table = connection.ops.quote_name(self._table)
+        now = tz_now().replace(microsecond=0)
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            expires = datetime.max.replace(tzinfo=timezone.utc)
+        else:
+            expires = datetime.fromtimestamp(timeout, tz=timezone.utc)
+        expires = expires.replace(microsecond=0)
+        value = base64.b64encode(pickle.dumps(value, self.pickle_protocol)).decode('latin1')
+        with connection.cursor() as cursor:
+            # SKIP LOCKED: writers culling at the same time neither wait on each
+            # other nor deadlock
+            cursor.execute(
+                f"""
+                WITH culled AS (
+                    DELETE FROM {table} WHERE cache_key IN (
+                        SELECT cache_key FROM {table} WHERE expires < %s AND cache_key <> %s
+                        ORDER BY expires LIMIT %s FOR UPDATE SKIP LOCKED
+                    )
+                )
+                INSERT INTO {table} AS c (cache_key, value, expires) VALUES (%s, %s, %s)
+                ON CONFLICT (cache_key) DO UPDATE SET value = EXCLUDED.value, expires = EXCLUDED.expires
+                {'' if replace else 'WHERE c.expires < %s'}
+                RETURNING 1
+                """,
+                [now, key, self.cull_batch, key, value, expires, *([] if replace else [now])],
+            )
+            return cursor.fetchone() is not None
@@ -0,0 +1,168 @@
+"""
+Routing of API reads to streaming replicas of the default database.
+
+DATABASES has one ``replicaN`` alias per DB_REPLICA_HOSTS entry. For each
+request ReplicaRoutingMiddleware keeps a ReadRoute in a context variable and,
+for safe requests to API views, picks the replica that request reads from.
+ReplicaRouter sends the request's reads there. Writes always go to the
+default database, as do reads inside a transaction on it, so a view that
+writes reads its own rows.
+
+A replica serves reads only while its replay lag is within
+DB_REPLICA_MAX_LAG_SECONDS. Each process checks the lag of a replica at most
+every DB_REPLICA_CHECK_SECONDS, and a replica that cannot be reached or that
+failed a query is left out until its next check. With no replica available,
+reads go to the default database.
+"""
+import contextvars
+import random
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from employees import metrics
+
+
+reads_routed = metrics.counter(
+    'db_reads_routed_total', 'API read requests, by the database alias they read from', ['alias'],
+)
+
+_current = contextvars.ContextVar('read_route', default=None)
+
+# alias -> (monotonic time of the check, lag in seconds or None when unavailable)
+replica_health = {}
+
+# Replay lag of a streaming replica; NULL when it is not receiving WAL. A replica
+# that has replayed everything it received is not lagging, however old its last
+# transaction: the primary has been idle. (After a restart the receiver starts
+# again from the beginning of a WAL segment, behind what was already replayed.)
+LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN (SELECT status FROM pg_stat_wal_receiver) IS DISTINCT FROM 'streaming' THEN NULL
+        WHEN pg_last_wal_receive_lsn() <= pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+class ReadRoute:
+    """The alias a request reads from; None for the default database."""
+
+    def __init__(self):
+        self.alias = None
+
+
+def start():
+    """Start routing a request; returns the route and the token for finish()."""
+    route = ReadRoute()
+    return route, _current.set(route)
+
+
+def finish(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def reading_primary():
+    """
+    Read from the default database inside the block, for values kept beyond the
+    request (e.g. the reference cache) that must not be a lagging replica's.
+    """
+    route = _current.get()
+    if route is None or route.alias is None:
+        yield
+        return
+    alias, route.alias = route.alias, None
+    try:
+        yield
+    finally:
+        route.alias = alias
+
+
+def replica_lag(alias):
+    """The replay lag of ``alias`` in seconds, or None if it cannot serve reads."""
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute(LAG_SQL)
+            lag = cursor.fetchone()[0]
+    except DatabaseError:
+        return None
+    return None if lag is None else float(lag)
+
+
+def available_replicas():
+    """The replicas whose last lag check, redone when it is too old, was within the limit."""
+    now = time.monotonic()
+    available = []
+    for alias in settings.DB_REPLICAS:
+        checked, lag = replica_health.get(alias, (None, None))
+        if checked is None or now - checked >= settings.DB_REPLICA_CHECK_SECONDS:
+            lag = replica_lag(alias)
+            replica_health[alias] = (now, lag)
+        if lag is not None and lag <= settings.DB_REPLICA_MAX_LAG_SECONDS:
+            available.append(alias)
+    return available
+
+
+def choose_replica():
+    """A replica to read from, or None for the default database."""
+    available = available_replicas()
+    alias = random.choice(available) if available else None
+    reads_routed.inc(alias=alias or DEFAULT_DB_ALIAS)
+    return alias
+
+
+def mark_unavailable(alias):
+    """Leave ``alias`` out until its next lag check, after a failed query."""
+    replica_health[alias] = (time.monotonic(), None)
+
+
+def replica_status():
+    """Each replica's last check, for the metrics endpoint."""
+    now = time.monotonic()
+    status = {}
+    for alias in settings.DB_REPLICAS:
+        checked, lag = replica_health.get(alias, (None, None))
+        status[alias] = {
+            'host': connections.settings[alias]['HOST'],
+            'available': lag is not None and lag <= settings.DB_REPLICA_MAX_LAG_SECONDS,
+            'lag_seconds': lag,
+            'checked_seconds_ago': None if checked is None else round(now - checked, 1),
+        }
+    return status
+
+
+class ReplicaRouter:
+    """
+    DATABASE_ROUTERS entry sending the reads of requests routed by
+    ReplicaRoutingMiddleware to their replica, and everything else, writes
+    included, to the default database.
+    """
+
+    def db_for_read(self, model, **hints):
+        route = _current.get()
+        if route is None or route.alias is None:
+            return DEFAULT_DB_ALIAS
+        # A transaction on the default database may have written what is read next
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return route.alias
+
+    def db_for_write(self, model, **hints):
+        # Not the instance's database, which Django would otherwise use for an
+        # object read from a replica
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replicas hold the same rows as the default database
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DB_REPLICAS
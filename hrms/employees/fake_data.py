@@ -0,0 +1,66 @@
+"""
+Deterministic fake data for seeding, load tests and benchmarks.
+
+Every generated row depends only on the seed and its own number, never on
+batch sizes or on how much was generated before, so a given seed always
+produces the same employees and the same attendance. This module does not
+import Django, so the HTTP load generator in ``utility/`` can use it too.
+"""
+import random
+from datetime import timedelta
+from itertools import islice
+
+from faker import Faker
+
+
+DEFAULT_SEED = 42
+DEPARTMENT_NAMES = [
+    'Engineering', 'Sales', 'Marketing', 'Finance', 'Human Resources',
+    'Operations', 'Customer Support', 'Legal', 'Product', 'Design',
+]
+
+
+def batched(iterable, size):
+    """Yield lists of up to ``size`` items."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def department_names(count):
+    return [
+        DEPARTMENT_NAMES[i] if i < len(DEPARTMENT_NAMES) else f'Department {i + 1}'
+        for i in range(count)
+    ]
+
+
+def employee_id(number):
+    return f'EMP{number:06d}'
+
+
+def employee_rows(count, department_ids, start=1, seed=DEFAULT_SEED):
+    """Yield API-shaped employee dicts numbered ``start`` .. ``start + count - 1``."""
+    fake = Faker()
+    for number in range(start, start + count):
+        fake.seed_instance(seed * 1_000_003 + number)
+        first_name, last_name = fake.first_name(), fake.last_name()
+        yield {
+            'employee_id': employee_id(number),
+            'full_name': f'{first_name} {last_name}',
+            # The number keeps emails unique however many employees are generated
+            'email': f'{first_name}.{last_name}.{number}@example.com'.lower(),
+            'department': department_ids[number % len(department_ids)],
+        }
+
+
+def attendance_rows(employee_ids, start_date, end_date, seed=DEFAULT_SEED, present_ratio=0.9):
+    """Yield (employee_id, date, status) for every weekday in [start_date, end_date]."""
+    days = [
+        start_date + timedelta(days=offset)
+        for offset in range((end_date - start_date).days + 1)
+        if (start_date + timedelta(days=offset)).weekday() < 5
+    ]
+    for key in employee_ids:
+        rng = random.Random(f'{seed}:{key}')
+        for day in days:
+            yield key, day, 'PRESENT' if rng.random() < present_ratio else 'ABSENT'
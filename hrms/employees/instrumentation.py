@@ -0,0 +1,116 @@
+"""
+Per-request timing: wall time, database connect and query time, query count,
+serializer and renderer time.
+
+RequestMetricsMiddleware starts a RequestTimings for each request and keeps it
+in a context variable. The variable follows the request into sync_to_async
+threads, so the database execute wrapper and the serializer and renderer
+hooks can add to it without being passed anything.
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+
+from . import metrics
+
+
+# Seconds; the slowest buckets are for exports and large summaries
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+request_duration = metrics.histogram(
+    'http_request_duration_seconds', 'Request wall time, by route', ('route', 'method'), DURATION_BUCKETS,
+)
+request_db_duration = metrics.histogram(
+    'http_request_db_seconds', 'Time spent in database queries per request, by route',
+    ('route', 'method'), DURATION_BUCKETS,
+)
+request_queries = metrics.histogram(
+    'http_request_queries', 'Database queries per request, by route', ('route', 'method'), QUERY_BUCKETS,
+)
+requests_total = metrics.counter('http_requests_total', 'Requests, by route and status', ('route', 'method', 'status'))
+
+_current = contextvars.ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """What one request spent its time on. ``statements`` is kept for the slow-request log."""
+
+    def __init__(self, max_statements=0):
+        self.started = time.perf_counter()
+        self.connect = 0.0
+        self.db = 0.0
+        self.queries = 0
+        self.serialize = 0.0
+        self.render = 0.0
+        self.max_statements = max_statements
+        self.statements = []
+        self._active = set()
+
+    def add_query(self, sql, seconds):
+        self.db += seconds
+        self.queries += 1
+        if len(self.statements) < self.max_statements:
+            self.statements.append((sql, seconds))
+
+    @contextmanager
+    def measure(self, field):
+        """Add the time spent in the block to ``field``; nested blocks are counted once."""
+        if field in self._active:
+            yield
+            return
+        self._active.add(field)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            setattr(self, field, getattr(self, field) + time.perf_counter() - started)
+            self._active.discard(field)
+
+    def server_timing(self, total):
+        """The Server-Timing header value, durations in milliseconds."""
+        return ', '.join([
+            *([f'connect;dur={self.connect * 1000:.1f}'] if self.connect else []),
+            f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries"',
+            f'serialize;dur={self.serialize * 1000:.1f}',
+            f'render;dur={self.render * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+
+def start(max_statements=0):
+    """Begin timing a request; returns (timings, token for finish())."""
+    timings = RequestTimings(max_statements)
+    return timings, _current.set(timings)
+
+
+def finish(token):
+    _current.reset(token)
+
+
+def current():
+    """The RequestTimings of the request being handled, or None outside a request."""
+    return _current.get()
+
+
+@contextmanager
+def measure(field):
+    """Time the block into the current request's ``field``; a no-op outside a request."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    with timings.measure(field):
+        yield
+
+
+def time_queries(execute, sql, params, many, context):
+    """Execute wrapper adding each query's time to the current request."""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add_query(sql, time.perf_counter() - started)
@@ -0,0 +1,313 @@
+"""
+Background jobs: a queue in the ``jobs`` table, run by ``manage.py run_worker``.
+
+Exports, imports and rollup rebuilds that take too long for a request are
+queued as Job rows by the API (employees.api.tasks has the kinds of job) and
+run by worker processes, with PostgreSQL as the only broker. A worker runs
+JOB_WORKER_CONCURRENCY threads. Each claims the oldest due job with
+SELECT ... FOR UPDATE SKIP LOCKED, so any number of workers share the queue
+without claiming a job twice or waiting on each other's locks, and sleeps for
+JOB_POLL_SECONDS when there is none.
+
+A job reports its progress to its JobRun. Every JOB_HEARTBEAT_SECONDS a
+thread of the worker writes the progress of its running jobs, on a connection
+of its own so that it shows while a job is inside a transaction, and their
+heartbeat_at. A running job without a heartbeat for JOB_STALE_SECONDS lost
+its worker, and is queued again by whichever worker notices first.
+
+A job that raises is retried until it has made max_attempts attempts, after
+JOB_RETRY_DELAY_SECONDS and twice as long after each further failure. A job
+raises JobFailed for errors a retry would not fix. A job's input and result
+files are kept in its directory under JOB_RESULT_DIR, which the API and the
+workers must share; prune_jobs() deletes finished jobs and their files.
+"""
+import logging
+import os
+import shutil
+import socket
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Case, DateTimeField, F, Value, When
+from django.utils import timezone
+
+from employees.models import Job
+
+
+logger = logging.getLogger('employees.jobs')
+
+# kind -> Task; filled in by register()
+TASKS = {}
+
+
+class JobFailed(Exception):
+    """Fails the job without a retry. ``result`` is kept as the job's result."""
+
+    def __init__(self, message, result=None):
+        super().__init__(message)
+        self.result = result
+
+
+class Task:
+    def __init__(self, kind, func, max_attempts=None):
+        self.kind = kind
+        self.func = func
+        self.max_attempts = max_attempts
+
+
+def register(kind, max_attempts=None):
+    """
+    Decorator registering ``func(run)`` as the task that runs jobs of ``kind``.
+    It is passed a JobRun and returns the job's result (JSON). ``max_attempts``
+    overrides JOB_MAX_ATTEMPTS, e.g. 1 for a task that cannot be run twice.
+    """
+    def decorator(func):
+        TASKS[kind] = Task(kind, func, max_attempts)
+        return func
+    return decorator
+
+
+def enqueue(kind, params=None):
+    """Queue a job of the registered ``kind`` with the JSON ``params``; returns the Job."""
+    task = TASKS[kind]
+    return Job.objects.create(
+        kind=kind, params=params or {}, max_attempts=task.max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+
+
+def job_dir(job):
+    return Path(settings.JOB_RESULT_DIR) / str(job.pk)
+
+
+def save_input(job, name, file):
+    """
+    Copy the binary ``file`` to the job's input file ``name``. Done in the
+    transaction that queues the job, so no worker claims it before it is written.
+    """
+    directory = job_dir(job)
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / name, 'wb') as output:
+        shutil.copyfileobj(file, output)
+
+
+def result_path(job):
+    """The path of the job's result file, or None if it has none."""
+    return job_dir(job) / job.result_name if job.result_name else None
+
+
+class JobRun:
+    """A job being run, as its task sees it."""
+
+    def __init__(self, job):
+        self.job = job
+        self.params = job.params
+        self.done = 0
+        self.total = None
+        self.result_name = ''
+        self.result_type = ''
+
+    def progress(self, done, total=None):
+        """Report ``done`` out of ``total`` (if known); written with the next heartbeat."""
+        self.done = done
+        if total is not None:
+            self.total = total
+
+    def input_path(self, name):
+        return job_dir(self.job) / name
+
+    @contextmanager
+    def open_result(self, name, content_type):
+        """
+        A binary file to write the job's result file to. It replaces the
+        result of an earlier attempt only once it has been written in full.
+        """
+        directory = job_dir(self.job)
+        directory.mkdir(parents=True, exist_ok=True)
+        partial = directory / f'{name}.part'
+        try:
+            with open(partial, 'wb') as file:
+                yield file
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
+        os.replace(partial, directory / name)
+        self.result_name, self.result_type = name, content_type
+
+
+def claim(worker_id):
+    """Start the oldest due job as ``worker_id``'s, or return None if there is none."""
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.QUEUED, run_after__lte=now, kind__in=list(TASKS))
+            .order_by('run_after', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = Job.RUNNING
+        job.attempts += 1
+        job.locked_by = worker_id
+        job.started_at = job.heartbeat_at = now
+        job.save(update_fields=['status', 'attempts', 'locked_by', 'started_at', 'heartbeat_at'])
+    return job
+
+
+def _finish(job, run, **fields):
+    """
+    Record the end of ``job``'s attempt, unless the job was queued again
+    meanwhile as stale. Returns whether it was recorded.
+    """
+    updated = Job.objects.filter(pk=job.pk, status=Job.RUNNING, attempts=job.attempts).update(
+        locked_by='', progress=run.done, total=run.total,
+        result_name=run.result_name, result_type=run.result_type, **fields,
+    )
+    if not updated:
+        logger.warning('Job %s (%s) was taken over before attempt %s ended', job.pk, job.kind, job.attempts)
+    return bool(updated)
+
+
+def run(job, job_run=None):
+    """Run the claimed ``job`` with its task, reporting to ``job_run``, and record the outcome."""
+    job_run = job_run or JobRun(job)
+    try:
+        result = TASKS[job.kind].func(job_run)
+    except JobFailed as exc:
+        logger.warning('Job %s (%s) failed: %s', job.pk, job.kind, exc)
+        _finish(job, job_run, status=Job.FAILED, result=exc.result, error=str(exc), finished_at=timezone.now())
+    except Exception as exc:
+        logger.exception('Job %s (%s) attempt %s of %s raised', job.pk, job.kind, job.attempts, job.max_attempts)
+        # The connection may be what failed; a new one is opened for the update
+        if not connection.is_usable():
+            connection.close()
+        error = f'{type(exc).__name__}: {exc}'
+        now = timezone.now()
+        if job.attempts < job.max_attempts:
+            delay = timedelta(seconds=settings.JOB_RETRY_DELAY_SECONDS * 2 ** (job.attempts - 1))
+            _finish(job, job_run, status=Job.QUEUED, error=error, run_after=now + delay)
+        else:
+            _finish(job, job_run, status=Job.FAILED, error=error, finished_at=now)
+    else:
+        if job_run.total is not None:
+            job_run.done = job_run.total
+        _finish(job, job_run, status=Job.SUCCEEDED, result=result, error='', finished_at=timezone.now())
+
+
+def recover_stale():
+    """
+    Queue again the running jobs whose worker stopped sending heartbeats, or
+    fail those that have made all their attempts. Returns how many there were.
+    """
+    now = timezone.now()
+    retry = When(attempts__lt=F('max_attempts'), then=Value(Job.QUEUED))
+    recovered = Job.objects.filter(
+        status=Job.RUNNING, heartbeat_at__lt=now - timedelta(seconds=settings.JOB_STALE_SECONDS),
+    ).update(
+        status=Case(retry, default=Value(Job.FAILED)),
+        finished_at=Case(
+            When(attempts__lt=F('max_attempts'), then=Value(None)), default=Value(now), output_field=DateTimeField(),
+        ),
+        run_after=now, locked_by='', error='The worker running the job stopped.',
+    )
+    if recovered:
+        logger.warning('Recovered %s jobs whose worker stopped', recovered)
+    return recovered
+
+
+def prune_jobs(before):
+    """Delete the jobs that finished before the datetime ``before``, and their files. Returns how many."""
+    finished = Job.objects.filter(status__in=[Job.SUCCEEDED, Job.FAILED], finished_at__lt=before)
+    pks = list(finished.values_list('pk', flat=True))
+    Job.objects.filter(pk__in=pks).delete()
+    for pk in pks:
+        shutil.rmtree(Path(settings.JOB_RESULT_DIR) / str(pk), ignore_errors=True)
+    return len(pks)
+
+
+class Worker:
+    """
+    Runs jobs in ``concurrency`` threads until stop() is called or, with
+    ``once``, until no job is due. Each thread has its own database connection.
+    """
+
+    def __init__(self, concurrency=None, once=False):
+        self.id = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self.concurrency = concurrency or settings.JOB_WORKER_CONCURRENCY
+        self.once = once
+        self.stopping = threading.Event()
+        # job id -> JobRun of the jobs running now, for the heartbeat
+        self.running = {}
+
+    def run(self):
+        heartbeat = threading.Thread(target=self.send_heartbeats, name='job-heartbeat')
+        threads = [
+            threading.Thread(target=self.run_jobs, name=f'job-worker-{number}')
+            for number in range(1, self.concurrency + 1)
+        ]
+        heartbeat.start()
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                thread.join()
+        finally:
+            self.stopping.set()
+            heartbeat.join()
+
+    def stop(self):
+        """Stop claiming jobs; run() returns once the running ones have ended."""
+        self.stopping.set()
+
+    def run_jobs(self):
+        try:
+            while not self.stopping.is_set():
+                try:
+                    job = claim(self.id)
+                except DatabaseError:
+                    logger.exception('Could not claim a job')
+                    connection.close()
+                    job = None
+                if job is None:
+                    if self.once:
+                        return
+                    self.stopping.wait(settings.JOB_POLL_SECONDS)
+                    continue
+
+                logger.info('Running job %s (%s), attempt %s', job.pk, job.kind, job.attempts)
+                self.running[job.pk] = JobRun(job)
+                try:
+                    run(job, self.running[job.pk])
+                except DatabaseError:
+                    # The outcome could not be recorded; the job is recovered as stale
+                    logger.exception('Could not record the end of job %s', job.pk)
+                    connection.close()
+                finally:
+                    del self.running[job.pk]
+        finally:
+            connection.close()
+
+    def send_heartbeats(self):
+        try:
+            while not self.stopping.wait(settings.JOB_HEARTBEAT_SECONDS):
+                try:
+                    self.heartbeat()
+                    recover_stale()
+                except DatabaseError:
+                    logger.exception('Could not send the job heartbeats')
+                    connection.close()
+        finally:
+            connection.close()
+
+    def heartbeat(self):
+        """Write the progress and heartbeat of this worker's running jobs."""
+        now = timezone.now()
+        for pk, job_run in list(self.running.items()):
+            Job.objects.filter(pk=pk, status=Job.RUNNING, locked_by=self.id).update(
+                heartbeat_at=now, progress=job_run.done, total=job_run.total,
+            )
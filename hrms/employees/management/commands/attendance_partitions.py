@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from employees import partitions
+from employees.rollups import month_start, next_month
+
+
+class Command(BaseCommand):
+    help = (
+        'Create the monthly attendance partitions ahead of time and detach old ones. '
+        'Run it at least once a month (e.g. from cron) so that new dates never land in the default partition.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=partitions.MONTHS_AHEAD,
+                            help=f'Months after the current one to create (default: {partitions.MONTHS_AHEAD})')
+        parser.add_argument('--start-month',
+                            help='Also create every month from this one, YYYY-MM, moving its rows out of '
+                                 'the default partition')
+        parser.add_argument('--detach-before',
+                            help='Detach the partitions of the months before this one, YYYY-MM; they are kept '
+                                 'as standalone tables named <partition>_detached to archive and drop')
+        parser.add_argument('--list', action='store_true', help='Only list the partitions')
+
+    def handle(self, *args, **options):
+        if not options['list']:
+            if options['months_ahead'] < 0:
+                raise CommandError('--months-ahead must be 0 or more.')
+            start = self.parse_month(options['start_month'], '--start-month')
+            detach_before = self.parse_month(options['detach_before'], '--detach-before')
+
+            end = this_month = month_start(timezone.localdate())
+            for _ in range(options['months_ahead']):
+                end = next_month(end)
+            created = partitions.create_partitions(min(start or this_month, this_month), end)
+            for name, moved in created.items():
+                self.stdout.write(f'Created {name} ({moved} rows moved from the default partition)')
+            if detach_before:
+                for name in partitions.detach_partitions(detach_before):
+                    self.stdout.write(f'Detached {name}')
+
+        self.list_partitions()
+        remaining = partitions.default_partition_rows()
+        if remaining:
+            self.stdout.write(self.style.WARNING(
+                f'{remaining} rows are in {partitions.DEFAULT_PARTITION}; create their months with --start-month.'
+            ))
+
+    def list_partitions(self):
+        self.stdout.write(f"{'partition':<32}{'from':>12}{'to':>12}{'rows':>12}{'MB':>9}")
+        for partition in partitions.partitions():
+            self.stdout.write(
+                f'{partition.name:<32}{str(partition.start or "-"):>12}{str(partition.end or "-"):>12}'
+                f'{partition.rows:>12}{partition.bytes / 2 ** 20:>9.1f}'
+            )
+
+    @staticmethod
+    def parse_month(value, option):
+        if value is None:
+            return None
+        parsed = parse_date(f'{value}-01')
+        if parsed is None:
+            raise CommandError(f'{option} must be a month in YYYY-MM format.')
+        return parsed
@@ -0,0 +1,146 @@
+import json
+import platform
+import time
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+
+from employees import benchmarks, fake_data, seeding
+from employees.models import Attendance, Employee
+
+
+DEFAULT_BASELINE = settings.BASE_DIR / 'benchmarks' / 'baseline.json'
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark every API endpoint in-process against a deterministic dataset, recording '
+        'latency, query count and peak memory. The dataset is seeded once into its own database '
+        '(<DB_NAME>_bench_<scale>) and kept for later runs. Use --save to update the baseline '
+        'and --compare to fail on regressions against it.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=list(benchmarks.SCALES), default='tiny',
+                            help='Dataset size (default: tiny)')
+        parser.add_argument('--iterations', type=int, default=20, help='Timed requests per endpoint (default: 20)')
+        parser.add_argument('--only', help='Only endpoints whose name contains this text')
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE),
+                            help='Baseline file (default: benchmarks/baseline.json)')
+        parser.add_argument('--save', action='store_true', help='Write the results to the baseline for this scale')
+        parser.add_argument('--compare', action='store_true', help='Compare with the baseline for this scale')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Allowed latency/memory growth before --compare fails (default: 0.25)')
+        parser.add_argument('--drop', action='store_true', help='Drop the benchmark database afterwards')
+
+    def handle(self, *args, **options):
+        scale = options['scale']
+        creation = connection.creation
+        old_name = connection.settings_dict['NAME']
+        connection.settings_dict['TEST']['NAME'] = f'{old_name}_bench_{scale}'
+        creation.create_test_db(verbosity=0, autoclobber=True, serialize=False, keepdb=True)
+        try:
+            self.seed(scale)
+            dataset = self.dataset(scale)
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                results = self.run(scale, options)
+        finally:
+            creation.destroy_test_db(old_name, verbosity=0, keepdb=not options['drop'])
+
+        path = options['baseline']
+        baselines = {}
+        try:
+            with open(path) as f:
+                baselines = json.load(f)
+        except FileNotFoundError:
+            if options['compare']:
+                raise CommandError(f'No baseline at {path}; run with --save first.')
+
+        if options['save']:
+            if options['only'] and scale in baselines:
+                # Only the selected endpoints are replaced
+                results = {**baselines[scale]['endpoints'], **results}
+            baselines[scale] = {
+                'dataset': dataset,
+                'environment': {
+                    'python': platform.python_version(),
+                    'django': django.get_version(),
+                    'postgresql': connection.pg_version,
+                },
+                'iterations': options['iterations'],
+                'endpoints': results,
+            }
+            with open(path, 'w') as f:
+                json.dump(baselines, f, indent=2)
+                f.write('\n')
+            self.stdout.write(f'Saved the {scale} baseline to {path}')
+
+        if options['compare']:
+            if scale not in baselines:
+                raise CommandError(f'{path} has no {scale} baseline; run with --save first.')
+            self.compare(baselines[scale]['endpoints'], results, options['threshold'])
+
+    def seed(self, scale):
+        """Seed the benchmark database unless it already holds this scale's dataset."""
+        size = benchmarks.SCALES[scale]
+        if Employee.objects.count() == size['employees'] and Attendance.objects.exists():
+            return
+        self.stdout.write(f'Seeding the {scale} dataset; this is done once and kept.')
+        started = time.perf_counter()
+        departments = seeding.seed_departments(size['departments'])
+        seeding.seed_employees(size['employees'], departments)
+
+        def progress(rows):
+            self.stdout.write(f'\r  {rows} attendance rows', ending='')
+            self.stdout.flush()
+
+        seeding.seed_attendance(
+            [fake_data.employee_id(n) for n in range(1, size['employees'] + 1)],
+            benchmarks.END_DATE - timedelta(days=size['days'] - 1), benchmarks.END_DATE,
+            progress=progress,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.stdout.write(f'\nSeeded in {time.perf_counter() - started:.0f}s')
+
+    def dataset(self, scale):
+        return {
+            **benchmarks.SCALES[scale],
+            'end_date': benchmarks.END_DATE.isoformat(),
+            'seed': fake_data.DEFAULT_SEED,
+            'attendance': Attendance.objects.count(),
+        }
+
+    def run(self, scale, options):
+        self.stdout.write(
+            f"{'endpoint':<40}{'p50 ms':>9}{'p95 ms':>9}{'queries':>9}{'peak KiB':>10}"
+        )
+        results = {}
+        for scenario in benchmarks.scenarios(scale):
+            if options['only'] and options['only'] not in scenario.name:
+                continue
+            try:
+                result = benchmarks.measure(scenario, options['iterations'])
+            except benchmarks.BenchmarkError as e:
+                raise CommandError(str(e))
+            results[scenario.name] = result
+            self.stdout.write(
+                f"{scenario.name:<40}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+                f"{result['queries']:>9}{result['peak_kib']:>10.1f}"
+            )
+        return results
+
+    def compare(self, baseline, results, threshold):
+        regressions = benchmarks.compare(baseline, results, threshold)
+        for name in results.keys() - baseline.keys():
+            self.stdout.write(f'{name}: not in the baseline')
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
+            return
+        for name, metric, old, new in regressions:
+            self.stdout.write(self.style.ERROR(f'{name}: {metric} {old} -> {new}'))
+        raise CommandError(f'{len(regressions)} regression(s) against the baseline.')
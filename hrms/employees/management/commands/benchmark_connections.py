@@ -0,0 +1,101 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory, override_settings
+
+from employees.db.base import connection_wait_seconds, connections_opened, connections_reused
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure per-request latency under the current DB_CONNECTION_MODE by sending requests '
+        'through the WSGI handler, so connections are opened, kept or returned to the pool '
+        'exactly as in production. With --modes each mode is run in its own process and compared.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests to send (default: 200)')
+        parser.add_argument('--path', default='/api/v1/employees/?page_size=10',
+                            help='Path to request (default: /api/v1/employees/?page_size=10)')
+        parser.add_argument('--modes', help='Comma-separated DB_CONNECTION_MODE values to compare, '
+                                            'e.g. direct,persistent,pool')
+        parser.add_argument('--json', action='store_true', help='Print the result as JSON')
+
+    def handle(self, *args, **options):
+        if options['modes']:
+            results = [self.run_mode(mode.strip(), options) for mode in options['modes'].split(',')]
+        else:
+            results = [self.benchmark(options['path'], options['requests'])]
+
+        if options['json']:
+            self.stdout.write(json.dumps(results if options['modes'] else results[0]))
+            return
+
+        self.stdout.write(f"{options['requests']} requests to {options['path']}\n")
+        self.stdout.write(
+            f"{'mode':<12}{'mean ms':>9}{'p50 ms':>9}{'p95 ms':>9}"
+            f"{'opened':>8}{'reused':>8}{'connect ms':>12}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['mode']:<12}{result['mean_ms']:>9.2f}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+                f"{result['connections_opened']:>8}{result['connections_reused']:>8}"
+                f"{result['mean_connect_ms']:>12.2f}"
+            )
+
+    def run_mode(self, mode, options):
+        if mode not in settings.DB_CONNECTION_MODES:
+            raise CommandError(f"Unknown mode {mode!r}; choose from {', '.join(settings.DB_CONNECTION_MODES)}.")
+        completed = subprocess.run(
+            [
+                sys.executable, str(settings.BASE_DIR / 'manage.py'), 'benchmark_connections', '--json',
+                '--requests', str(options['requests']), '--path', options['path'],
+            ],
+            env={**os.environ, 'DB_CONNECTION_MODE': mode},
+            capture_output=True, text=True,
+        )
+        if completed.returncode:
+            raise CommandError(f'{mode} run failed:\n{completed.stderr}')
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+
+    def benchmark(self, path, requests):
+        handler = WSGIHandler()
+        factory = RequestFactory()
+        path, _, query = path.partition('?')
+
+        def send():
+            environ = factory.get(path, QUERY_STRING=query).environ
+            started = time.perf_counter()
+            response = handler(environ, lambda status, headers: None)
+            b''.join(response)
+            # Like a WSGI server: fires request_finished, which closes or keeps the connection
+            response.close()
+            if response.status_code != 200:
+                raise CommandError(f'{path} returned {response.status_code}.')
+            return time.perf_counter() - started
+
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            send()  # warm up imports and caches
+            opened = connections_opened.value(alias='default')
+            reused = connections_reused.value(alias='default')
+            waited = connection_wait_seconds.value(alias='default')
+            latencies = sorted(send() * 1000 for _ in range(requests))
+
+        opened = connections_opened.value(alias='default') - opened
+        waited = connection_wait_seconds.value(alias='default') - waited
+        return {
+            'mode': settings.DB_CONNECTION_MODE,
+            'mean_ms': statistics.fmean(latencies),
+            'p50_ms': latencies[len(latencies) // 2],
+            'p95_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+            'connections_opened': opened,
+            'connections_reused': connections_reused.value(alias='default') - reused,
+            'mean_connect_ms': waited / opened * 1000 if opened else 0.0,
+        }
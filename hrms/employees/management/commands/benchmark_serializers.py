@@ -0,0 +1,71 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from employees.api.renderers import ORJSONRenderer
+from employees.api.rows import row_serializer
+from employees.api.serializers import AttendanceSerializer, EmployeeSerializer
+from employees.models import Attendance, Employee
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure how many list pages per second each serialization path turns into JSON: the DRF '
+        'serializers with JSONRenderer against .values() rows (FAST_LIST_SERIALIZATION) with '
+        'JSONRenderer and with ORJSONRenderer (FAST_JSON_RENDERER). Each page is timed once from '
+        'rows already fetched and once including the fetch. Runs against the current database, '
+        'which needs at least one full page of employees and attendance.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=200, help='Pages per measurement (default: 200)')
+        parser.add_argument('--page-size', type=int, default=100, help='Rows per page (default: 100)')
+
+    def handle(self, *args, **options):
+        pages, page_size = options['pages'], options['page_size']
+        resources = [
+            ('employees', EmployeeSerializer,
+             Employee.objects.select_related('department').order_by('id')),
+            ('attendance', AttendanceSerializer,
+             Attendance.objects.select_related('employee').order_by('-date', 'employee')),
+        ]
+        self.stdout.write(f'{page_size}-row pages, {pages} per measurement')
+        self.stdout.write(
+            f"{'page':<12}{'path':<26}{'pages/s':>10}{'rows/s':>11}{'speedup':>9}"
+            f"{'+fetch pages/s':>16}{'speedup':>9}"
+        )
+        for name, serializer_class, queryset in resources:
+            rows = row_serializer(serializer_class)
+            paths = [
+                ('serializer + JSONRenderer', queryset,
+                 lambda page, s=serializer_class: JSONRenderer().render(s(page, many=True).data)),
+                ('rows + JSONRenderer', queryset.values(*rows.lookups),
+                 lambda page, rows=rows: JSONRenderer().render(rows.to_representation(page))),
+                ('rows + ORJSONRenderer', queryset.values(*rows.lookups),
+                 lambda page, rows=rows: ORJSONRenderer().render(rows.to_representation(page))),
+            ]
+            outputs, baseline = set(), None
+            for label, source, render in paths:
+                page = list(source[:page_size])
+                if len(page) < page_size:
+                    raise CommandError(f'Fewer than {page_size} {name} rows; seed the database first.')
+                outputs.add(render(page))
+                serialize = self.rate(pages, lambda: render(page))
+                fetch = self.rate(pages, lambda: render(list(source[:page_size])))
+                baseline = baseline or (serialize, fetch)
+                self.stdout.write(
+                    f'{name:<12}{label:<26}{serialize:>10.0f}{serialize * page_size:>11.0f}'
+                    f'{serialize / baseline[0]:>8.2f}x{fetch:>16.0f}{fetch / baseline[1]:>8.2f}x'
+                )
+            if len(outputs) != 1:
+                raise CommandError(f'The {name} paths rendered different bytes.')
+
+    @staticmethod
+    def rate(pages, render_page):
+        """Pages per second over ``pages`` calls, after one warm-up call."""
+        render_page()
+        started = time.perf_counter()
+        for _ in range(pages):
+            render_page()
+        return pages / (time.perf_counter() - started)
@@ -0,0 +1,115 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils.dateparse import parse_date
+
+from employees.models import Attendance, Employee
+
+
+class Command(BaseCommand):
+    help = (
+        'Print EXPLAIN ANALYZE plans for the attendance query patterns. '
+        'With --compare the plans are also shown without the Attendance.Meta.indexes, '
+        'which are dropped inside a transaction that is rolled back afterwards. '
+        '--compare locks the attendance table while it runs; do not use it on a live primary.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employee', help='employee_id to use for the per-employee queries '
+                                               '(default: the employee with the most attendance)')
+        parser.add_argument('--start-date', help='Range start, YYYY-MM-DD (default: first day of the --end-date month)')
+        parser.add_argument('--end-date', help='Range end, YYYY-MM-DD (default: --date)')
+        parser.add_argument('--date', help='Day for the org-wide queries, YYYY-MM-DD (default: latest date)')
+        parser.add_argument('--compare', action='store_true',
+                            help='Show the plans before (indexes dropped) and after')
+        parser.add_argument('--analyze', action='store_true',
+                            help='Run ANALYZE on the attendance table first')
+
+    def handle(self, *args, **options):
+        if options['analyze']:
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(Attendance._meta.db_table)}')
+
+        employee, start, end, day = self.resolve_parameters(options)
+        self.stdout.write(
+            f'employee={employee.employee_id} start_date={start} end_date={end} date={day}\n'
+        )
+
+        if options['compare']:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    for index in Attendance._meta.indexes:
+                        cursor.execute(f'DROP INDEX {connection.ops.quote_name(index.name)}')
+                self.explain_all('BEFORE (without Attendance.Meta.indexes)', employee, start, end, day)
+                transaction.set_rollback(True)
+
+        self.explain_all('AFTER' if options['compare'] else 'CURRENT', employee, start, end, day)
+
+    def resolve_parameters(self, options):
+        if options['employee']:
+            employee = Employee.objects.filter(employee_id=options['employee']).first()
+        else:
+            busiest = (
+                Attendance.objects.order_by().values('employee')
+                .annotate(n=Count('id')).order_by('-n').first()
+            )
+            employee = Employee.objects.filter(pk=busiest['employee']).first() if busiest else None
+        if employee is None:
+            raise CommandError('No employee with attendance found; seed some data or pass --employee.')
+
+        day = self.parse(options['date'], '--date') or (
+            Attendance.objects.order_by('-date').values_list('date', flat=True).first()
+        )
+        end = self.parse(options['end_date'], '--end-date') or day
+        start = self.parse(options['start_date'], '--start-date') or (end and end.replace(day=1))
+        return employee, start, end, day
+
+    @staticmethod
+    def parse(value, option):
+        if value is None:
+            return None
+        parsed = parse_date(value)
+        if parsed is None:
+            raise CommandError(f'{option} must be a date in YYYY-MM-DD format.')
+        return parsed
+
+    def scenarios(self, employee, start, end, day):
+        return [
+            (
+                'Employee date range (AttendanceViewSet.get_queryset, start_date/end_date)',
+                Attendance.objects.filter(employee=employee, date__gte=start, date__lte=end)
+                .select_related('employee')[:50],
+            ),
+            (
+                'Employee from start_date only',
+                Attendance.objects.filter(employee=employee, date__gte=start).select_related('employee')[:50],
+            ),
+            (
+                'Org-wide date range',
+                Attendance.objects.filter(date__gte=start, date__lte=end)[:50],
+            ),
+            (
+                'Status counts over a date range',
+                Attendance.objects.filter(date__gte=start, date__lte=end)
+                .order_by().values('status').annotate(n=Count('id')),
+            ),
+            (
+                'Who was absent on a date',
+                Attendance.objects.filter(date=day, status='ABSENT').values_list('employee_id', flat=True),
+            ),
+            (
+                'Status filter on a date (admin list_filter)',
+                Attendance.objects.filter(date=day, status='PRESENT')[:100],
+            ),
+            (
+                'Default ordering across employees (-date, employee)',
+                Attendance.objects.select_related('employee')[:50],
+            ),
+        ]
+
+    def explain_all(self, heading, employee, start, end, day):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'=== {heading} ==='))
+        for title, queryset in self.scenarios(employee, start, end, day):
+            self.stdout.write(self.style.SUCCESS(f'-- {title}'))
+            self.stdout.write(queryset.explain(analyze=True, buffers=True))
+            self.stdout.write('')
@@ -0,0 +1,72 @@
+import sys
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from employees.api import imports
+from employees.api.renderers import CSVRenderer
+
+
+class Command(BaseCommand):
+    help = (
+        'Import employees from a CSV file (with an employee_id,full_name,email,department header) '
+        'or an NDJSON file, in chunks. Departments are given by name.'
+    )
+
+    # Errors printed when there is no --report
+    shown_errors = 10
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='The file to import, or - for standard input')
+        parser.add_argument('--format', choices=sorted(imports.READERS),
+                            help='File format (default: from the file name suffix)')
+        chunk_size = settings.EMPLOYEE_IMPORT_CHUNK_SIZE
+        parser.add_argument('--chunk-size', type=int, default=chunk_size,
+                            help=f'Rows validated and inserted together (default: {chunk_size})')
+        parser.add_argument('--dry-run', action='store_true', help='Validate the file without creating anything')
+        parser.add_argument('--report', help='Write the rows that were not imported to this CSV file')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be 1 or more.')
+        file_format = options['format'] or imports.file_format(options['path'])
+        if file_format is None:
+            raise CommandError('Cannot tell the format from the file name; pass --format.')
+
+        try:
+            if options['path'] == '-':
+                result = self.run_import(sys.stdin.buffer, file_format, options)
+            else:
+                with open(options['path'], 'rb') as file:
+                    result = self.run_import(file, file_format, options)
+        except OSError as exc:
+            raise CommandError(exc) from exc
+        except imports.ImportFileError as exc:
+            self.write_result(exc.result, options)
+            raise CommandError(exc) from exc
+        self.write_result(result, options)
+
+    @staticmethod
+    def run_import(file, file_format, options):
+        return imports.import_employees(
+            imports.READERS[file_format](file), chunk_size=options['chunk_size'], dry_run=options['dry_run'],
+        )
+
+    def write_result(self, result, options):
+        summary = result.summary
+        verb = 'Would create' if result.dry_run else 'Created'
+        style = self.style.WARNING if summary['errors'] else self.style.SUCCESS
+        self.stdout.write(style(
+            f"{verb} {summary['created']} of {summary['rows']} employees; {summary['errors']} rows not imported."
+        ))
+        if options['report']:
+            with open(options['report'], 'wb') as report:
+                for chunk in CSVRenderer().stream(imports.REPORT_COLUMNS, imports.report_rows(result)):
+                    report.write(chunk)
+            self.stdout.write(f"Wrote the rows not imported to {options['report']}")
+            return
+        for line, *_, errors in islice(imports.report_rows(result), self.shown_errors):
+            self.stdout.write(f'Line {line}: {errors}')
+        if summary['errors'] > self.shown_errors:
+            self.stdout.write(f"... and {summary['errors'] - self.shown_errors} more; see --report.")
@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from employees.changes import prune_changes
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete the change feed tombstones of objects deleted more than --days ago. Clients whose '
+        'position is older than the last one deleted have to download the lists again.'
+    )
+
+    def add_arguments(self, parser):
+        days = settings.CHANGE_LOG_RETENTION_DAYS
+        parser.add_argument('--days', type=int, default=days,
+                            help=f'Tombstones kept, in days (default: {days})')
+
+    def handle(self, *args, **options):
+        if options['days'] < 0:
+            raise CommandError('--days must be 0 or more.')
+        pruned = prune_changes(timezone.now() - timedelta(days=options['days']))
+        self.stdout.write(self.style.SUCCESS(f'Deleted {pruned} tombstones.'))
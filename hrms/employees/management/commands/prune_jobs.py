@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from employees.jobs import prune_jobs
+
+
+class Command(BaseCommand):
+    help = 'Delete the background jobs that finished more than --days ago, with their input and result files.'
+
+    def add_arguments(self, parser):
+        days = settings.JOB_RETENTION_DAYS
+        parser.add_argument('--days', type=int, default=days,
+                            help=f'Finished jobs kept, in days (default: {days})')
+
+    def handle(self, *args, **options):
+        if options['days'] < 0:
+            raise CommandError('--days must be 0 or more.')
+        pruned = prune_jobs(timezone.now() - timedelta(days=options['days']))
+        self.stdout.write(self.style.SUCCESS(f'Deleted {pruned} jobs.'))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from employees.rollups import rebuild_monthly_summaries
+
+
+class Command(BaseCommand):
+    help = 'Recompute the monthly attendance rollup from the attendance table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start-month', help='First month to rebuild, YYYY-MM (default: earliest)')
+        parser.add_argument('--end-month', help='Last month to rebuild, YYYY-MM (default: latest)')
+
+    def handle(self, *args, **options):
+        start = self.parse_month(options['start_month'], '--start-month')
+        end = self.parse_month(options['end_month'], '--end-month')
+        rows = rebuild_monthly_summaries(start, end)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} monthly summary rows.'))
+
+    @staticmethod
+    def parse_month(value, option):
+        if value is None:
+            return None
+        parsed = parse_date(f'{value}-01')
+        if parsed is None:
+            raise CommandError(f'{option} must be a month in YYYY-MM format.')
+        return parsed
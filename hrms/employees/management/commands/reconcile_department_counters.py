@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from employees.counters import reconcile_department_counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every department's headcount and today's attendance counts from the employee "
+        'and attendance tables, and report the departments whose counts had drifted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report the drift without correcting it')
+
+    def handle(self, *args, **options):
+        drifted = reconcile_department_counters(dry_run=options['dry_run'])
+        for name, stored, actual in drifted:
+            self.stdout.write(
+                f'{name}: employees {stored[0]} -> {actual[0]}, present {stored[1]} -> {actual[1]}, '
+                f'absent {stored[2]} -> {actual[2]}'
+            )
+        verb = 'Found' if options['dry_run'] else 'Corrected'
+        style = self.style.WARNING if drifted else self.style.SUCCESS
+        self.stdout.write(style(f'{verb} {len(drifted)} departments with drifted counters.'))
@@ -0,0 +1,32 @@
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from employees import jobs
+from employees.api import tasks  # noqa: F401 (registers the kinds of job)
+
+
+class Command(BaseCommand):
+    help = (
+        'Run queued background jobs (exports, imports, rollup rebuilds) until stopped. SIGTERM or '
+        'Ctrl-C stops claiming jobs and waits for the running ones to finish.'
+    )
+
+    def add_arguments(self, parser):
+        concurrency = settings.JOB_WORKER_CONCURRENCY
+        parser.add_argument('--concurrency', type=int, default=concurrency,
+                            help=f'Jobs run at once (default: {concurrency})')
+        parser.add_argument('--once', action='store_true', help='Exit once no job is due instead of waiting')
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1:
+            raise CommandError('--concurrency must be 1 or more.')
+        worker = jobs.Worker(concurrency=options['concurrency'], once=options['once'])
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: worker.stop())
+        self.stdout.write(
+            f"Worker {worker.id} running {worker.concurrency} jobs at once: {', '.join(sorted(jobs.TASKS))}"
+        )
+        worker.run()
+        self.stdout.write(self.style.SUCCESS(f'Worker {worker.id} stopped.'))
@@ -0,0 +1,61 @@
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from employees import fake_data, seeding
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk-load deterministic fake departments, employees and weekday attendance through the ORM. '
+        'Existing rows are kept, so the command can be re-run to extend a dataset.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--departments', type=int, default=10, help='Departments (default: 10)')
+        parser.add_argument('--employees', type=int, default=1000, help='Employees (default: 1000)')
+        parser.add_argument('--days', type=int, default=365,
+                            help='Days of attendance ending at --end-date (default: 365; 0 for none)')
+        parser.add_argument('--end-date', help='Last attendance day, YYYY-MM-DD (default: today)')
+        parser.add_argument('--seed', type=int, default=fake_data.DEFAULT_SEED, help='Random seed (default: 42)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT (default: 5000)')
+
+    def handle(self, *args, **options):
+        end_date = date.today()
+        if options['end_date']:
+            end_date = parse_date(options['end_date'])
+            if end_date is None:
+                raise CommandError('--end-date must be a date in YYYY-MM-DD format.')
+        if options['departments'] < 1:
+            raise CommandError('--departments must be at least 1.')
+
+        started = time.perf_counter()
+        departments = seeding.seed_departments(options['departments'])
+        created = seeding.seed_employees(
+            options['employees'], departments, seed=options['seed'], batch_size=options['batch_size'],
+        )
+        self.stdout.write(f'Employees: {created} created ({self.elapsed(started)})')
+
+        if options['days'] > 0:
+            started = time.perf_counter()
+            employee_ids = [fake_data.employee_id(n) for n in range(1, options['employees'] + 1)]
+            sent = seeding.seed_attendance(
+                employee_ids, end_date - timedelta(days=options['days'] - 1), end_date,
+                seed=options['seed'], batch_size=options['batch_size'], progress=self.progress(started),
+            )
+            self.stdout.write(f'\nAttendance: {sent} rows loaded ({self.elapsed(started)})')
+
+        self.stdout.write(self.style.SUCCESS('Done.'))
+
+    def progress(self, started):
+        def report(rows):
+            rate = rows / max(time.perf_counter() - started, 1e-9)
+            self.stdout.write(f'\r  {rows} attendance rows, {rate:,.0f} rows/s', ending='')
+            self.stdout.flush()
+        return report
+
+    @staticmethod
+    def elapsed(started):
+        return f'{time.perf_counter() - started:.1f}s'
@@ -0,0 +1,110 @@
+"""
+In-process metrics registry.
+
+Counters and histograms are kept per worker process; each gunicorn worker
+reports its own values through the metrics endpoint.
+"""
+import threading
+from bisect import bisect_left
+
+
+class Counter:
+    """A monotonically increasing counter with optional labels"""
+    type = 'counter'
+
+    def __init__(self, name, description, labelnames=()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        """Return [(labels dict, value)] for every label combination seen so far."""
+        with self._lock:
+            items = list(self._values.items())
+        return [(dict(zip(self.labelnames, key)), value) for key, value in items]
+
+    def value(self, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0)
+
+
+class Histogram:
+    """Observations counted into fixed buckets, with their sum, per label combination"""
+    type = 'histogram'
+
+    def __init__(self, name, description, labelnames=(), buckets=()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        # Index of the first bucket whose upper bound (le) is >= value; len(buckets) is +Inf
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0))
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        """
+        Return [(labels dict, {'buckets': {le: cumulative count}, 'sum': ..., 'count': ...})].
+
+        Bucket counts are cumulative, as in the Prometheus exposition format.
+        """
+        with self._lock:
+            items = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        samples = []
+        for key, counts, total in items:
+            cumulative, buckets = 0, {}
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            samples.append((dict(zip(self.labelnames, key)), {'buckets': buckets, 'sum': total, 'count': cumulative}))
+        return samples
+
+
+REGISTRY = {}
+_registry_lock = threading.Lock()
+
+
+def _register(cls, name, *args, **kwargs):
+    with _registry_lock:
+        if name not in REGISTRY:
+            REGISTRY[name] = cls(name, *args, **kwargs)
+        return REGISTRY[name]
+
+
+def counter(name, description, labelnames=()):
+    """Return the counter registered under ``name``, creating it on first use."""
+    return _register(Counter, name, description, labelnames)
+
+
+def histogram(name, description, labelnames=(), buckets=()):
+    """Return the histogram registered under ``name``, creating it on first use."""
+    return _register(Histogram, name, description, labelnames, buckets)
+
+
+def snapshot():
+    """Return every metric as {name: {'type': ..., 'description': ..., 'samples': [...]}}."""
+    with _registry_lock:
+        metrics = list(REGISTRY.values())
+    return {
+        metric.name: {
+            'type': metric.type,
+            'description': metric.description,
+            'samples': [{'labels': labels, 'value': value} for labels, value in metric.samples()],
+        }
+        for metric in metrics
+    }
@@ -0,0 +1,199 @@
+import json
+import logging
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import InterfaceError, OperationalError
+from rest_framework.views import APIView
+
+from . import instrumentation
+from .db import router
+
+
+logger = logging.getLogger('employees.requests')
+
+
+class RequestMetricsMiddleware:
+    """
+    Time every request and report it three ways:
+
+    - a ``Server-Timing`` header (connect, db, serialize, render, total)
+    - a structured log line on the ``employees.requests`` logger (INFO), and
+      the request's SQL at WARNING when it is slower than SLOW_REQUEST_MS
+    - per-route histograms, served by the metrics endpoint
+
+    Keep it first in MIDDLEWARE so the total covers the other middleware.
+    For streaming responses the timings stop when the body starts.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timings, token = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            instrumentation.finish(token)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings, token = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            instrumentation.finish(token)
+        return self.finish(request, response, timings)
+
+    def process_template_response(self, request, response):
+        """Time DRF's rendering, which happens after the view and before the response phase."""
+        timings = instrumentation.current()
+        if timings is not None and not response.is_rendered:
+            started = time.perf_counter()
+
+            def rendered(response):
+                timings.render += time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    @staticmethod
+    def start():
+        max_statements = settings.SLOW_REQUEST_MAX_QUERIES if settings.SLOW_REQUEST_MS > 0 else 0
+        return instrumentation.start(max_statements)
+
+    def finish(self, request, response, timings):
+        total = time.perf_counter() - timings.started
+        match = request.resolver_match
+        route = match.view_name if match else 'unmatched'
+        labels = {'route': route, 'method': request.method}
+        instrumentation.request_duration.observe(total, **labels)
+        instrumentation.request_db_duration.observe(timings.db, **labels)
+        instrumentation.request_queries.observe(timings.queries, **labels)
+        instrumentation.requests_total.inc(status=str(response.status_code), **labels)
+
+        if settings.SERVER_TIMING_ENABLED:
+            response['Server-Timing'] = timings.server_timing(total)
+
+        slow = self.is_slow(total)
+        if not slow and not logger.isEnabledFor(logging.INFO):
+            return response
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'route': route,
+            'status': response.status_code,
+            'duration_ms': round(total * 1000, 1),
+            'connect_ms': round(timings.connect * 1000, 1),
+            'db_ms': round(timings.db * 1000, 1),
+            'queries': timings.queries,
+            'serialize_ms': round(timings.serialize * 1000, 1),
+            'render_ms': round(timings.render * 1000, 1),
+        }
+        logger.info(json.dumps(record))
+        if slow:
+            record['sql'] = [
+                {'ms': round(seconds * 1000, 1), 'sql': sql} for sql, seconds in timings.statements
+            ]
+            record['sql_truncated'] = timings.queries > len(timings.statements)
+            logger.warning(json.dumps(record))
+        return response
+
+    @staticmethod
+    def is_slow(total):
+        threshold = settings.SLOW_REQUEST_MS
+        if threshold <= 0 or total * 1000 < threshold:
+            return False
+        return random.random() < settings.SLOW_REQUEST_SAMPLE_RATE
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Send the reads of safe API requests to a replica (employees/db/router.py),
+    and keep a client on the default database for DB_REPLICA_PIN_SECONDS after
+    each of its writes, so that it reads what it wrote.
+
+    A successful write sets the ``PIN_COOKIE`` cookie to the time the pin ends.
+    GET and HEAD requests to DRF views read from a replica unless that time is
+    still to come, or the view sets ``replica_reads = False``. A read that
+    fails on the replica with a connection error is answered again from the
+    default database, and the replica is left out until its next lag check.
+    Not used when no replicas are configured.
+    """
+    sync_capable = True
+    async_capable = True
+
+    PIN_COOKIE = 'hrms_read_primary_until'
+
+    def __init__(self, get_response):
+        if not settings.DB_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        _, token = router.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            router.finish(token)
+        return self.pin(request, response)
+
+    async def __acall__(self, request):
+        _, token = router.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            router.finish(token)
+        return self.pin(request, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None)
+        if (request.method in ('GET', 'HEAD') and view_class is not None and issubclass(view_class, APIView)
+                and getattr(view_class, 'replica_reads', True) and not self.pinned(request)):
+            router.current().alias = router.choose_replica()
+        return None
+
+    def process_exception(self, request, exception):
+        route = router.current()
+        if route is None or route.alias is None or not isinstance(exception, (OperationalError, InterfaceError)):
+            return None
+        router.mark_unavailable(route.alias)
+        route.alias = None
+        match = request.resolver_match
+        if iscoroutinefunction(match.func):
+            # An async view cannot be called again from here; the next request avoids the replica
+            return None
+        # Safe to repeat; the handler renders the response as it would the view's
+        return match.func(request, *match.args, **match.kwargs)
+
+    def pinned(self, request):
+        try:
+            return float(request.COOKIES.get(self.PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def pin(self, request, response):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400:
+            pin_seconds = settings.DB_REPLICA_PIN_SECONDS
+            response.set_cookie(
+                self.PIN_COOKIE, f'{time.time() + pin_seconds:.3f}', max_age=pin_seconds,
+                httponly=True, samesite='Lax',
+            )
+        return response
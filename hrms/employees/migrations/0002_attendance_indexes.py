@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:08
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction; building the
+    # indexes this way does not block writes to a live attendance table.
+    atomic = False
+
+    dependencies = [
+        ('employees', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='attendance',
+            index=models.Index(fields=['date', 'status'], name='attendance_date_status_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='attendance',
+            index=models.Index(fields=['-date', 'employee'], name='attendance_date_employee_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='attendance',
+            index=models.Index(condition=models.Q(('status', 'ABSENT')), fields=['date', 'employee'], name='attendance_absent_date_idx'),
+        ),
+    ]
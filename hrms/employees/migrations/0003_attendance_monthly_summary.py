@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0002_attendance_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceMonthlySummary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('present_count', models.IntegerField(default=0)),
+                ('absent_count', models.IntegerField(default=0)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_summaries', to='employees.employee')),
+            ],
+            options={
+                'db_table': 'attendance_monthly_summaries',
+                'indexes': [models.Index(fields=['month', 'employee'], name='attendance_summary_month_idx')],
+                'unique_together': {('employee', 'month')},
+            },
+        ),
+        # Backfill the rollup from the attendance already recorded
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO attendance_monthly_summaries (employee_id, month, present_count, absent_count)
+                SELECT employee_id, date_trunc('month', date)::date,
+                       COUNT(*) FILTER (WHERE status = 'PRESENT'),
+                       COUNT(*) FILTER (WHERE status = 'ABSENT')
+                FROM employees_attendance
+                GROUP BY 1, 2
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
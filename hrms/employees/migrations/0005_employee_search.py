@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:41
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Adding the stored column rewrites the employees table (about 10 s per
+    # million rows) under an exclusive lock. The GIN index is then built
+    # concurrently, which cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('employees', '0004_attendance_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.SearchVector('full_name', models.Func('email', models.Value('.@_+-'), models.Value('     '), function='translate'), 'employee_id', models.Func('employee_id', models.Value('[^0-9]+'), models.Value(' '), models.Value('g'), function='regexp_replace'), config='simple'), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        AddIndexConcurrently(
+            model_name='employee',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='employee_search_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='employee',
+            index=models.Index(django.db.models.functions.comparison.Collate(django.db.models.functions.text.Upper('full_name'), 'C'), name='employee_name_prefix_idx'),
+        ),
+        # The new column has no statistics until the next autoanalyze. Without
+        # them every search is estimated at 2% of the table and can be planned
+        # as a walk of the whole name index.
+        migrations.RunSQL('ANALYZE employees', migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # The covering index is built next to the old one and swapped in, so the
+    # list ordering never runs without an index; CONCURRENTLY cannot run
+    # inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('employees', '0005_employee_search'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveIndex(
+                    model_name='attendance',
+                    name='attendance_date_employee_idx',
+                ),
+                migrations.AddIndex(
+                    model_name='attendance',
+                    index=models.Index(fields=['-date', 'employee'], include=('id', 'updated_at'), name='attendance_date_employee_idx'),
+                ),
+            ],
+            database_operations=[
+                # Reversed bottom-up: build the old index, drop the covering one, rename
+                migrations.RunSQL(
+                    'CREATE INDEX CONCURRENTLY attendance_date_employee_new ON employees_attendance '
+                    '(date DESC, employee_id) INCLUDE (id, updated_at)',
+                    'ALTER INDEX attendance_date_employee_old RENAME TO attendance_date_employee_idx',
+                ),
+                migrations.RunSQL(
+                    'DROP INDEX CONCURRENTLY attendance_date_employee_idx',
+                    'DROP INDEX CONCURRENTLY attendance_date_employee_idx',
+                ),
+                migrations.RunSQL(
+                    'ALTER INDEX attendance_date_employee_new RENAME TO attendance_date_employee_idx',
+                    'CREATE INDEX CONCURRENTLY attendance_date_employee_old ON employees_attendance '
+                    '(date DESC, employee_id)',
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,113 @@
+from django.db import migrations
+
+
+# Columns in the order Django created them
+COLUMNS = 'id, date, status, created_at, employee_id, updated_at'
+
+# Constraints and indexes keep the names Django gave them, so later schema
+# migrations find them. On the partitioned table, each one covers every partition.
+CONSTRAINTS_AND_INDEXES = [
+    # A unique constraint on a partitioned table must include the partition key
+    'ALTER TABLE employees_attendance ADD CONSTRAINT employees_attendance_pkey PRIMARY KEY (id, date)',
+    'ALTER TABLE employees_attendance ADD CONSTRAINT employees_attendance_employee_id_date_8cf32e52_uniq '
+    'UNIQUE (employee_id, date)',
+    'ALTER TABLE employees_attendance ADD CONSTRAINT employees_attendance_employee_id_450daa06_fk_employees_id '
+    'FOREIGN KEY (employee_id) REFERENCES employees (id) DEFERRABLE INITIALLY DEFERRED',
+    'CREATE INDEX employees_attendance_employee_id_450daa06 ON employees_attendance (employee_id)',
+    'CREATE INDEX attendance_date_status_idx ON employees_attendance (date, status)',
+    'CREATE INDEX attendance_date_employee_idx ON employees_attendance (date DESC, employee_id) '
+    'INCLUDE (id, updated_at)',
+    "CREATE INDEX attendance_absent_date_idx ON employees_attendance (date, employee_id) "
+    "WHERE status = 'ABSENT'",
+    'ANALYZE employees_attendance',
+]
+
+PARTITION = [
+    'ALTER TABLE employees_attendance RENAME TO employees_attendance_unpartitioned',
+    """
+    CREATE TABLE employees_attendance (
+        id integer NOT NULL,
+        date date NOT NULL,
+        status varchar(10) NOT NULL,
+        created_at timestamp with time zone NOT NULL,
+        employee_id integer NOT NULL,
+        updated_at timestamp with time zone NOT NULL
+    ) PARTITION BY RANGE (date)
+    """,
+    'CREATE TABLE employees_attendance_default PARTITION OF employees_attendance DEFAULT',
+    # One partition per month that has attendance, and for the current month and
+    # the next three (employees.partitions.MONTHS_AHEAD). Months in between are
+    # created by the attendance_partitions command when they are needed.
+    """
+    DO $$
+    DECLARE
+        month date;
+    BEGIN
+        FOR month IN
+            SELECT DISTINCT date_trunc('month', date)::date FROM employees_attendance_unpartitioned
+            UNION
+            SELECT generate_series(date_trunc('month', current_date), date_trunc('month', current_date)
+                                   + interval '3 months', interval '1 month')::date
+            ORDER BY 1
+        LOOP
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF employees_attendance FOR VALUES FROM (%L) TO (%L)',
+                'employees_attendance_' || to_char(month, 'YYYY_MM'), month, month + interval '1 month'
+            );
+        END LOOP;
+    END $$
+    """,
+    # The indexes are built after the copy, which is faster than maintaining them row by row
+    f'INSERT INTO employees_attendance ({COLUMNS}) SELECT {COLUMNS} FROM employees_attendance_unpartitioned',
+    'DROP TABLE employees_attendance_unpartitioned',
+    # Identity columns are not supported on partitioned tables before PostgreSQL
+    # 17, so ids come from a sequence owned by the column, as with serial
+    'CREATE SEQUENCE employees_attendance_id_seq AS integer OWNED BY employees_attendance.id',
+    "SELECT setval('employees_attendance_id_seq', COALESCE(MAX(id), 0) + 1, false) FROM employees_attendance",
+    "ALTER TABLE employees_attendance ALTER COLUMN id SET DEFAULT nextval('employees_attendance_id_seq')",
+    *CONSTRAINTS_AND_INDEXES,
+]
+
+UNPARTITION = [
+    'ALTER TABLE employees_attendance RENAME TO employees_attendance_partitioned',
+    # Frees the name for the identity sequence of the new table
+    'ALTER SEQUENCE employees_attendance_id_seq RENAME TO employees_attendance_partitioned_id_seq',
+    """
+    CREATE TABLE employees_attendance (
+        id integer NOT NULL GENERATED BY DEFAULT AS IDENTITY,
+        date date NOT NULL,
+        status varchar(10) NOT NULL,
+        created_at timestamp with time zone NOT NULL,
+        employee_id integer NOT NULL,
+        updated_at timestamp with time zone NOT NULL
+    )
+    """,
+    f'INSERT INTO employees_attendance ({COLUMNS}) SELECT {COLUMNS} FROM employees_attendance_partitioned',
+    # Drops every partition and the sequence
+    'DROP TABLE employees_attendance_partitioned',
+    "SELECT setval(pg_get_serial_sequence('employees_attendance', 'id'), COALESCE(MAX(id), 0) + 1, false) "
+    "FROM employees_attendance",
+    *(
+        statement.replace('PRIMARY KEY (id, date)', 'PRIMARY KEY (id)')
+        for statement in CONSTRAINTS_AND_INDEXES
+    ),
+]
+
+
+class Migration(migrations.Migration):
+    """
+    Partition employees_attendance by month (see employees/partitions.py).
+
+    The table is rewritten under an exclusive lock, in one transaction. On
+    10 million rows that takes a few minutes; run it in a maintenance window.
+    The model state does not change. The ORM still treats ``id`` as the
+    primary key.
+    """
+
+    dependencies = [
+        ('employees', '0006_attendance_board_index'),
+    ]
+
+    operations = [
+        migrations.RunSQL(PARTITION, UNPARTITION),
+    ]
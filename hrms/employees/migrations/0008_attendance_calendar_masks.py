@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0007_partition_attendance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendancemonthlysummary',
+            name='absent_mask',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='attendancemonthlysummary',
+            name='present_mask',
+            field=models.IntegerField(default=0),
+        ),
+        # Backfill the masks of the rollup rows from the attendance already recorded
+        migrations.RunSQL(
+            sql="""
+                UPDATE attendance_monthly_summaries s
+                SET present_mask = a.present_mask, absent_mask = a.absent_mask
+                FROM (
+                    SELECT employee_id, date_trunc('month', date)::date AS month,
+                           COALESCE(bit_or(1 << (extract(day FROM date)::integer - 1))
+                                    FILTER (WHERE status = 'PRESENT'), 0) AS present_mask,
+                           COALESCE(bit_or(1 << (extract(day FROM date)::integer - 1))
+                                    FILTER (WHERE status = 'ABSENT'), 0) AS absent_mask
+                    FROM employees_attendance
+                    GROUP BY 1, 2
+                ) a
+                WHERE s.employee_id = a.employee_id AND s.month = a.month
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
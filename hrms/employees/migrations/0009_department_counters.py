@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0008_attendance_calendar_masks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='department',
+            name='absent_today',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='attendance_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='counts_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='employee_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='present_today',
+            field=models.IntegerField(default=0),
+        ),
+        # Backfill the headcounts. Today's attendance is counted by the first
+        # attendance write of the day, or by reconcile_department_counters
+        migrations.RunSQL(
+            sql="""
+                UPDATE departments d
+                SET employee_count = (SELECT COUNT(*) FROM employees e WHERE e.department_id = d.id)
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,83 @@
+from django.db import migrations
+
+
+# Tables whose changes are recorded, and the object type they are recorded as
+TABLES = {'departments': 'department', 'employees': 'employee', 'employees_attendance': 'attendance'}
+
+CHANGE_LOG = [
+    # One row per object: its last change. Deleted objects stay as tombstones.
+    """
+    CREATE TABLE change_log (
+        object_type varchar(20) NOT NULL,
+        object_id integer NOT NULL,
+        deleted boolean NOT NULL,
+        txid xid8 NOT NULL,
+        seq bigint NOT NULL,
+        changed_at timestamp with time zone NOT NULL,
+        PRIMARY KEY (object_type, object_id)
+    )
+    """,
+    'CREATE SEQUENCE change_log_seq',
+    # The feed reads each type's changes in position order
+    'CREATE INDEX change_log_position_idx ON change_log (object_type, txid, seq)',
+    # The position up to which change_log has been pruned
+    'CREATE TABLE change_log_horizon (txid xid8 NOT NULL, seq bigint NOT NULL)',
+    "INSERT INTO change_log_horizon VALUES ('0', 0)",
+    # Statement triggers see a bulk INSERT or DELETE as one set of rows, and are
+    # not fired by the row moves between attendance partitions (employees.partitions)
+    """
+    CREATE FUNCTION record_changes() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            INSERT INTO change_log (object_type, object_id, deleted, txid, seq, changed_at)
+            SELECT TG_ARGV[0], id, true, pg_current_xact_id(), nextval('change_log_seq'), now()
+            FROM old_rows ORDER BY id
+            ON CONFLICT (object_type, object_id) DO UPDATE SET
+                deleted = EXCLUDED.deleted, txid = EXCLUDED.txid, seq = EXCLUDED.seq,
+                changed_at = EXCLUDED.changed_at;
+        ELSE
+            INSERT INTO change_log (object_type, object_id, deleted, txid, seq, changed_at)
+            SELECT TG_ARGV[0], id, false, pg_current_xact_id(), nextval('change_log_seq'), now()
+            FROM new_rows ORDER BY id
+            ON CONFLICT (object_type, object_id) DO UPDATE SET
+                deleted = EXCLUDED.deleted, txid = EXCLUDED.txid, seq = EXCLUDED.seq,
+                changed_at = EXCLUDED.changed_at;
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """,
+]
+
+# A trigger with transition tables can have only one event
+for table, object_type in TABLES.items():
+    CHANGE_LOG += [
+        f"CREATE TRIGGER {table}_insert_changes AFTER INSERT ON {table} REFERENCING NEW TABLE AS new_rows "
+        f"FOR EACH STATEMENT EXECUTE FUNCTION record_changes('{object_type}')",
+        f"CREATE TRIGGER {table}_update_changes AFTER UPDATE ON {table} REFERENCING NEW TABLE AS new_rows "
+        f"FOR EACH STATEMENT EXECUTE FUNCTION record_changes('{object_type}')",
+        f"CREATE TRIGGER {table}_delete_changes AFTER DELETE ON {table} REFERENCING OLD TABLE AS old_rows "
+        f"FOR EACH STATEMENT EXECUTE FUNCTION record_changes('{object_type}')",
+    ]
+
+REVERSE = [
+    *(
+        f'DROP TRIGGER {table}_{event}_changes ON {table}'
+        for table in TABLES for event in ('insert', 'update', 'delete')
+    ),
+    'DROP FUNCTION record_changes()',
+    'DROP TABLE change_log_horizon',
+    'DROP TABLE change_log',
+    'DROP SEQUENCE change_log_seq',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0009_department_counters'),
+    ]
+
+    operations = [
+        migrations.RunSQL(sql=CHANGE_LOG, reverse_sql=REVERSE),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0011_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReferenceCacheVersion',
+            fields=[
+                ('namespace', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'reference_cache_versions',
+            },
+        ),
+    ]
@@ -1,12 +1,28 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
+from django.db.models.functions import Collate, Upper
 from django.core.validators import EmailValidator
+from django.utils import timezone
 
 
 class Department(models.Model):
-    """Department model for HRMS"""
+    """
+    Department model for HRMS
+
+    The headcount and the attendance counts are maintained by
+    employees.counters rather than counted when they are read.
+    """
     name = models.CharField(max_length=255, unique=True, null=False, blank=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    employee_count = models.IntegerField(default=0)
+    # Attendance of the department's employees on attendance_date (normally today)
+    attendance_date = models.DateField(null=True, blank=True)
+    present_today = models.IntegerField(default=0)
+    absent_today = models.IntegerField(default=0)
+    # Moved by every counter change, so the ETags change with the counts
+    counts_updated_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         db_table = 'departments'
@@ -20,13 +36,39 @@ class Employee(models.Model):
     department = models.ForeignKey(Department, on_delete=models.PROTECT, related_name='employees')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Words of the name, email and employee ID for ?search= (employees/search.py).
+    # The email is split at its punctuation and the ID's digits are indexed on
+    # their own, so "clarke", "EMP27" and "2733" all match as prefixes.
+    search_vector = models.GeneratedField(
+        expression=SearchVector(
+            'full_name',
+            models.Func('email', models.Value('.@_+-'), models.Value('     '), function='translate'),
+            'employee_id',
+            models.Func('employee_id', models.Value('[^0-9]+'), models.Value(' '), models.Value('g'),
+                        function='regexp_replace'),
+            config='simple',
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
 
     class Meta:
         db_table = 'employees'
+        indexes = [
+            GinIndex(fields=['search_vector'], name='employee_search_idx'),
+            # Name-prefix typeahead in name order; byte order so LIKE 'X%' can use it in any locale
+            models.Index(Collate(Upper('full_name'), 'C'), name='employee_name_prefix_idx'),
+        ]
 
 
 class Attendance(models.Model):
-    """Attendance model for HRMS"""
+    """
+    Attendance model for HRMS
+
+    The table is partitioned by month on ``date`` (employees/partitions.py).
+    Its primary key in the database is (id, date). New indexes are built on
+    every partition and cannot be built CONCURRENTLY.
+    """
     STATUS_CHOICES = [
         ('PRESENT', 'Present'),
         ('ABSENT', 'Absent'),
@@ -36,7 +78,122 @@ class Attendance(models.Model):
     date = models.DateField()
     status = models.CharField(max_length=10, choices=STATUS_CHOICES)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-date', 'employee']
         unique_together = [['employee', 'date']]
+        # (employee, date) lookups are served by the unique_together index
+        indexes = [
+            # Org-wide date lookups and the admin status/date filters
+            models.Index(fields=['date', 'status'], name='attendance_date_status_idx'),
+            # Default ordering across employees. The included columns let the
+            # daily board's ETag aggregate read one date without visiting the
+            # table; status is left out so that range counts by status keep
+            # their per-employee plans instead of scanning every employee's rows
+            models.Index(
+                fields=['-date', 'employee'],
+                include=['id', 'updated_at'],
+                name='attendance_date_employee_idx',
+            ),
+            # "Who was absent on date X" without touching PRESENT rows
+            models.Index(
+                fields=['date', 'employee'],
+                condition=models.Q(status='ABSENT'),
+                name='attendance_absent_date_idx',
+            ),
+        ]
+
+
+class AttendanceMonthlySummary(models.Model):
+    """
+    Per-employee monthly attendance counts.
+
+    A rollup of Attendance maintained incrementally by employees.rollups, so
+    range summaries read one row per employee-month instead of one per day.
+    The masks hold the days themselves, so a calendar can be read from the
+    rollup too.
+    """
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='monthly_summaries')
+    month = models.DateField(help_text='First day of the month')
+    present_count = models.IntegerField(default=0)
+    absent_count = models.IntegerField(default=0)
+    # Bit n is set when day n + 1 of the month is PRESENT (ABSENT); see employees.rollups
+    present_mask = models.IntegerField(default=0)
+    absent_mask = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'attendance_monthly_summaries'
+        unique_together = [['employee', 'month']]
+        indexes = [
+            models.Index(fields=['month', 'employee'], name='attendance_summary_month_idx'),
+        ]
+
+
+class Job(models.Model):
+    """
+    A background job, run by a `manage.py run_worker` process (employees/jobs.py).
+
+    ``progress`` counts what the job has done out of ``total`` (rows, bytes or
+    months, depending on its kind). Its result file, if any, is ``result_name``
+    in the job's directory under JOB_RESULT_DIR.
+    """
+    QUEUED = 'QUEUED'
+    RUNNING = 'RUNNING'
+    SUCCEEDED = 'SUCCEEDED'
+    FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=50)
+    params = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=1)
+    # Not claimed before then; moved forward when a failed attempt is retried
+    run_after = models.DateTimeField(default=timezone.now)
+    # The worker running the job, and when it last said so
+    locked_by = models.CharField(max_length=255, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    progress = models.BigIntegerField(default=0)
+    total = models.BigIntegerField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    result_name = models.CharField(max_length=255, blank=True)
+    result_type = models.CharField(max_length=100, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'jobs'
+        indexes = [
+            # The queue: workers claim the oldest due job without reading finished ones
+            models.Index(
+                fields=['run_after', 'id'],
+                condition=models.Q(status='QUEUED'),
+                name='job_queue_idx',
+            ),
+            # Running jobs whose worker stopped sending heartbeats
+            models.Index(
+                fields=['heartbeat_at'],
+                condition=models.Q(status='RUNNING'),
+                name='job_running_idx',
+            ),
+        ]
+
+
+class ReferenceCacheVersion(models.Model):
+    """
+    The version of a reference cache namespace (employees/cache.py) when no
+    shared cache is configured, so that every worker sees an invalidation.
+    """
+    namespace = models.CharField(max_length=50, primary_key=True)
+    version = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'reference_cache_versions'
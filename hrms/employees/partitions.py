@@ -0,0 +1,171 @@
+"""
+Monthly range partitions of the attendance table.
+
+Migration 0007 made ``employees_attendance`` a table partitioned by RANGE
+(date), with one partition per calendar month named
+``employees_attendance_YYYY_MM``. Dates without a month partition go to
+``employees_attendance_default``. A query with a date range reads only the
+partitions of its months. An old month can be detached with a catalogue
+update instead of deleted row by row.
+
+A unique constraint on a partitioned table must include the partition key, so
+the primary key in the database is (id, date). The ids still come from one
+sequence, so ``id`` alone stays unique and the ORM keeps using it as the
+primary key.
+
+The ``attendance_partitions`` command creates partitions ahead of time, so new
+months do not land in the default partition.
+"""
+import re
+from collections import namedtuple
+from datetime import date
+
+from django.db import connection, transaction
+
+from .models import Attendance
+from .rollups import month_start, next_month
+
+
+PARENT = Attendance._meta.db_table
+DEFAULT_PARTITION = f'{PARENT}_default'
+
+# Months after the current one that the command (and migration 0007) creates
+MONTHS_AHEAD = 3
+
+# start and end are None for the default partition; rows is the planner's estimate
+Partition = namedtuple('Partition', 'name start end rows bytes')
+
+_BOUNDS = re.compile(r"FROM \('([0-9-]+)'\) TO \('([0-9-]+)'\)")
+
+
+def partition_name(month):
+    """The name of the partition holding the month of ``month``."""
+    return f'{PARENT}_{month:%Y_%m}'
+
+
+def detached_name(name):
+    """The name a detached partition is renamed to, which frees its month's name."""
+    return f'{name}_detached'
+
+
+def partitions():
+    """The attendance partitions in date order, the default partition last."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid),
+                   GREATEST(c.reltuples, 0)::bigint, pg_total_relation_size(c.oid)
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = %s::regclass
+            """,
+            [PARENT],
+        )
+        rows = cursor.fetchall()
+    result = []
+    for name, bound, estimate, size in rows:
+        match = _BOUNDS.search(bound)
+        start, end = (date.fromisoformat(match[1]), date.fromisoformat(match[2])) if match else (None, None)
+        result.append(Partition(name, start, end, estimate, size))
+    return sorted(result, key=lambda partition: (partition.start is None, partition.start))
+
+
+def create_partition(month):
+    """
+    Create the partition for the month of ``month``, moving that month's rows
+    out of the default partition. Returns the number of rows moved, or None if
+    the partition already exists. A standalone table of the partition's name,
+    a month detached before detached tables were renamed, is renamed first.
+    """
+    start, end = month_start(month), next_month(month)
+    name = connection.ops.quote_name(partition_name(start))
+    parent = connection.ops.quote_name(PARENT)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT EXISTS (SELECT 1 FROM pg_inherits WHERE inhrelid = t.oid AND inhparent = %s::regclass)
+            FROM (SELECT to_regclass(%s) AS oid) t WHERE t.oid IS NOT NULL
+            """,
+            [PARENT, partition_name(start)],
+        )
+        existing = cursor.fetchone()
+        if existing is not None:
+            if existing[0]:
+                return None
+            cursor.execute(
+                f'ALTER TABLE {name} RENAME TO {connection.ops.quote_name(detached_name(partition_name(start)))}'
+            )
+        # Built on its own and then attached. ATTACH takes a lighter lock on the
+        # parent than CREATE TABLE ... PARTITION OF, so reads and writes of
+        # other months carry on.
+        cursor.execute(f'CREATE TABLE {name} (LIKE {parent} INCLUDING DEFAULTS)')
+        cursor.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM {connection.ops.quote_name(DEFAULT_PARTITION)}
+                WHERE date >= %s AND date < %s
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+            """,
+            [start, end],
+        )
+        moved = cursor.rowcount
+        cursor.execute(
+            f"ALTER TABLE {parent} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+    return moved
+
+
+def create_partitions(start, end):
+    """
+    Create the missing partitions for every month from ``start`` to ``end``
+    inclusive. Returns {name: rows moved from the default partition} for the
+    new ones.
+    """
+    created = {}
+    month = month_start(start)
+    while month <= end:
+        moved = create_partition(month)
+        if moved is not None:
+            created[partition_name(month)] = moved
+        month = next_month(month)
+    return created
+
+
+def detach_partitions(before):
+    """
+    Detach the monthly partitions of the months before the month of ``before``.
+
+    Each one becomes a standalone table named by detached_name(), ready to be
+    dumped and dropped, so that its month can be created again for rows that
+    arrive later. Its foreign key to employees is dropped too, so that
+    archived rows do not block deleting an employee. The monthly summary rows
+    of those months are kept. Returns the names of the detached tables.
+    """
+    detached = []
+    for partition in partitions():
+        if partition.start is None or partition.start >= month_start(before):
+            continue
+        name = connection.ops.quote_name(partition.name)
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Deferred foreign key checks pending in the transaction would block the ALTER TABLE
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+            cursor.execute(f'ALTER TABLE {connection.ops.quote_name(PARENT)} DETACH PARTITION {name}')
+            cursor.execute('SET CONSTRAINTS ALL DEFERRED')
+            cursor.execute(
+                "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+                [partition.name],
+            )
+            for (constraint,) in cursor.fetchall():
+                cursor.execute(f'ALTER TABLE {name} DROP CONSTRAINT {connection.ops.quote_name(constraint)}')
+            cursor.execute(f'ALTER TABLE {name} RENAME TO {connection.ops.quote_name(detached_name(partition.name))}')
+        detached.append(detached_name(partition.name))
+    return detached
+
+
+def default_partition_rows():
+    """Rows in the default partition, i.e. dates that have no month partition yet."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(DEFAULT_PARTITION)}')
+        return cursor.fetchone()[0]
@@ -0,0 +1,142 @@
+"""
+Incremental maintenance of the attendance rollup tables.
+
+Every code path that writes Attendance reports what it changed as
+``(employee_pk, date, old_status, new_status)`` tuples, where ``old_status`` is
+None for an insert and ``new_status`` is None for a delete. The changes are
+folded into per employee-month deltas and applied with a single upsert, inside
+the caller's transaction. Today's changes also go to the department counters
+(employees.counters).
+
+Besides the counts, each summary row holds the month's days as two bitmaps,
+``present_mask`` and ``absent_mask``: bit ``n`` is set when the status of day
+``n + 1`` is PRESENT (or ABSENT). A change flips the bit of its day in the old
+status's mask and in the new one's, so the masks are maintained with XOR just
+as the counts are with addition.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import connection, transaction
+
+from . import counters
+from .models import Attendance, AttendanceMonthlySummary
+
+
+SUMMARY_TABLE = AttendanceMonthlySummary._meta.db_table
+ATTENDANCE_TABLE = Attendance._meta.db_table
+
+
+def month_start(day):
+    """Return the first day of the month containing ``day``."""
+    return day.replace(day=1)
+
+
+def day_bit(day):
+    """The bit of ``day`` in its month's present/absent masks."""
+    return 1 << (day.day - 1)
+
+
+def days_mask(first, last):
+    """The bits of the days ``first`` to ``last``, both in the same month."""
+    return (1 << last.day) - (1 << (first.day - 1))
+
+
+def calendar_days(month, present_mask, absent_mask):
+    """One character per day of ``month``: P (present), A (absent) or - (no record)."""
+    return ''.join(
+        'P' if present_mask >> n & 1 else 'A' if absent_mask >> n & 1 else '-'
+        for n in range((next_month(month) - month).days)
+    )
+
+
+def apply_attendance_changes(changes):
+    """Fold attendance changes into the monthly summary rows and the department counters."""
+    counters.apply_attendance_changes(changes)
+
+    # present count, absent count, present mask flips, absent mask flips
+    deltas = defaultdict(lambda: [0, 0, 0, 0])
+    for employee_id, day, old_status, new_status in changes:
+        if old_status == new_status:
+            continue
+        delta = deltas[(employee_id, month_start(day))]
+        for status, sign in ((old_status, -1), (new_status, 1)):
+            if status:
+                index = 0 if status == 'PRESENT' else 1
+                delta[index] += sign
+                delta[index + 2] ^= day_bit(day)
+
+    # Sorted so that concurrent writers lock summary rows in the same order
+    rows = sorted((key, delta) for key, delta in deltas.items() if any(delta))
+    if not rows:
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {SUMMARY_TABLE} AS s (employee_id, month, present_count, absent_count,
+                                              present_mask, absent_mask)
+            SELECT * FROM unnest(%s::integer[], %s::date[], %s::integer[], %s::integer[],
+                                 %s::integer[], %s::integer[])
+            ON CONFLICT (employee_id, month) DO UPDATE SET
+                present_count = s.present_count + EXCLUDED.present_count,
+                absent_count = s.absent_count + EXCLUDED.absent_count,
+                present_mask = s.present_mask # EXCLUDED.present_mask,
+                absent_mask = s.absent_mask # EXCLUDED.absent_mask
+            """,
+            [
+                [employee_id for (employee_id, _), _ in rows],
+                [month for (_, month), _ in rows],
+                *([delta[i] for _, delta in rows] for i in range(4)),
+            ],
+        )
+
+
+def next_month(day):
+    """Return the first day of the month after the one containing ``day``."""
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def rebuild_monthly_summaries(start_month=None, end_month=None):
+    """
+    Recompute the monthly summary rows from Attendance.
+
+    Only months between ``start_month`` and ``end_month`` (inclusive, either may
+    be None for an open range) are rebuilt. Returns the number of rows written.
+    """
+    summary_where, attendance_where = ['TRUE'], ['TRUE']
+    summary_params, attendance_params = [], []
+    if start_month:
+        summary_where.append('month >= %s')
+        attendance_where.append('date >= %s')
+        summary_params.append(month_start(start_month))
+        attendance_params.append(month_start(start_month))
+    if end_month:
+        summary_where.append('month <= %s')
+        attendance_where.append('date < %s')
+        summary_params.append(month_start(end_month))
+        attendance_params.append(next_month(end_month))
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SUMMARY_TABLE} WHERE {" AND ".join(summary_where)}',
+            summary_params,
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO {SUMMARY_TABLE} (employee_id, month, present_count, absent_count,
+                                         present_mask, absent_mask)
+            SELECT employee_id, date_trunc('month', date)::date,
+                   COUNT(*) FILTER (WHERE status = 'PRESENT'),
+                   COUNT(*) FILTER (WHERE status = 'ABSENT'),
+                   COALESCE(bit_or(1 << (extract(day FROM date)::integer - 1))
+                            FILTER (WHERE status = 'PRESENT'), 0),
+                   COALESCE(bit_or(1 << (extract(day FROM date)::integer - 1))
+                            FILTER (WHERE status = 'ABSENT'), 0)
+            FROM {ATTENDANCE_TABLE}
+            WHERE {" AND ".join(attendance_where)}
+            GROUP BY 1, 2
+            """,
+            attendance_params,
+        )
+        return cursor.rowcount
@@ -0,0 +1,79 @@
+"""
+Employee search over ``Employee.search_vector``.
+
+The column is a 'simple' (no stemming, no stop words) tsvector of the full
+name, the email split at its punctuation, the employee ID and the ID's digits,
+kept by PostgreSQL as a stored generated column and indexed with GIN. A search
+text is split the same way and every word has to be the prefix of a word in
+the row, so "hea pet", "peterson" and "emp27" all find Heather Peterson
+(EMP273332).
+
+``typeahead`` ranks without sorting every match, so a one-letter query costs
+the same as a full name: each tier is read in index order and stops at the
+limit.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery
+from django.db.models import Q
+from django.db.models.functions import Collate, Upper
+
+
+# Runs of letters and digits, which is how to_tsvector splits the column
+_WORD = re.compile(r'[^\W_]+')
+
+# Words beyond this are ignored; each one is another GIN scan
+MAX_SEARCH_WORDS = 8
+
+# Upper-cased full name in byte order, served by employee_name_prefix_idx
+NAME_KEY = Collate(Upper('full_name'), 'C')
+
+
+def search_query(text):
+    """The SearchQuery for ``text``, or None when it has no letters or digits."""
+    words = _WORD.findall(text.lower())[:MAX_SEARCH_WORDS]
+    if not words:
+        return None
+    # The words contain no quotes or tsquery operators, so they can be quoted as is
+    return SearchQuery(' & '.join(f"'{word}':*" for word in words), config='simple', search_type='raw')
+
+
+def filter_employees(queryset, text):
+    """Employees of ``queryset`` matching ``text``; all of them when it has no words."""
+    query = search_query(text)
+    if query is None:
+        return queryset
+    return queryset.filter(search_vector=query)
+
+
+def typeahead(queryset, text, limit):
+    """
+    Up to ``limit`` rows of ``queryset`` (a .values() queryset including 'id')
+    matching ``text``, best first:
+
+    1. the employee whose employee ID or email is exactly ``text``
+    2. names starting with ``text``, alphabetically
+    3. other matches (a later word of the name, the email, the ID), alphabetically
+    """
+    query = search_query(text)
+    if query is None:
+        return []
+    text = ' '.join(text.split())
+    prefix = text.upper()
+    queryset = queryset.alias(name_key=NAME_KEY)
+    tiers = [
+        queryset.filter(Q(employee_id=text) | Q(email=text) | Q(email=text.lower())).order_by('id'),
+        queryset.filter(name_key__startswith=prefix).order_by('name_key', 'id'),
+        queryset.filter(search_vector=query).exclude(name_key__startswith=prefix).order_by('name_key', 'id'),
+    ]
+    results, seen = [], set()
+    for tier in tiers:
+        # Rows of an earlier tier can come back in a later one, so each tier
+        # fetches a full limit rather than only the rows still missing
+        for row in tier[:limit]:
+            if row['id'] not in seen:
+                seen.add(row['id'])
+                results.append(row)
+        if len(results) >= limit:
+            break
+    return results[:limit]
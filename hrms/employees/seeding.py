@@ -0,0 +1,69 @@
+"""
+Bulk-load the data from ``fake_data`` through the ORM.
+
+bulk_create sends no signals, so the reference caches are invalidated, the
+attendance rollup is rebuilt and the department counters are reconciled
+explicitly. The attendance partitions for the loaded months are created
+first, so the rows do not go to the default partition.
+"""
+from . import cache
+from .counters import reconcile_department_counters
+from .fake_data import DEFAULT_SEED, attendance_rows, batched, department_names, employee_rows
+from .models import Attendance, Department, Employee
+from .partitions import create_partitions
+from .rollups import rebuild_monthly_summaries
+
+
+def seed_departments(count):
+    """Create any missing departments; return all ``count`` of them, in order."""
+    names = department_names(count)
+    Department.objects.bulk_create([Department(name=name) for name in names], ignore_conflicts=True)
+    cache.departments.invalidate()
+    by_name = {department.name: department for department in Department.objects.filter(name__in=names)}
+    return [by_name[name] for name in names]
+
+
+def seed_employees(count, departments, start=1, seed=DEFAULT_SEED, batch_size=5000):
+    """Bulk-create employees, skipping ones that already exist. Returns the number created."""
+    created = 0
+    rows = employee_rows(count, [department.pk for department in departments], start, seed)
+    for batch in batched(rows, batch_size):
+        objs = [
+            Employee(employee_id=row['employee_id'], full_name=row['full_name'],
+                     email=row['email'], department_id=row['department'])
+            for row in batch
+        ]
+        # ignore_conflicts leaves pk unset, so count the rows that were new beforehand
+        existing = Employee.objects.filter(employee_id__in=[obj.employee_id for obj in objs]).count()
+        Employee.objects.bulk_create(objs, ignore_conflicts=True)
+        created += len(objs) - existing
+    cache.employees.invalidate()
+    reconcile_department_counters()
+    return created
+
+
+def seed_attendance(employee_ids, start_date, end_date, seed=DEFAULT_SEED, batch_size=5000, progress=None):
+    """
+    Bulk-create attendance for the employees with ``employee_ids``, skipping existing days.
+
+    The monthly rollup is rebuilt for the loaded months, and the department
+    counters reconciled, afterwards, since bulk_create bypasses the
+    incremental maintenance. Returns the number of rows sent (existing rows
+    are skipped by the database).
+    """
+    pks = {}
+    for chunk in batched(employee_ids, batch_size):
+        pks.update(Employee.objects.filter(employee_id__in=chunk).values_list('employee_id', 'pk'))
+    create_partitions(start_date, end_date)
+    sent = 0
+    for batch in batched(attendance_rows(pks, start_date, end_date, seed), batch_size):
+        Attendance.objects.bulk_create(
+            [Attendance(employee_id=pks[key], date=day, status=status) for key, day, status in batch],
+            ignore_conflicts=True,
+        )
+        sent += len(batch)
+        if progress:
+            progress(sent)
+    rebuild_monthly_summaries(start_date, end_date)
+    reconcile_department_counters()
+    return sent
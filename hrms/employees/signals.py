@@ -0,0 +1,54 @@
+import time
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections, transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import cache, instrumentation
+from .db.base import connections_reused
+from .models import Department, Employee
+
+
+@receiver([post_save, post_delete], sender=Department)
+def invalidate_departments(sender, **kwargs):
+    """Drop cached department reads once the write is committed."""
+    transaction.on_commit(cache.departments.invalidate)
+
+
+@receiver([post_save, post_delete], sender=Employee)
+def invalidate_employees(sender, **kwargs):
+    """Drop cached employee lookups once the write is committed."""
+    transaction.on_commit(cache.employees.invalidate)
+
+
+def simulated_latency(execute, sql, params, many, context):
+    time.sleep(settings.DB_SIMULATED_LATENCY_MS / 1000)
+    return execute(sql, params, many, context)
+
+
+@receiver(connection_created)
+def add_simulated_latency(sender, connection, **kwargs):
+    """Delay every query on new connections when DB_SIMULATED_LATENCY_MS is set."""
+    # The wrapper object outlives its connections, so add the hook only once
+    if settings.DB_SIMULATED_LATENCY_MS > 0 and simulated_latency not in connection.execute_wrappers:
+        connection.execute_wrappers.append(simulated_latency)
+
+
+@receiver(connection_created)
+def add_query_timing(sender, connection, **kwargs):
+    """Time every query into the current request's timings."""
+    # First in the list, so it wraps (and counts) any other wrapper such as the simulated latency
+    if settings.REQUEST_METRICS_ENABLED and instrumentation.time_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, instrumentation.time_queries)
+
+
+@receiver(request_started)
+def count_reused_connections(sender, **kwargs):
+    """Count connections carried over from the previous request (persistent modes)."""
+    # Runs after Django's close_old_connections, so expired connections are already closed
+    for connection in connections.all(initialized_only=True):
+        if connection.connection is not None:
+            connections_reused.inc(alias=connection.alias)
@@ -1,3 +1,1713 @@
-from django.test import TestCase
+import json
+import logging
+import os
+import runpy
+import tempfile
+import time
+import unittest
+from unittest import mock
+from datetime import date, datetime, timedelta, timezone
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, connections, transaction
+from django.test import (
+    AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone as django_timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from . import benchmarks, cache, changes, counters, fake_data, instrumentation, jobs, partitions, rollups, seeding
+from .api import idempotency
+from .api.async_views import async_read_view
+from .api.renderers import CSVRenderer, ORJSONRenderer
+from .api.views import AttendanceViewSet, DepartmentViewSet, EmployeeViewSet
+from .api.views.attendance import AttendanceBulkView
+from .api.views.export import AttendanceExportView
+from .api.views.summary import split_range
+from .db import router
+from .middleware import ReplicaRoutingMiddleware
+from .models import Department, Employee, Attendance, AttendanceMonthlySummary, Job
+
+
+def setUpModule():
+    # A request slower than SLOW_REQUEST_MS (a cold import, a loaded machine)
+    # would print its SQL; the tests of the log capture it with assertLogs
+    patcher = mock.patch.object(logging.getLogger('employees.requests'), 'handlers', [logging.NullHandler()])
+    patcher.start()
+    unittest.addModuleCleanup(patcher.stop)
+
+
+class QueryBudgetMixin:
+    """
+    Assert that an endpoint runs a fixed number of queries.
+
+    The request is made against two datasets of different sizes so that a
+    per-row (N+1) query shows up as a failure instead of a latency spike.
+    Reference caches are cleared first, so the budget is for a cold cache.
+    """
+
+    def clear_reference_caches(self):
+        for namespace in cache.NAMESPACES:
+            namespace.clear_local()
+
+    def assertQueryBudget(self, url, budget, grow, params=None, small=3, large=25):
+        params = {'page_size': 100, **(params or {})}
+        grow(small)
+        self.clear_reference_caches()
+        with self.assertNumQueries(budget):
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), small)
+
+        grow(large - small)
+        self.clear_reference_caches()
+        with self.assertNumQueries(budget):
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), large)
+
+
+class ListQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Query budgets for the list endpoints"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.department = Department.objects.create(name='Engineering')
+        self.employee = Employee.objects.create(
+            employee_id='EMP000', full_name='Budget Owner',
+            email='owner@example.com', department=self.department,
+        )
+
+    def add_employees(self, n):
+        start = Employee.objects.count()
+        for i in range(start, start + n):
+            department = Department.objects.create(name=f'Department {i}')
+            Employee.objects.create(
+                employee_id=f'EMP{i + 1:03d}', full_name=f'Employee {i}',
+                email=f'employee{i}@example.com', department=department,
+            )
+
+    def add_attendance(self, n):
+        start = self.employee.attendances.count()
+        Attendance.objects.bulk_create(
+            Attendance(employee=self.employee, date=date(2026, 1, 1) + timedelta(days=i), status='PRESENT')
+            for i in range(start, start + n)
+        )
+
+    def test_employee_list(self):
+        # COUNT(*) + page select with the department joined in
+        self.employee.delete()
+        self.assertQueryBudget(reverse('employee-list'), 2, self.add_employees)
+
+    def test_attendance_list(self):
+        # COUNT(*) + page select, both matching the employee through the join
+        url = reverse('employee-attendance-list', kwargs={'employee_id': self.employee.employee_id})
+        self.assertQueryBudget(url, 2, self.add_attendance)
+
+    def test_employee_list_cursor(self):
+        # page select only: no COUNT(*) in cursor mode
+        self.employee.delete()
+        self.assertQueryBudget(reverse('employee-list'), 1, self.add_employees, {'cursor': ''})
+
+    def test_attendance_list_cursor(self):
+        # page select only
+        url = reverse('employee-attendance-list', kwargs={'employee_id': self.employee.employee_id})
+        self.assertQueryBudget(url, 1, self.add_attendance, {'cursor': ''})
+
+    def test_attendance_board(self):
+        # ETag aggregate + page select, with every employee's attendance LEFT JOINed in
+        self.employee.delete()
+        self.assertQueryBudget(reverse('attendance-board'), 2, self.add_employees, {'date': '2026-01-01'})
+
+
+class ReferenceCacheTests(QueryBudgetMixin, TestCase):
+    """Reads served by the reference cache and their invalidation"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.clear_reference_caches()
+        self.department = Department.objects.create(name='Engineering')
+        self.employee = Employee.objects.create(
+            employee_id='EMP001', full_name='Cached Employee',
+            email='cached@example.com', department=self.department,
+        )
+
+    def test_department_list_is_cached_until_a_department_changes(self):
+        url = reverse('department-list')
+        self.client.get(url)
+        # Today's counts change without invalidating the cache: their latest
+        # change and the page's counts. The namespace version was read on the
+        # first request and is trusted for the check interval.
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.data['count'], 1)
+
+        # The invalidating worker knows the new version without reading it back
+        with self.captureOnCommitCallbacks(execute=True):
+            Department.objects.create(name='Finance')
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(response.data['count'], 2)
+
+    def test_department_list_is_cached_per_query(self):
+        url = reverse('department-list')
+        Department.objects.create(name='Finance')
+        self.assertEqual(self.client.get(url, {'page_size': 1}).status_code, 200)
+        response = self.client.get(url, {'page_size': 1, 'page': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['count'], 2)
+        self.assertNotEqual(response.data, self.client.get(url, {'page_size': 1}).data)
+
+    def test_an_invalidation_reaches_every_worker(self):
+        # Another worker's cache: a local LRU and local version of its own
+        other = cache.ReferenceCache('departments')
+        self.assertEqual(other.get_or_load('key', lambda: 'old'), 'old')
+        self.assertEqual(other.get_or_load('key', lambda: 'new'), 'old')
+        cache.departments.invalidate()
+        # The other worker still trusts the version it read until the check interval passes
+        self.assertEqual(other.get_or_load('key', lambda: 'new'), 'old')
+        with self.settings(REFERENCE_CACHE_VERSION_CHECK_SECONDS=0):
+            self.assertEqual(other.get_or_load('key', lambda: 'new'), 'new')
+
+    def test_employee_lookup_is_cached_until_the_employee_changes(self):
+        # An empty list looks the employee up, to tell "no records" from "no such employee"
+        url = reverse('employee-attendance-list', kwargs={'employee_id': self.employee.employee_id})
+        self.client.get(url)
+        # COUNT(*) only; the employee and the namespace version come from the cache
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.employee.delete()
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class WriteQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Each object a request refers to is resolved once, on a cold cache"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.clear_reference_caches()
+        self.department = Department.objects.create(name='Engineering')
+        self.employee = Employee.objects.create(
+            employee_id='EMP001', full_name='Budget Owner',
+            email='owner@example.com', department=self.department,
+        )
+
+    def test_attendance_create(self):
+        # namespace version + employee lookup + savepoint + INSERT + rollup upsert + release
+        url = reverse('employee-attendance-list', kwargs={'employee_id': self.employee.employee_id})
+        with self.assertNumQueries(6):
+            response = self.client.post(url, {'date': '2026-01-05', 'status': 'PRESENT'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['employee_name'], 'Budget Owner')
+
+        url = reverse('employee-attendance-list', kwargs={'employee_id': 'EMP404'})
+        response = self.client.post(url, {'date': '2026-01-05', 'status': 'PRESENT'}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+    def test_attendance_list_without_the_cache(self):
+        url = reverse('employee-attendance-list', kwargs={'employee_id': self.employee.employee_id})
+        Attendance.objects.create(employee=self.employee, date=date(2026, 1, 5), status='PRESENT')
+        with self.settings(REFERENCE_CACHE_ENABLED=False):
+            # COUNT(*) + page select, with no employee lookup
+            with self.assertNumQueries(2):
+                self.assertEqual(self.client.get(url).status_code, 200)
+            # COUNT(*) + one employee lookup for the empty list
+            with self.assertNumQueries(2):
+                response = self.client.get(url, {'start_date': '2026-02-01'})
+            self.assertEqual(response.data['results'], [])
+            url = reverse('employee-attendance-list', kwargs={'employee_id': 'EMP404'})
+            self.assertEqual(self.client.get(url).status_code, 404)
+            self.assertEqual(self.client.get(url, {'cursor': ''}).status_code, 404)
+
+    def test_employee_create(self):
+        # employee_id and email uniqueness checks + department + savepoint + INSERT + headcount + release
+        data = {'employee_id': 'EMP002', 'full_name': 'New Hire', 'email': 'new@example.com',
+                'department': self.department.pk}
+        with self.assertNumQueries(7):
+            response = self.client.post(reverse('employee-list'), data, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['department_name'], 'Engineering')
+
+        data.update(employee_id='EMP003', email='other@example.com', department=self.department.pk + 100)
+        response = self.client.post(reverse('employee-list'), data, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('department', response.data['errors'])
+
+
+class AttendanceBulkTests(TestCase):
+    """POST /attendance/bulk/ under each conflict_policy"""
+
+    def setUp(self):
+        self.client = APIClient()
+        department = Department.objects.create(name='Engineering')
+        self.employees = [
+            Employee.objects.create(
+                employee_id=f'EMP{number}', full_name=f'Employee {number}',
+                email=f'emp{number}@example.com', department=department,
+            )
+            for number in range(2)
+        ]
+        Attendance.objects.create(employee=self.employees[0], date=date(2026, 1, 5), status='PRESENT')
+        rollups.rebuild_monthly_summaries()
+
+    def post(self, records, policy=None):
+        data = {'records': records, **({'conflict_policy': policy} if policy else {})}
+        return self.client.post(reverse('attendance-bulk'), data, format='json')
+
+    def stored(self):
+        return set(Attendance.objects.values_list('employee__employee_id', 'date', 'status'))
+
+    def rollup(self):
+        return set(AttendanceMonthlySummary.objects.values_list(
+            'employee__employee_id', 'month', 'present_count', 'absent_count',
+        ))
+
+    def test_skip_leaves_existing_rows_and_reports_them_as_conflicts(self):
+        response = self.post([
+            {'employee_id': 'EMP0', 'date': '2026-01-05', 'status': 'ABSENT'},
+            {'employee_id': 'EMP1', 'date': '2026-01-05', 'status': 'ABSENT'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['conflict_policy'], 'skip')
+        self.assertEqual(response.data['summary'], {'created': 1, 'updated': 0, 'conflict': 1, 'error': 0})
+        self.assertEqual([result['result'] for result in response.data['results']], ['conflict', 'created'])
+        self.assertEqual(self.stored(), {
+            ('EMP0', date(2026, 1, 5), 'PRESENT'), ('EMP1', date(2026, 1, 5), 'ABSENT'),
+        })
+        self.assertEqual(self.rollup(), {('EMP0', date(2026, 1, 1), 1, 0), ('EMP1', date(2026, 1, 1), 0, 1)})
+
+    def race(self, policy):
+        """Post a batch during which another request inserts EMP1's 2026-01-06 as PRESENT."""
+        def insert_first(write):
+            def racing_write(*args, **kwargs):
+                # Another request inserts one of the rows after the batch looked for existing ones
+                Attendance.objects.create(employee=self.employees[1], date=date(2026, 1, 6), status='PRESENT')
+                rollups.apply_attendance_changes([(self.employees[1].pk, date(2026, 1, 6), None, 'PRESENT')])
+                return write(*args, **kwargs)
+            return racing_write
+
+        if policy == 'fail':
+            racing = mock.patch.object(Attendance.objects, 'bulk_create', insert_first(Attendance.objects.bulk_create))
+        else:
+            racing = mock.patch.object(AttendanceBulkView, '_insert', insert_first(AttendanceBulkView._insert))
+        with racing:
+            return self.post([
+                {'employee_id': 'EMP1', 'date': '2026-01-05', 'status': 'ABSENT'},
+                {'employee_id': 'EMP1', 'date': '2026-01-06', 'status': 'ABSENT'},
+            ], policy)
+
+    def test_skip_reports_rows_inserted_concurrently_as_conflicts(self):
+        response = self.race('skip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['result'] for result in response.data['results']], ['created', 'conflict'])
+        self.assertIn(('EMP1', date(2026, 1, 6), 'PRESENT'), self.stored())
+        self.assertIn(('EMP1', date(2026, 1, 1), 1, 1), self.rollup())
+
+    def test_overwrite_updates_rows_inserted_concurrently_from_their_status(self):
+        response = self.race('overwrite')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['result'] for result in response.data['results']], ['created', 'updated'])
+        self.assertIn(('EMP1', date(2026, 1, 6), 'ABSENT'), self.stored())
+        self.assertIn(('EMP1', date(2026, 1, 1), 0, 2), self.rollup())
+
+    def test_fail_writes_nothing_when_a_row_is_inserted_concurrently(self):
+        self.assertEqual(self.race('fail').status_code, 409)
+        # The other request's row is rolled back too, as it shares the test's transaction
+        self.assertEqual(self.stored(), {('EMP0', date(2026, 1, 5), 'PRESENT')})
+        self.assertEqual(self.rollup(), {('EMP0', date(2026, 1, 1), 1, 0)})
+
+    def test_a_rejected_batch_rolls_back_what_it_wrote(self):
+        # However a conflict comes to light, the 409 is returned with nothing written
+        def write_then_conflict(view, rows, policy):
+            Attendance.objects.create(employee=self.employees[1], date=date(2026, 1, 9), status='PRESENT')
+            return rows
+
+        with mock.patch.object(AttendanceBulkView, '_write', write_then_conflict):
+            response = self.post([{'employee_id': 'EMP1', 'date': '2026-01-05', 'status': 'ABSENT'}], 'fail')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.stored(), {('EMP0', date(2026, 1, 5), 'PRESENT')})
+
+    def test_overwrite_updates_existing_rows(self):
+        response = self.post([{'employee_id': 'EMP0', 'date': '2026-01-05', 'status': 'ABSENT'}], 'overwrite')
+        self.assertEqual(response.data['summary'], {'created': 0, 'updated': 1, 'conflict': 0, 'error': 0})
+        self.assertEqual(self.stored(), {('EMP0', date(2026, 1, 5), 'ABSENT')})
+        self.assertEqual(self.rollup(), {('EMP0', date(2026, 1, 1), 0, 1)})
+
+    def test_fail_writes_nothing_on_a_conflict(self):
+        response = self.post([
+            {'employee_id': 'EMP1', 'date': '2026-01-05', 'status': 'ABSENT'},
+            {'employee_id': 'EMP0', 'date': '2026-01-05', 'status': 'ABSENT'},
+        ], 'fail')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual([result['result'] for result in response.data['results']], ['skipped', 'conflict'])
+        self.assertEqual(self.stored(), {('EMP0', date(2026, 1, 5), 'PRESENT')})
+        self.assertEqual(self.rollup(), {('EMP0', date(2026, 1, 1), 1, 0)})
+
+    def test_fail_writes_nothing_on_an_invalid_record(self):
+        response = self.post([
+            {'employee_id': 'EMP1', 'date': '2026-01-05', 'status': 'ABSENT'},
+            {'employee_id': 'EMP1', 'date': '2026-01-06', 'status': 'LATE'},
+        ], 'fail')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([result['result'] for result in response.data['results']], ['skipped', 'error'])
+        self.assertIn('status', response.data['results'][1]['errors'])
+        self.assertEqual(self.stored(), {('EMP0', date(2026, 1, 5), 'PRESENT')})
+
+    def test_invalid_records_are_reported_per_row(self):
+        response = self.post([
+            {'employee_id': 'EMP1', 'date': '2026-01-05', 'status': 'LATE'},
+            {'employee_id': 'EMP1', 'date': 'not a date', 'status': 'PRESENT'},
+            {'employee_id': 'EMP404', 'date': '2026-01-05', 'status': 'PRESENT'},
+            {'employee_id': 'EMP1', 'date': '2026-01-06', 'status': 'PRESENT'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        self.assertEqual([result['result'] for result in results], ['error', 'error', 'error', 'created'])
+        self.assertEqual([result['index'] for result in results], [0, 1, 2, 3])
+        self.assertIn('status', results[0]['errors'])
+        self.assertIn('date', results[1]['errors'])
+        self.assertEqual(results[2]['errors'], {'employee_id': ['Employee not found.']})
+        self.assertEqual(response.data['summary'], {'created': 1, 'updated': 0, 'conflict': 0, 'error': 3})
+
+    def test_a_duplicate_in_the_batch_is_an_error(self):
+        response = self.post([
+            {'employee_id': 'EMP1', 'date': '2026-01-05', 'status': 'PRESENT'},
+            {'employee_id': 'EMP1', 'date': '2026-01-05', 'status': 'ABSENT'},
+        ])
+        results = response.data['results']
+        self.assertEqual([result['result'] for result in results], ['created', 'error'])
+        self.assertEqual(results[1]['errors'], {
+            'non_field_errors': ['Duplicate employee_id and date in this batch.'],
+        })
+        self.assertIn(('EMP1', date(2026, 1, 5), 'PRESENT'), self.stored())
+
+
+class ConditionalGetTests(TestCase):
+    """ETag / If-None-Match handling on the list and detail endpoints"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.department = Department.objects.create(name='Engineering')
+        self.employee = Employee.objects.create(
+            employee_id='EMP001', full_name='Tagged Employee',
+            email='tagged@example.com', department=self.department,
+        )
+
+    def test_unchanged_list_is_answered_with_304_from_one_aggregate(self):
+        url = reverse('employee-list')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_writes_change_the_etag(self):
+        url = reverse('employee-attendance-list', kwargs={'employee_id': self.employee.employee_id})
+        bulk = {'conflict_policy': 'overwrite', 'records': [
+            {'employee_id': self.employee.employee_id, 'date': '2026-01-05', 'status': 'PRESENT'},
+        ]}
+        self.client.post(reverse('attendance-bulk'), bulk, format='json')
+        etag = self.client.get(url)['ETag']
+
+        bulk['records'][0]['status'] = 'ABSENT'
+        self.client.post(reverse('attendance-bulk'), bulk, format='json')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        # A department rename shows up in department_name on the employee list
+        url = reverse('employee-list')
+        etag = self.client.get(url)['ETag']
+        self.department.name = 'Platform'
+        self.department.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_detail_honours_if_modified_since(self):
+        url = reverse('employee-detail', kwargs={'pk': self.employee.pk})
+        last_modified = self.client.get(url)['Last-Modified']
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+
+class IdempotencyKeyTests(QueryBudgetMixin, TestCase):
+    """Retried creates with an Idempotency-Key are answered from the idempotency cache"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.clear_reference_caches()
+        self.store = caches[settings.IDEMPOTENCY_CACHE_ALIAS]
+        self.store.clear()
+        self.addCleanup(self.store.clear)
+        self.department = Department.objects.create(name='Engineering')
+        self.employee = Employee.objects.create(
+            employee_id='EMP001', full_name='Kiosk User',
+            email='kiosk@example.com', department=self.department,
+        )
+        self.url = reverse('employee-attendance-list', kwargs={'employee_id': 'EMP001'})
+
+    def post(self, url, data, key):
+        return self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_the_first_response_without_reaching_the_view(self):
+        data = {'date': '2026-01-05', 'status': 'PRESENT'}
+        first = self.post(self.url, data, 'retry-1')
+        self.assertEqual(first.status_code, 201)
+        # The key's add() and the stored response, from the idempotency_keys table without REDIS_URL
+        with self.assertNumQueries(2):
+            retry = self.post(self.url, {'status': 'PRESENT', 'date': '2026-01-05'}, 'retry-1')
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Attendance.objects.count(), 1)
+        # Without a key the duplicate still reaches the database
+        self.assertEqual(self.client.post(self.url, data, format='json').status_code, 409)
+
+        # The same key on another endpoint is a different key
+        response = self.post(reverse('department-list'), {'name': 'Finance'}, 'retry-1')
+        self.assertEqual(response.status_code, 201)
+        bulk = {'records': [{'employee_id': 'EMP001', 'date': '2026-01-06', 'status': 'ABSENT'}]}
+        self.assertEqual(self.post(reverse('attendance-bulk'), bulk, 'retry-1').data['summary']['created'], 1)
+        self.assertEqual(self.post(reverse('attendance-bulk'), bulk, 'retry-1').data['summary']['created'], 1)
+
+    def test_reused_key_in_progress_and_unstored_errors(self):
+        self.post(self.url, {'date': '2026-01-05', 'status': 'PRESENT'}, 'key-1')
+        response = self.post(self.url, {'date': '2026-01-06', 'status': 'PRESENT'}, 'key-1')
+        self.assertEqual(response.status_code, 422)
+        self.assertIn('Idempotency-Key', response.data['errors'])
+
+        # Another worker is still running the first request with this key
+        self.store.add(idempotency.cache_key(self.url, 'key-2'), {'fingerprint': 'running'})
+        response = self.post(self.url, {'date': '2026-01-06', 'status': 'PRESENT'}, 'key-2')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Retry-After'], '1')
+
+        # A validation error releases the key, so the corrected request can use it
+        self.assertEqual(self.post(self.url, {'date': '2026-01-07', 'status': 'LATE'}, 'key-3').status_code, 400)
+        self.assertEqual(self.post(self.url, {'date': '2026-01-07', 'status': 'ABSENT'}, 'key-3').status_code, 201)
+        self.assertEqual(self.post(self.url, {'date': '2026-01-08', 'status': 'ABSENT'}, 'x' * 256).status_code, 400)
+
+    def test_the_key_is_claimed_by_one_request_across_workers(self):
+        self.assertEqual(settings.CACHES[settings.IDEMPOTENCY_CACHE_ALIAS]['BACKEND'],
+                         'employees.db.cache.UpsertDatabaseCache')
+        key = idempotency.cache_key(self.url, 'key-1')
+        self.assertTrue(self.store.add(key, {'fingerprint': 'first'}))
+        # Another worker's cache object sees the first worker's claim
+        self.assertFalse(caches.create_connection(settings.IDEMPOTENCY_CACHE_ALIAS).add(key, {'fingerprint': 'second'}))
+        self.assertEqual(self.store.get(key), {'fingerprint': 'first'})
+
+        # An expired key can be claimed again, and writes delete the other expired keys
+        self.assertTrue(self.store.add('expired', 'old', -10))
+        self.assertTrue(self.store.add('stale', 'old', -10))
+        self.assertTrue(self.store.add('expired', 'new'))
+        self.assertEqual(self.store.get('expired'), 'new')
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT cache_key FROM idempotency_keys ORDER BY cache_key')
+            self.assertEqual([row[0] for row in cursor.fetchall()], [self.store.make_key('expired'), self.store.make_key(key)])
+
+    def test_imports_are_replayed(self):
+        url = reverse('employee-import')
+        body = 'employee_id,full_name,email,department\nEMP002,New Hire,new@example.com,Engineering\n'
+
+        def post(body, key, query=''):
+            return self.client.generic('POST', url + query, body, content_type='text/csv', HTTP_IDEMPOTENCY_KEY=key)
+
+        first = post(body, 'import-1')
+        self.assertEqual(first.data['summary'], {'rows': 1, 'created': 1, 'errors': 0})
+        retry = post(body, 'import-1')
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data, first.data)
+        # The file is part of the request, and so are the query parameters
+        self.assertEqual(post(body.replace('New Hire', 'Other Hire'), 'import-1').status_code, 422)
+        self.assertEqual(post(body, 'import-1', '?dry_run=true').status_code, 422)
+
+        # A streamed CSV report is not kept; the retry runs again
+        for _ in range(2):
+            response = self.client.generic('POST', url, body, content_type='text/csv', HTTP_ACCEPT='text/csv',
+                                           HTTP_IDEMPOTENCY_KEY='import-csv')
+            self.assertTrue(response.streaming)
+            self.assertNotIn('Idempotent-Replayed', response)
+
+        # A form upload is hashed by content too, and a background import is queued once
+        content = body.replace('EMP002', 'EMP003').encode()
+        with tempfile.TemporaryDirectory() as result_dir, self.settings(JOB_RESULT_DIR=result_dir):
+            responses = [
+                self.client.post(url + '?background=true', {'file': SimpleUploadedFile('people.csv', content)},
+                                 HTTP_IDEMPOTENCY_KEY='import-2')
+                for _ in range(2)
+            ]
+        self.assertEqual([response.status_code for response in responses], [202, 202])
+        self.assertEqual(responses[1].data['id'], responses[0].data['id'])
+        self.assertEqual(Job.objects.filter(kind='employee_import').count(), 1)
+
+
+class AsyncReadViewTests(TestCase):
+    """The async read views answer exactly like the DRF views they stand in for"""
+
+    def setUp(self):
+        self.department = Department.objects.create(name='Engineering')
+        self.employees = [
+            Employee.objects.create(
+                employee_id=f'EMP{i:03d}', full_name=f'Employee {i}',
+                email=f'employee{i}@example.com', department=self.department,
+            )
+            for i in range(3)
+        ]
+        for day in range(1, 6):
+            Attendance.objects.create(employee=self.employees[0], date=date(2026, 1, day), status='PRESENT')
+
+    def assertSameResponse(self, viewset, actions, params=None, headers=None, **kwargs):
+        path = '/api/v1/test/'
+        expected = viewset.as_view(actions)(RequestFactory().get(path, params, headers=headers), **kwargs)
+        expected.render()
+        view = async_read_view(viewset, actions)
+        actual = async_to_sync(view)(AsyncRequestFactory().get(path, params, headers=headers), **kwargs)
+        self.assertEqual(actual.status_code, expected.status_code)
+        self.assertEqual(actual.content, expected.content)
+        self.assertEqual(actual.headers, expected.headers)
+        return actual
+
+    def test_employee_list_and_detail(self):
+        self.assertSameResponse(EmployeeViewSet, {'get': 'list'}, {'page_size': 1, 'page': 2})
+        self.assertSameResponse(EmployeeViewSet, {'get': 'list'}, {'page': 9})
+        self.assertSameResponse(EmployeeViewSet, {'get': 'list'}, {'search': 'employee 1'})
+        self.assertSameResponse(EmployeeViewSet, {'get': 'retrieve'}, pk=self.employees[1].pk)
+        self.assertSameResponse(EmployeeViewSet, {'get': 'retrieve'}, pk=0)
+
+    def test_conditional_and_fallback_requests(self):
+        etag = self.assertSameResponse(EmployeeViewSet, {'get': 'list'})['ETag']
+        response = self.assertSameResponse(EmployeeViewSet, {'get': 'list'}, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        # ?cursor= is not handled by the async path and goes to the sync view
+        self.assertSameResponse(EmployeeViewSet, {'get': 'list'}, {'cursor': ''})
+
+    def test_department_and_attendance_lists(self):
+        self.assertSameResponse(DepartmentViewSet, {'get': 'list'})
+        params = {'start_date': '2026-01-02', 'end_date': '2026-01-04', 'page_size': 2}
+        self.assertSameResponse(AttendanceViewSet, {'get': 'list'}, params, employee_id='EMP000')
+        self.assertSameResponse(AttendanceViewSet, {'get': 'list'}, employee_id='EMP001')
+        self.assertSameResponse(AttendanceViewSet, {'get': 'list'}, employee_id='MISSING')
+
+
+class FastListSerializationTests(TestCase):
+    """The .values() list path and the orjson renderer produce the serializers' exact bytes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        department = Department.objects.create(name='R&D \u2028 Δ')
+        self.employees = [
+            Employee.objects.create(
+                employee_id=f'EMP{i:03d}', full_name=f'Zoë \u2029 "{i}"',
+                email=f'employee{i}@example.com', department=department,
+            )
+            for i in range(3)
+        ]
+        Employee.objects.filter(pk=self.employees[0].pk).update(
+            created_at=datetime(2026, 1, 1, 9, 30, 15, 123456, tzinfo=timezone.utc),
+        )
+        for day in range(1, 6):
+            Attendance.objects.create(employee=self.employees[0], date=date(2026, 1, day), status='PRESENT')
+
+    def get(self, url, params, **flags):
+        with self.settings(**flags):
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def assertSamePages(self, url, params):
+        """Walk every page with both list paths and compare the bodies byte for byte."""
+        while True:
+            slow = self.get(url, params, FAST_LIST_SERIALIZATION=False)
+            fast = self.get(url, params, FAST_LIST_SERIALIZATION=True)
+            self.assertEqual(fast.content, slow.content)
+            url, params = json.loads(fast.content)['next'], None
+            if url is None:
+                return
+
+    def test_employee_list(self):
+        self.assertSamePages(reverse('employee-list'), {'page_size': 2})
+        self.assertSamePages(reverse('employee-list'), {'page_size': 2, 'cursor': ''})
+
+    def test_attendance_list(self):
+        url = reverse('employee-attendance-list', kwargs={'employee_id': 'EMP000'})
+        self.assertSamePages(url, {'page_size': 2, 'start_date': '2026-01-02'})
+        self.assertSamePages(url, {'page_size': 2, 'cursor': ''})
+
+    def test_orjson_renderer_matches_json_renderer(self):
+        data = {
+            'text': 'Zoë \u2028 \u2029 "quoted" </script>', 'int': 2 ** 53, 'float': 1.5, 'none': None,
+            'when': datetime(2026, 1, 1, 9, 30, 15, 123456, tzinfo=timezone.utc), 'day': date(2026, 1, 1),
+            1: [True, False, ()],
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+        indented = ORJSONRenderer().render(data, 'application/json; indent=2')
+        self.assertEqual(indented, JSONRenderer().render(data, 'application/json; indent=2'))
+
+
+class EmployeeSearchTests(TestCase):
+    """?search= on the employee list and the ranked typeahead"""
+
+    def setUp(self):
+        self.client = APIClient()
+        department = Department.objects.create(name='Engineering')
+        for employee_id, full_name, email in [
+            ('EMP100', 'Heather Peterson', 'heather.peterson@example.com'),
+            ('EMP200', 'Peter Heath', 'peter.heath@example.com'),
+            ('EMP300', 'Ann Peters', 'ann.peters@example.com'),
+            ('EMP400', 'Bob Smith', 'b.smith+hr@example.com'),
+        ]:
+            Employee.objects.create(employee_id=employee_id, full_name=full_name, email=email, department=department)
+
+    def typeahead(self, text, **params):
+        response = self.client.get(reverse('employee-search'), {'search': text, **params})
+        self.assertEqual(response.status_code, 200)
+        return [row['employee_id'] for row in response.data['results']]
+
+    def test_typeahead_ranks_exact_then_name_prefix_then_other_matches(self):
+        # "Peter Heath" starts with the text; the others match on a later word
+        self.assertEqual(self.typeahead('pete'), ['EMP200', 'EMP300', 'EMP100'])
+        self.assertEqual(self.typeahead('Heath'), ['EMP100', 'EMP200'])
+        self.assertEqual(self.typeahead('heather pet'), ['EMP100'])
+        self.assertEqual(self.typeahead('pete', limit=2), ['EMP200', 'EMP300'])
+        # Exact ID and email, the email's parts and the ID's digits
+        self.assertEqual(self.typeahead('EMP300'), ['EMP300'])
+        self.assertEqual(self.typeahead('B.Smith+HR@example.com'), ['EMP400'])
+        self.assertEqual(self.typeahead('smith hr'), ['EMP400'])
+        self.assertEqual(self.typeahead('40'), ['EMP400'])
+        self.assertEqual(self.typeahead("'&!:*"), [])
+        self.assertEqual(self.client.get(reverse('employee-search'), {'search': 'x', 'limit': 0}).status_code, 400)
+
+    def test_typeahead_stops_once_the_limit_is_filled(self):
+        # The exact match and the name-prefix tier fill the limit; no third query
+        with self.assertNumQueries(2):
+            self.assertEqual(self.typeahead('Peter', limit=1), ['EMP200'])
+
+    def test_list_search(self):
+        url = reverse('employee-list')
+        response = self.client.get(url, {'search': 'pet'})
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual([row['employee_id'] for row in response.data['results']], ['EMP100', 'EMP200', 'EMP300'])
+        response = self.client.get(url, {'search': 'heath', 'cursor': '', 'page_size': 1})
+        self.assertEqual([row['employee_id'] for row in response.data['results']], ['EMP100'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([row['employee_id'] for row in response.data['results']], ['EMP200'])
+        self.assertIsNone(response.data['next'])
+
+
+class AttendanceExportTests(TestCase):
+    """The attendance export, streamed as CSV or NDJSON"""
+
+    def setUp(self):
+        self.client = APIClient()
+        engineering = Department.objects.create(name='Engineering')
+        finance = Department.objects.create(name='Finance')
+        self.employees = [
+            Employee.objects.create(
+                employee_id=f'EMP{i}', full_name=f'Employee {i}', email=f'employee{i}@example.com',
+                department=finance if i == 1 else engineering,
+            )
+            for i in range(2)
+        ]
+        for day in range(1, 4):
+            for employee in self.employees:
+                Attendance.objects.create(employee=employee, date=date(2026, 1, day),
+                                          status='ABSENT' if day == 2 else 'PRESENT')
+
+    def export(self, **params):
+        response = self.client.get(reverse('attendance-export'), params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv(self):
+        response, content = self.export(format='csv')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="attendance.csv"')
+        lines = content.splitlines()
+        self.assertEqual(lines[0].split(','), [column for column, _ in AttendanceExportView.columns])
+        self.assertEqual(len(lines), 7)
+        # Newest day first, then by employee, with the values the JSON API returns
+        row = Attendance.objects.get(employee=self.employees[0], date=date(2026, 1, 3))
+        created_at = row.created_at.isoformat().replace('+00:00', 'Z')
+        self.assertEqual(lines[1], (
+            f'{row.pk},{self.employees[0].pk},Employee 0,employee0@example.com,EMP0,Engineering,2026-01-03,PRESENT,'
+            f'{created_at}'
+        ))
+        self.assertEqual([line.split(',')[4:8] for line in lines[1:3]], [
+            ['EMP0', 'Engineering', '2026-01-03', 'PRESENT'], ['EMP1', 'Finance', '2026-01-03', 'PRESENT'],
+        ])
+
+    def test_ndjson(self):
+        response, content = self.export(format='ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), 6)
+        row = Attendance.objects.get(employee=self.employees[1], date=date(2026, 1, 2))
+        self.assertEqual(rows[3], {
+            'id': row.pk, 'employee': self.employees[1].pk, 'employee_name': 'Employee 1',
+            'employee_email': 'employee1@example.com', 'employee_id': 'EMP1', 'department': 'Finance',
+            'date': '2026-01-02', 'status': 'ABSENT', 'created_at': row.created_at.isoformat().replace('+00:00', 'Z'),
+        })
+
+    def test_filters(self):
+        def exported(**params):
+            _, content = self.export(format='ndjson', **params)
+            return [(row['employee_id'], row['date']) for row in map(json.loads, content.splitlines())]
+
+        self.assertEqual(exported(start_date='2026-01-02', end_date='2026-01-02'), [
+            ('EMP0', '2026-01-02'), ('EMP1', '2026-01-02'),
+        ])
+        self.assertEqual(exported(employee_id='EMP1', end_date='2026-01-02'), [
+            ('EMP1', '2026-01-02'), ('EMP1', '2026-01-01'),
+        ])
+        self.assertEqual(exported(department=self.employees[0].department_id, start_date='2026-01-03'), [
+            ('EMP0', '2026-01-03'),
+        ])
+        self.assertEqual(exported(employee_id='EMP404'), [])
+
+        response = self.client.get(reverse('attendance-export'), {'format': 'csv', 'department': 'x'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('department', response.json()['errors'])
+
+    def test_asgi_requests_get_the_chunks_as_they_are_produced(self):
+        url = reverse('attendance-export')
+        expected = b''.join(self.client.get(url, {'format': 'csv'}).streaming_content)
+        with mock.patch.object(CSVRenderer, 'rows_per_chunk', 2):
+            response = AttendanceExportView.as_view()(AsyncRequestFactory().get(url, {'format': 'csv'}))
+            self.assertTrue(response.is_async)
+
+            async def read():
+                return [part async for part in response]
+
+            parts = async_to_sync(read)()
+        # The header, then the six rows two at a time
+        self.assertEqual(len(parts), 4)
+        self.assertEqual(b''.join(parts), expected)
+
+
+class AttendanceBoardTests(TestCase):
+    """Every employee's status for one date, including those not marked"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.engineering = Department.objects.create(name='Engineering')
+        sales = Department.objects.create(name='Sales')
+        self.employees = [
+            Employee.objects.create(
+                employee_id=f'EMP{i}', full_name=f'Employee {i}',
+                email=f'employee{i}@example.com', department=department,
+            )
+            for i, department in enumerate([self.engineering, self.engineering, sales, sales])
+        ]
+        Attendance.objects.create(employee=self.employees[0], date=date(2026, 1, 5), status='PRESENT')
+        Attendance.objects.create(employee=self.employees[2], date=date(2026, 1, 5), status='ABSENT')
+        # Another day's attendance must not show up
+        Attendance.objects.create(employee=self.employees[1], date=date(2026, 1, 6), status='PRESENT')
+
+    def board(self, **params):
+        response = self.client.get(reverse('attendance-board'), {'date': '2026-01-05', **params})
+        self.assertEqual(response.status_code, 200)
+        return [(row['employee_id'], row['status']) for row in response.data['results']]
+
+    def test_board_lists_every_employee_with_filters(self):
+        self.assertEqual(self.board(), [
+            ('EMP0', 'PRESENT'), ('EMP1', 'UNMARKED'), ('EMP2', 'ABSENT'), ('EMP3', 'UNMARKED'),
+        ])
+        self.assertEqual(self.board(department=self.engineering.pk), [('EMP0', 'PRESENT'), ('EMP1', 'UNMARKED')])
+        self.assertEqual(self.board(status='UNMARKED'), [('EMP1', 'UNMARKED'), ('EMP3', 'UNMARKED')])
+        self.assertEqual(self.board(status='ABSENT'), [('EMP2', 'ABSENT')])
+        self.assertEqual(self.board(date='2026-01-06', status='PRESENT'), [('EMP1', 'PRESENT')])
+        self.assertEqual(self.client.get(reverse('attendance-board'), {'status': 'LATE'}).status_code, 400)
+
+        response = self.client.get(reverse('attendance-board'), {'date': '2026-01-05', 'cursor': '', 'page_size': 3})
+        self.assertEqual(len(response.data['results']), 3)
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.data['results'], [{
+            'employee': self.employees[3].pk, 'employee_id': 'EMP3', 'full_name': 'Employee 3',
+            'department': self.employees[3].department_id, 'department_name': 'Sales',
+            'attendance_id': None, 'status': 'UNMARKED',
+        }])
+
+    def test_deleting_attendance_changes_the_etag(self):
+        url = reverse('attendance-board')
+        etag = self.client.get(url, {'date': '2026-01-05'})['ETag']
+        Attendance.objects.filter(employee=self.employees[2]).delete()
+        response = self.client.get(url, {'date': '2026-01-05'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.board(status='UNMARKED'), [('EMP1', 'UNMARKED'), ('EMP2', 'UNMARKED'), ('EMP3', 'UNMARKED')])
+
+
+class AttendanceCalendarTests(QueryBudgetMixin, TestCase):
+    """Year calendars and day set filters read from the rollup's masks"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.clear_reference_caches()
+        department = Department.objects.create(name='Engineering')
+        self.employees = [
+            Employee.objects.create(
+                employee_id=f'EMP{i}', full_name=f'Employee {i}',
+                email=f'employee{i}@example.com', department=department,
+            )
+            for i in range(2)
+        ]
+
+    def mark(self, employee, day, status):
+        url = reverse('employee-attendance-list', kwargs={'employee_id': employee.employee_id})
+        response = self.client.post(url, {'date': day, 'status': status}, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def calendar(self, **params):
+        response = self.client.get(reverse('attendance-calendar'), {'year': 2026, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def test_masks_follow_every_write_path(self):
+        first, second = self.employees
+        created = self.mark(first, '2026-01-05', 'PRESENT')
+        self.mark(first, '2026-01-06', 'ABSENT')
+        self.mark(first, '2026-01-31', 'PRESENT')
+        self.client.post(reverse('attendance-bulk'), {'conflict_policy': 'overwrite', 'records': [
+            {'employee_id': 'EMP0', 'date': '2026-01-06', 'status': 'PRESENT'},
+            {'employee_id': 'EMP1', 'date': '2026-02-02', 'status': 'ABSENT'},
+        ]}, format='json')
+        url = reverse('employee-attendance-detail', args=[first.employee_id, created])
+        self.assertEqual(self.client.delete(url).status_code, 204)
+
+        with self.assertNumQueries(3):
+            # COUNT(*) + page select + the year's rollup rows of the page
+            results = self.calendar()
+        january, february = results[0]['months'][0], results[1]['months'][1]
+        self.assertEqual(january, {
+            'month': '2026-01', 'present_count': 2, 'absent_count': 0, 'days': '-----P' + '-' * 24 + 'P',
+        })
+        self.assertEqual(february['days'], '-A' + '-' * 26)
+        self.assertEqual(len(results[0]['months']), 12)
+        self.assertEqual(results[0]['months'][11]['days'], '-' * 31)
+
+        # The incremental masks match a rebuild from the attendance table
+        def masks():
+            return set(AttendanceMonthlySummary.objects.values_list('employee', 'month', 'present_mask', 'absent_mask'))
+
+        maintained = masks()
+        rollups.rebuild_monthly_summaries()
+        self.assertEqual(masks(), maintained)
+
+    def test_present_on_and_absent_on_match_every_date(self):
+        first, second = self.employees
+        for employee, day, status in [
+            (first, '2026-01-05', 'ABSENT'), (first, '2026-02-03', 'ABSENT'), (first, '2026-02-04', 'PRESENT'),
+            (second, '2026-01-05', 'ABSENT'), (second, '2026-02-04', 'PRESENT'),
+        ]:
+            self.mark(employee, day, status)
+
+        def matches(**params):
+            return [row['employee_id'] for row in self.calendar(**params)]
+
+        self.assertEqual(matches(absent_on='2026-01-05'), ['EMP0', 'EMP1'])
+        self.assertEqual(matches(absent_on=['2026-01-05', '2026-02-03']), ['EMP0'])
+        self.assertEqual(matches(absent_on='2026-01-05', present_on='2026-02-04'), ['EMP0', 'EMP1'])
+        self.assertEqual(matches(absent_on=['2026-01-05', '2026-03-02']), [])
+        self.assertEqual(matches(present_on='2026-01-05'), [])
+        self.assertEqual(matches(employee_id=['EMP1']), ['EMP1'])
+        response = self.client.get(reverse('attendance-calendar'), {'absent_on': '2026-02-30'})
+        self.assertEqual(response.status_code, 400)
+
+
+class AttendanceSummaryTests(TestCase):
+    """Range summaries read from the monthly rollup, and the writes that maintain it"""
+
+    def setUp(self):
+        self.client = APIClient()
+        engineering = Department.objects.create(name='Engineering')
+        finance = Department.objects.create(name='Finance')
+        self.employees = [
+            Employee.objects.create(
+                employee_id=f'EMP{i}', full_name=f'Employee {i}', email=f'employee{i}@example.com',
+                department=finance if i == 2 else engineering,
+            )
+            for i in range(3)
+        ]
+
+    def mark(self, *records):
+        response = self.client.post(reverse('attendance-bulk'), {'conflict_policy': 'overwrite', 'records': [
+            {'employee_id': employee_id, 'date': day, 'status': status} for employee_id, day, status in records
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def summary(self, start_date, end_date, group_by='employee', queries=2):
+        with self.assertNumQueries(queries):
+            response = self.client.get(reverse('attendance-summary'), {
+                'start_date': start_date, 'end_date': end_date, 'group_by': group_by,
+            })
+        self.assertEqual(response.status_code, 200)
+        key = 'employee_id' if group_by == 'employee' else 'department_name'
+        return {row[key]: (row['present_count'], row['absent_count']) for row in response.data['results']}
+
+    def assertRollupMatchesRebuild(self):
+        def rows():
+            # Months emptied by a write keep a row of zeros; a rebuild drops them
+            return set(AttendanceMonthlySummary.objects.exclude(present_count=0, absent_count=0).values_list(
+                'employee', 'month', 'present_count', 'absent_count', 'present_mask', 'absent_mask',
+            ))
+
+        maintained = rows()
+        rollups.rebuild_monthly_summaries()
+        self.assertEqual(rows(), maintained)
+
+    def test_split_range(self):
+        self.assertEqual(split_range(date(2026, 1, 1), date(2026, 2, 28)), (date(2026, 1, 1), date(2026, 2, 1), {}))
+        self.assertEqual(split_range(date(2026, 1, 31), date(2026, 3, 1)), (
+            date(2026, 1, 1), date(2026, 3, 1), {date(2026, 1, 1): 1 << 30, date(2026, 3, 1): 1},
+        ))
+        # One month, partial at both ends; February ends on the 29th in a leap year
+        self.assertEqual(split_range(date(2024, 2, 10), date(2024, 2, 28))[2], {date(2024, 2, 1): (1 << 28) - (1 << 9)})
+        self.assertEqual(split_range(date(2024, 2, 1), date(2024, 2, 29))[2], {})
+        self.assertEqual(split_range(date(2025, 12, 31), date(2026, 1, 1)), (
+            date(2025, 12, 1), date(2026, 1, 1), {date(2025, 12, 1): 1 << 30, date(2026, 1, 1): 1},
+        ))
+
+    def test_partial_months_and_status_flips(self):
+        self.mark(
+            ('EMP0', '2026-01-30', 'PRESENT'), ('EMP0', '2026-01-31', 'ABSENT'), ('EMP0', '2026-02-01', 'PRESENT'),
+            ('EMP0', '2026-02-15', 'PRESENT'), ('EMP0', '2026-02-28', 'ABSENT'), ('EMP0', '2026-03-01', 'PRESENT'),
+            ('EMP1', '2026-01-31', 'PRESENT'), ('EMP1', '2026-02-10', 'ABSENT'),
+            ('EMP2', '2026-02-28', 'PRESENT'), ('EMP2', '2026-03-01', 'ABSENT'),
+        )
+        # The last day of one month to the first of the next, around a whole month
+        self.assertEqual(self.summary('2026-01-31', '2026-03-01'), {'EMP0': (3, 2), 'EMP1': (1, 1), 'EMP2': (1, 1)})
+        # A page of departments gets its counts from one grouped query
+        self.assertEqual(self.summary('2026-01-31', '2026-03-01', 'department', queries=3), {
+            'Engineering': (4, 3), 'Finance': (1, 1),
+        })
+        self.assertEqual(self.summary('2026-02-01', '2026-02-28'), {'EMP0': (2, 1), 'EMP1': (0, 1), 'EMP2': (1, 0)})
+        self.assertEqual(self.summary('2026-02-02', '2026-02-27'), {'EMP0': (1, 0), 'EMP1': (0, 1), 'EMP2': (0, 0)})
+        self.assertEqual(self.summary('2026-03-02', '2026-04-30', 'department', queries=3), {
+            'Engineering': (0, 0), 'Finance': (0, 0),
+        })
+
+        self.mark(('EMP0', '2026-02-15', 'ABSENT'), ('EMP2', '2026-03-01', 'PRESENT'))
+        created = Attendance.objects.get(employee=self.employees[0], date=date(2026, 1, 30)).pk
+        url = reverse('employee-attendance-detail', args=['EMP0', created])
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.summary('2026-02-02', '2026-02-27'), {'EMP0': (0, 1), 'EMP1': (0, 1), 'EMP2': (0, 0)})
+        self.assertEqual(self.summary('2026-01-01', '2026-03-01', 'department', queries=3), {
+            'Engineering': (3, 4), 'Finance': (2, 0),
+        })
+        self.assertRollupMatchesRebuild()
+
+    def test_admin_writes_update_the_rollup_and_counters(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'secret'))
+        today = django_timezone.localdate()
+        employee = self.employees[0]
+
+        def counts():
+            return Department.objects.values_list('name', 'present_today', 'absent_today').order_by('name')[0]
+
+        response = self.client.post(reverse('admin:employees_attendance_add'), {
+            'employee': employee.pk, 'date': today.isoformat(), 'status': 'PRESENT',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(counts(), ('Engineering', 1, 0))
+        attendance = Attendance.objects.get(employee=employee)
+
+        url = reverse('admin:employees_attendance_change', args=[attendance.pk])
+        self.client.post(url, {'employee': employee.pk, 'date': today.isoformat(), 'status': 'ABSENT'})
+        self.assertEqual(counts(), ('Engineering', 0, 1))
+        self.assertRollupMatchesRebuild()
+        # Moved to another day, so no longer counted today
+        self.client.post(url, {'employee': employee.pk, 'date': '2026-01-05', 'status': 'ABSENT'})
+        self.assertEqual(counts(), ('Engineering', 0, 0))
+        self.assertRollupMatchesRebuild()
+
+        self.mark(('EMP1', today.isoformat(), 'PRESENT'))
+        response = self.client.post(reverse('admin:employees_attendance_changelist'), {
+            'action': 'delete_selected', '_selected_action': list(Attendance.objects.values_list('pk', flat=True)),
+            'post': 'yes',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Attendance.objects.exists())
+        self.assertEqual(counts(), ('Engineering', 0, 0))
+        self.assertEqual(set(AttendanceMonthlySummary.objects.values_list('present_count', 'absent_count')), {(0, 0)})
+        self.assertRollupMatchesRebuild()
+
+
+class DepartmentCounterTests(TestCase):
+    """Headcounts and today's attendance counts maintained on the department rows"""
+
+    def setUp(self):
+        self.client = APIClient()
+        for namespace in cache.NAMESPACES:
+            namespace.clear_local()
+        self.today = django_timezone.localdate()
+        self.department = Department.objects.create(name='Engineering')
+        self.other = Department.objects.create(name='Finance')
+
+    def hire(self, n, department=None):
+        data = {'employee_id': f'EMP{n}', 'full_name': f'Employee {n}', 'email': f'employee{n}@example.com',
+                'department': (department or self.department).pk}
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('employee-list'), data, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def mark(self, n, day, status):
+        url = reverse('employee-attendance-list', kwargs={'employee_id': f'EMP{n}'})
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {'date': day, 'status': status}, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def counts(self):
+        for namespace in cache.NAMESPACES:
+            namespace.clear_local()
+        # Namespace version + COUNT(*) + latest count change + page select: the
+        # counters are columns of the department rows
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('department-list'))
+        return {
+            row['name']: (row['employee_count'], row['present_today'], row['absent_today'])
+            for row in response.data['results']
+        }
+
+    def test_counters_follow_every_write_path(self):
+        first = self.hire(1)
+        self.hire(2)
+        self.hire(3, self.other)
+        today = self.today.isoformat()
+        self.mark(1, today, 'PRESENT')
+        self.mark(1, '2026-01-05', 'ABSENT')
+        created = self.mark(2, today, 'PRESENT')
+        self.assertEqual(self.counts(), {'Engineering': (2, 2, 0), 'Finance': (1, 0, 0)})
+
+        etag = self.client.get(reverse('department-list'))['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('attendance-bulk'), {'conflict_policy': 'overwrite', 'records': [
+                {'employee_id': 'EMP1', 'date': today, 'status': 'ABSENT'},
+                {'employee_id': 'EMP3', 'date': today, 'status': 'PRESENT'},
+            ]}, format='json')
+            url = reverse('employee-attendance-detail', args=['EMP2', created])
+            self.assertEqual(self.client.delete(url).status_code, 204)
+        response = self.client.get(reverse('department-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.counts(), {'Engineering': (2, 0, 1), 'Finance': (1, 1, 0)})
+
+        csv_body = 'employee_id,full_name,email,department\nEMP4,Imported,imported@example.com,Finance\n'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('employee-import'), csv_body, content_type='text/csv')
+            self.assertEqual(self.client.delete(reverse('employee-detail', args=[first])).status_code, 204)
+        self.assertEqual(self.counts(), {'Engineering': (1, 0, 0), 'Finance': (2, 1, 0)})
+        self.assertEqual(counters.reconcile_department_counters(), [])
+
+        # A department with employees is refused without looking them up; so
+        # is one whose headcount has drifted, by the PROTECT foreign key
+        url = reverse('department-detail', args=[self.department.pk])
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.delete(url).status_code, 409)
+        Department.objects.filter(pk=self.department.pk).update(employee_count=0)
+        self.assertEqual(self.client.delete(url).status_code, 409)
+
+    def test_attendance_reaches_the_cached_list_without_invalidating_it(self):
+        self.hire(1)
+        url = reverse('department-list')
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.mark(1, self.today.isoformat(), 'PRESENT')
+        self.assertNotIn(cache.departments.invalidate, callbacks)
+        # Latest count change + today's counts of the page; the rows come from the cache
+        with self.assertNumQueries(2):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        present = {row['name']: row['present_today'] for row in response.data['results']}
+        self.assertEqual(present, {'Engineering': 1, 'Finance': 0})
+
+    def test_new_day_recounts_and_reconcile_corrects_drift(self):
+        self.hire(1)
+        self.hire(2)
+        # Written without reporting the change (e.g. raw SQL): not counted yet
+        Attendance.objects.create(employee_id=Employee.objects.get(employee_id='EMP1').pk,
+                                  date=self.today, status='ABSENT')
+        yesterday = self.today - timedelta(days=1)
+        Department.objects.filter(pk=self.department.pk).update(
+            attendance_date=yesterday, present_today=5, absent_today=0,
+        )
+        self.assertEqual(self.counts()['Engineering'], (2, 0, 0))
+
+        # The first change of the day counts today's rows instead of adding to yesterday's
+        self.mark(2, self.today.isoformat(), 'PRESENT')
+        self.assertEqual(self.counts()['Engineering'], (2, 1, 1))
+
+        Department.objects.filter(pk=self.department.pk).update(employee_count=7, absent_today=3)
+        drift = [('Engineering', (7, 1, 3), (2, 1, 1))]
+        self.assertEqual(counters.reconcile_department_counters(dry_run=True), drift)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(counters.reconcile_department_counters(), drift)
+        self.assertEqual(self.counts()['Engineering'], (2, 1, 1))
+
+
+class ChangeFeedTests(TransactionTestCase):
+    """
+    The change feed, against committed transactions: a change is not
+    returned while the transaction that made it is still running.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        for namespace in cache.NAMESPACES:
+            namespace.clear_local()
+        # The flush between tests does not reach the trigger-maintained tables
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM change_log')
+            cursor.execute("UPDATE change_log_horizon SET txid = '0', seq = 0")
+        self.department = Department.objects.create(name='Engineering')
+        self.employee = Employee.objects.create(employee_id='EMP1', full_name='Employee 1',
+                                                email='employee1@example.com', department=self.department)
+
+    def feed(self, position, **params):
+        response = self.client.get(reverse('change-feed'), {'updated_since': position, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_feed_returns_upserts_and_tombstones_in_change_order(self):
+        start = self.client.get(reverse('change-feed')).data
+        self.assertEqual(start['results'], [])
+        self.assertEqual(self.feed(start['next'])['results'], [])
+
+        attendance = Attendance.objects.create(employee=self.employee, date=date(2026, 1, 5), status='PRESENT')
+        self.employee.full_name = 'Renamed'
+        self.employee.save()
+        # Changes made in a running transaction are held back
+        with transaction.atomic():
+            Department.objects.create(name='Finance')
+            rows = changes.read_changes(changes.parse_position(start['next']))[0]
+            self.assertEqual([object_type for object_type, _, _ in rows], ['attendance', 'employee'])
+
+        # Upserts of three types: one query each, after the position and the log
+        with self.assertNumQueries(5):
+            page = self.feed(start['next'])
+        self.assertFalse(page['has_more'])
+        self.assertEqual(
+            [(row['type'], row['deleted']) for row in page['results']],
+            [('attendance', False), ('employee', False), ('department', False)],
+        )
+        self.assertEqual(page['results'][0]['data']['status'], 'PRESENT')
+        self.assertEqual(page['results'][1]['data']['full_name'], 'Renamed')
+        self.assertEqual(page['results'][2]['data']['name'], 'Finance')
+        self.assertEqual(self.feed(page['next'])['results'], [])
+
+        # One page at a time, and only the types asked for
+        first = self.feed(start['next'], limit=1)
+        self.assertTrue(first['has_more'])
+        self.assertEqual([row['type'] for row in self.feed(first['next'], limit=1)['results']], ['employee'])
+        only = self.feed(start['next'], type=['department', 'attendance'])
+        self.assertEqual([row['type'] for row in only['results']], ['attendance', 'department'])
+
+        employee_pk = self.employee.pk
+        self.employee.delete()
+        deleted = self.feed(page['next'])['results']
+        self.assertEqual(
+            sorted((row['type'], row['id'], row['deleted'], row['data']) for row in deleted),
+            [('attendance', attendance.pk, True, None), ('employee', employee_pk, True, None)],
+        )
+
+    def test_pruned_positions_are_gone(self):
+        start = self.client.get(reverse('change-feed')).data['next']
+        Department.objects.create(name='Finance').delete()
+        Department.objects.create(name='Sales')
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE change_log SET changed_at = now() - interval '60 days'")
+        self.assertEqual(changes.prune_changes(django_timezone.now() - timedelta(days=30)), 1)
+
+        response = self.client.get(reverse('change-feed'), {'updated_since': start})
+        self.assertEqual(response.status_code, 410)
+        # The live objects' changes are kept, however old
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM change_log')
+            self.assertEqual(cursor.fetchone()[0], 3)
+        response = self.client.get(reverse('change-feed'), {'updated_since': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+
+class EmployeeImportTests(TestCase):
+    """CSV and NDJSON imports validated in chunks, with a report of the rows left out"""
+
+    def setUp(self):
+        self.client = APIClient()
+        for namespace in cache.NAMESPACES:
+            namespace.clear_local()
+        self.department = Department.objects.create(name='Engineering')
+        Employee.objects.create(
+            employee_id='EMP001', full_name='Already Here', email='here@example.com', department=self.department,
+        )
+
+    def post(self, body, content_type, accept='application/json', **params):
+        url = reverse('employee-import')
+        if params:
+            url += '?' + '&'.join(f'{name}={value}' for name, value in params.items())
+        return self.client.generic('POST', url, body, content_type=content_type, HTTP_ACCEPT=accept)
+
+    @staticmethod
+    def csv(*rows):
+        return '\n'.join(['employee_id,full_name,email,department', *rows]) + '\n'
+
+    def test_csv_body_is_imported_in_chunks_with_a_report(self):
+        body = self.csv(
+            'EMP002,New Hire,NEW@example.com,Engineering',
+            'EMP001,Someone Else,else@example.com,Engineering',
+            'EMP003,Twin,new@example.com,Engineering',
+            'EMP004,Lost,lost@example.com,Nowhere',
+            'EMP005,Bad Email,not-an-email,Engineering',
+            'EMP006,,short@example.com',
+            'EMP007,Last One,last@example.com,Engineering',
+        )
+        with self.settings(EMPLOYEE_IMPORT_CHUNK_SIZE=3):
+            response = self.post(body, 'text/csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['summary'], {'rows': 7, 'created': 2, 'errors': 5})
+        errors = {error['line']: error['errors'] for error in response.data['errors']}
+        self.assertEqual(errors[3], {'employee_id': ['An employee with this employee ID already exists.']})
+        self.assertEqual(errors[4], {'email': ['Duplicate email in this file.']})
+        self.assertEqual(errors[5], {'department': ['Department not found.']})
+        self.assertEqual(set(errors[6]), {'email'})
+        self.assertEqual(set(errors[7]), {'full_name', 'department'})
+        new_hire = Employee.objects.select_related('department').get(employee_id='EMP002')
+        self.assertEqual((new_hire.email, new_hire.department.name), ('new@example.com', 'Engineering'))
+        self.assertTrue(Employee.objects.filter(employee_id='EMP007').exists())
+
+        # The CSV report keeps the import's columns, so it can be fixed and imported again
+        response = self.post(body, 'text/csv', accept='text/csv')
+        report = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(report[0], 'line,employee_id,full_name,email,department,errors')
+        self.assertEqual(report[1], '2,EMP002,New Hire,NEW@example.com,Engineering,'
+                                    'employee_id: An employee with this employee ID already exists.; '
+                                    'email: An employee with this email already exists.')
+        fixed = report[0] + '\n' + report[4].replace('Nowhere', 'Engineering') + '\n'
+        self.assertEqual(self.post(fixed, 'text/csv').data['summary'], {'rows': 1, 'created': 1, 'errors': 0})
+
+    def test_ndjson_upload_dry_run_and_unreadable_files(self):
+        lines = [
+            json.dumps({'employee_id': 'EMP010', 'full_name': 'Json Row', 'email': 'json@example.com',
+                        'department': 'Engineering'}),
+            '',
+            '{not json',
+        ]
+        upload = SimpleUploadedFile('people.ndjson', '\n'.join(lines).encode())
+        response = self.client.post(reverse('employee-import') + '?dry_run=true', {'file': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['summary'], {'rows': 2, 'created': 1, 'errors': 1})
+        self.assertEqual(response.data['errors'][0]['line'], 3)
+        self.assertFalse(Employee.objects.filter(employee_id='EMP010').exists())
+
+        response = self.post('employee_id,email\nEMP011,a@example.com\n', 'text/csv')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('full_name, department', response.data['message'])
+        response = self.post(self.csv('EMP012,Caf\xe9,cafe@example.com,Engineering').encode('latin-1'), 'text/csv')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.post('', 'text/csv').status_code, 400)
+
+
+class AttendancePartitionTests(TestCase):
+    """Monthly attendance partitions: creating, pruning and detaching"""
+
+    def setUp(self):
+        department = Department.objects.create(name='Engineering')
+        self.employee = Employee.objects.create(
+            employee_id='EMP1', full_name='Employee 1', email='employee1@example.com', department=department,
+        )
+        # No partition covers 1999, so the row starts out in the default partition
+        self.attendance = Attendance.objects.create(employee=self.employee, date=date(1999, 5, 10), status='PRESENT')
+
+    def rows_in(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+            return cursor.fetchone()[0]
+
+    def test_new_month_takes_its_rows_from_the_default_partition(self):
+        self.assertEqual(self.rows_in(partitions.DEFAULT_PARTITION), 1)
+        self.assertEqual(partitions.create_partitions(date(1999, 4, 1), date(1999, 5, 31)), {
+            'employees_attendance_1999_04': 0, 'employees_attendance_1999_05': 1,
+        })
+        self.assertIsNone(partitions.create_partition(date(1999, 5, 1)))
+        self.assertEqual(self.rows_in(partitions.DEFAULT_PARTITION), 0)
+        self.assertEqual(self.rows_in('employees_attendance_1999_05'), 1)
+
+        # Reads and writes go through the parent as before
+        Attendance.objects.create(employee=self.employee, date=date(1999, 5, 11), status='ABSENT')
+        self.assertEqual(self.rows_in('employees_attendance_1999_05'), 2)
+        self.attendance.status = 'ABSENT'
+        self.attendance.save()
+        self.assertEqual(Attendance.objects.get(pk=self.attendance.pk).status, 'ABSENT')
+
+        plan = Attendance.objects.filter(date__gte=date(1999, 5, 1), date__lte=date(1999, 5, 31)).explain()
+        self.assertIn('employees_attendance_1999_05', plan)
+        self.assertNotIn('employees_attendance_1999_04', plan)
+        self.assertNotIn(partitions.DEFAULT_PARTITION, plan)
+
+    def test_detached_month_is_archived_without_blocking_employee_deletes(self):
+        partitions.create_partition(date(1999, 5, 1))
+        self.assertEqual(partitions.detach_partitions(date(1999, 6, 1)), ['employees_attendance_1999_05_detached'])
+        self.assertFalse(Attendance.objects.exists())
+        self.assertEqual(self.rows_in('employees_attendance_1999_05_detached'), 1)
+        self.assertNotIn('employees_attendance_1999_05', [partition.name for partition in partitions.partitions()])
+
+        self.employee.delete()
+        self.assertEqual(self.rows_in('employees_attendance_1999_05_detached'), 1)
+
+    def test_a_detached_month_can_be_created_again(self):
+        partitions.create_partition(date(1999, 5, 1))
+        partitions.detach_partitions(date(1999, 6, 1))
+        # A late row lands in the default partition until its month is created again
+        Attendance.objects.create(employee=self.employee, date=date(1999, 5, 20), status='ABSENT')
+        self.assertEqual(partitions.create_partition(date(1999, 5, 1)), 1)
+        self.assertEqual(self.rows_in('employees_attendance_1999_05'), 1)
+        self.assertEqual(self.rows_in(partitions.DEFAULT_PARTITION), 0)
+        self.assertEqual(self.rows_in('employees_attendance_1999_05_detached'), 1)
+
+    def test_a_month_detached_under_its_own_name_is_renamed_when_created_again(self):
+        partitions.create_partition(date(1999, 5, 1))
+        with connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE {partitions.PARENT} DETACH PARTITION employees_attendance_1999_05')
+        self.assertEqual(partitions.create_partition(date(1999, 5, 1)), 0)
+        self.assertIn('employees_attendance_1999_05', [partition.name for partition in partitions.partitions()])
+        self.assertEqual(self.rows_in('employees_attendance_1999_05_detached'), 1)
+
+
+class ConnectionModeSettingsTests(SimpleTestCase):
+    """The database settings each DB_CONNECTION_MODE produces"""
+
+    def database(self, **environ):
+        env = {name: value for name, value in os.environ.items() if not name.startswith('DB_')}
+        with mock.patch.dict(os.environ, {**env, **environ}, clear=True):
+            return runpy.run_path(str(settings.BASE_DIR / 'hrms' / 'settings.py'))['DATABASES']['default']
+
+    def test_direct(self):
+        for database in (self.database(), self.database(DB_CONNECTION_MODE='direct')):
+            self.assertNotIn('CONN_MAX_AGE', database)
+            self.assertNotIn('OPTIONS', database)
+            self.assertNotIn('DISABLE_SERVER_SIDE_CURSORS', database)
+
+    def test_env_example_uses_the_default_mode(self):
+        with open(settings.BASE_DIR / '.env.example', encoding='utf-8-sig') as file:
+            lines = [line.strip() for line in file if line.startswith('DB_CONNECTION_MODE=')]
+        self.assertEqual(lines, ['DB_CONNECTION_MODE=direct'])
+
+    def test_persistent(self):
+        database = self.database(DB_CONNECTION_MODE='persistent')
+        self.assertEqual(database['CONN_MAX_AGE'], 60)
+        self.assertTrue(database['CONN_HEALTH_CHECKS'])
+        self.assertNotIn('DISABLE_SERVER_SIDE_CURSORS', database)
+        self.assertEqual(self.database(DB_CONNECTION_MODE='persistent', DB_CONN_MAX_AGE='5')['CONN_MAX_AGE'], 5)
+
+    def test_pool(self):
+        database = self.database(DB_CONNECTION_MODE='pool', DB_POOL_MAX_SIZE='4', DB_POOL_TIMEOUT='2.5')
+        self.assertEqual(database['OPTIONS'], {'pool': {'min_size': 2, 'max_size': 4, 'timeout': 2.5}})
+        self.assertNotIn('CONN_MAX_AGE', database)
+
+    def test_pgbouncer(self):
+        database = self.database(DB_CONNECTION_MODE='pgbouncer')
+        self.assertEqual(database['CONN_MAX_AGE'], 60)
+        self.assertTrue(database['DISABLE_SERVER_SIDE_CURSORS'])
+
+    def test_unknown_mode(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, "not 'pooled'"):
+            self.database(DB_CONNECTION_MODE='pooled')
+
+
+@override_settings(DB_REPLICAS=['replica1'], DB_REPLICA_CHECK_SECONDS=60)
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    API reads routed to replicas, which are second connections to the test
+    database here; the one behind replica2 has nothing listening. They are
+    added once the test database exists, since the runner would otherwise
+    try to create databases for them.
+    """
+    replicas = ('replica1', 'replica2')
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        default = connections['default'].settings_dict
+        connections.settings['replica1'] = {**default, 'TEST': {**default['TEST'], 'MIRROR': 'default'}}
+        connections.settings['replica2'] = {**connections.settings['replica1'], 'PORT': '1'}
+        cls.databases = {'default', *cls.replicas}
+
+    @classmethod
+    def tearDownClass(cls):
+        for alias in cls.replicas:
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+        cls.databases = {'default'}
+        super().tearDownClass()
+
+    def setUp(self):
+        router.replica_health.clear()
+        self.client = APIClient()
+        self.department = Department.objects.create(name='Engineering')
+        Employee.objects.create(employee_id='EMP1', full_name='Employee 1', email='employee1@example.com',
+                                department=self.department)
+
+    def read(self):
+        """Queries made by an employee list request on (default, replica1)."""
+        with CaptureQueriesContext(connections['default']) as default, \
+                CaptureQueriesContext(connections['replica1']) as replica:
+            response = self.client.get(reverse('employee-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+        return len(default), len(replica)
+
+    def test_reads_go_to_the_replica_except_just_after_a_write(self):
+        # The lag check, then COUNT(*) and the page
+        self.assertEqual(self.read(), (0, 3))
+        self.assertEqual(self.read(), (0, 2))
+
+        response = self.client.post(reverse('department-list'), {'name': 'Finance'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertIn(ReplicaRoutingMiddleware.PIN_COOKIE, response.cookies)
+        self.assertEqual(self.read(), (2, 0))
+
+        self.client.cookies[ReplicaRoutingMiddleware.PIN_COOKIE] = str(time.time() - 1)
+        self.assertEqual(self.read(), (0, 2))
+
+    def test_lagging_or_unreachable_replicas_fall_back_to_the_default_database(self):
+        router.replica_health['replica1'] = (time.monotonic(), 30.0)
+        self.assertEqual(self.read(), (2, 0))
+
+        with self.settings(DB_REPLICAS=['replica2']):
+            self.client = APIClient()
+            self.assertEqual(self.read(), (2, 0))
+            self.assertFalse(router.replica_status()['replica2']['available'])
+
+            # Failing after its last check: the request is answered again from the default database
+            router.replica_health['replica2'] = (time.monotonic(), 0.0)
+            self.assertEqual(self.read(), (2, 0))
+            self.assertIsNone(router.replica_health['replica2'][1])
+
+    def test_change_feed_is_always_read_from_the_default_database(self):
+        with CaptureQueriesContext(connections['default']) as default, \
+                CaptureQueriesContext(connections['replica1']) as replica:
+            head = self.client.get(reverse('change-feed'))
+            response = self.client.get(reverse('change-feed'), {'updated_since': head.data['next']})
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(len(default), 0)
+        self.assertEqual(len(replica), 0)
+        # Other reads of the same client still go to the replica
+        self.assertEqual(self.read(), (0, 3))
+
+
+class BackgroundJobTests(TestCase):
+    """Jobs queued by the API, run by a worker and polled or downloaded by the client"""
+
+    def setUp(self):
+        self.client = APIClient()
+        result_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(result_dir.cleanup)
+        self.enterContext(override_settings(JOB_RESULT_DIR=result_dir.name))
+        department = Department.objects.create(name='Engineering')
+        self.employee = Employee.objects.create(
+            employee_id='EMP001', full_name='Ada Lovelace', email='ada@example.com', department=department,
+        )
+        for day in range(1, 4):
+            Attendance.objects.create(employee=self.employee, date=date(2024, 5, day), status='PRESENT')
+
+    @staticmethod
+    def work():
+        """Run the due jobs in this thread, as a worker's threads do"""
+        while (job := jobs.claim('test-worker')) is not None:
+            jobs.run(job)
+
+    def test_export_job_is_polled_then_downloaded(self):
+        response = self.client.post(
+            reverse('job-list'), {'kind': 'attendance_export', 'params': {'start_date': '2024-05-02'}}, format='json',
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], Job.QUEUED)
+        self.assertEqual(response.data['params'], {'format': 'csv', 'start_date': '2024-05-02'})
+        url = response['Location']
+        self.assertEqual(self.client.get(reverse('job-download', args=[response.data['id']])).status_code, 409)
+
+        self.work()
+        job = self.client.get(url).data
+        self.assertEqual(
+            (job['status'], job['progress'], job['total'], job['result']), (Job.SUCCEEDED, 2, 2, {'rows': 2}),
+        )
+        download = self.client.get(job['download_url'])
+        self.assertEqual(download['Content-Disposition'], 'attachment; filename="attendance.csv"')
+        export = self.client.get(reverse('attendance-export'), {'start_date': '2024-05-02'}, HTTP_ACCEPT='text/csv')
+        content = b''.join(export.streaming_content)
+        self.assertEqual(b''.join(download.streaming_content), content)
+
+        # Under ASGI the file is sent as it is read
+        async def download_over_asgi():
+            response = await self.async_client.get(job['download_url'])
+            return response, b''.join([part async for part in response.streaming_content])
+
+        download, body = async_to_sync(download_over_asgi)()
+        self.assertTrue(download.is_async)
+        self.assertEqual((download['Content-Length'], body), (str(len(content)), content))
+
+        response = self.client.post(
+            reverse('job-list'),
+            {'kind': 'rebuild_rollups', 'params': {'start_month': '2024-06', 'end_month': '2024-05'}},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('end_month', response.data['errors']['params'])
+
+    def test_background_import_reports_like_the_request(self):
+        body = 'employee_id,full_name,email,department\nEMP002,New Hire,new@example.com,Engineering\n' \
+               'EMP003,Lost,lost@example.com,Nowhere\n'
+        response = self.client.generic(
+            'POST', reverse('employee-import') + '?background=true', body, content_type='text/csv',
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertFalse(Employee.objects.filter(employee_id='EMP002').exists())
+
+        self.work()
+        job = self.client.get(response['Location']).data
+        self.assertEqual(job['status'], Job.SUCCEEDED)
+        self.assertEqual(job['result'], {'dry_run': False, 'summary': {'rows': 2, 'created': 1, 'errors': 1}})
+        self.assertEqual(job['progress'], len(body))
+        self.assertTrue(Employee.objects.filter(employee_id='EMP002').exists())
+        report = b''.join(self.client.get(job['download_url']).streaming_content).decode().splitlines()
+        self.assertEqual(report[1], '3,EMP003,Lost,lost@example.com,Nowhere,department: Department not found.')
+
+    def test_failed_attempts_are_retried_with_backoff_and_stale_jobs_recovered(self):
+        attempts = []
+
+        def flaky(run):
+            attempts.append(run.job.attempts)
+            run.progress(1, 10)
+            raise RuntimeError('database went away')
+
+        jobs.register('flaky', max_attempts=2)(flaky)
+        self.addCleanup(jobs.TASKS.pop, 'flaky')
+        job = jobs.enqueue('flaky')
+
+        with self.assertLogs('employees.jobs', 'ERROR'):
+            self.work()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.error), (Job.QUEUED, 1, 'RuntimeError: database went away'))
+        retry_delay = timedelta(seconds=settings.JOB_RETRY_DELAY_SECONDS)
+        self.assertGreater(job.run_after, django_timezone.now() + retry_delay - timedelta(seconds=5))
+        # Not due yet
+        self.work()
+        self.assertEqual(attempts, [1])
+
+        Job.objects.filter(pk=job.pk).update(run_after=django_timezone.now())
+        with self.assertLogs('employees.jobs', 'ERROR'):
+            self.work()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.progress, job.total), (Job.FAILED, 2, 1, 10))
+        self.assertEqual(attempts, [1, 2])
+
+        # A running job whose worker stopped sending heartbeats is queued again
+        stale = jobs.enqueue('flaky')
+        self.assertEqual(jobs.claim('dead-worker'), stale)
+        Job.objects.filter(pk=stale.pk).update(
+            heartbeat_at=django_timezone.now() - timedelta(seconds=settings.JOB_STALE_SECONDS + 1),
+        )
+        with self.assertLogs('employees.jobs', 'WARNING'):
+            self.assertEqual(jobs.recover_stale(), 1)
+        stale.refresh_from_db()
+        self.assertEqual((stale.status, stale.locked_by), (Job.QUEUED, ''))
+
+
+class BenchmarkTests(TestCase):
+    """The benchmark scenarios stay runnable as the endpoints change"""
+
+    def test_every_scenario_runs_against_the_tiny_dataset(self):
+        result_dir = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(JOB_RESULT_DIR=result_dir))
+        size = benchmarks.SCALES['tiny']
+        departments = seeding.seed_departments(size['departments'])
+        seeding.seed_employees(size['employees'], departments)
+        seeding.seed_attendance(
+            [fake_data.employee_id(n) for n in range(1, size['employees'] + 1)],
+            benchmarks.END_DATE - timedelta(days=13), benchmarks.END_DATE,
+        )
+        attendance = Attendance.objects.count()
+        for scenario in benchmarks.scenarios('tiny'):
+            with self.subTest(scenario.name):
+                result = benchmarks.measure(scenario, iterations=1, warmup=0)
+                self.assertGreater(result['p50_ms'], 0)
+        # Writes are rolled back
+        self.assertEqual(Attendance.objects.count(), attendance)
+
+    def test_compare_flags_extra_queries_and_growth_beyond_the_noise_floor(self):
+        baseline = {
+            'list': {'p50_ms': 10.0, 'queries': 2, 'peak_kib': 100.0},
+            'detail': {'p50_ms': 1.0, 'queries': 1, 'peak_kib': 20.0},
+        }
+        current = {
+            'list': {'p50_ms': 14.0, 'queries': 3, 'peak_kib': 200.0},
+            'detail': {'p50_ms': 1.9, 'queries': 1, 'peak_kib': 60.0},
+            'new': {'p50_ms': 5.0, 'queries': 1, 'peak_kib': 10.0},
+        }
+        self.assertEqual(benchmarks.compare(baseline, current, threshold=0.25), [
+            ('list', 'queries', 2, 3),
+            ('list', 'p50_ms', 10.0, 14.0),
+            ('list', 'peak_kib', 100.0, 200.0),
+        ])
+
+
+class RequestMetricsTests(TestCase):
+    """Server-Timing, route histograms and the slow-request log"""
+
+    def setUp(self):
+        self.client = APIClient()
+        department = Department.objects.create(name='Engineering')
+        Employee.objects.create(
+            employee_id='EMP001', full_name='Timed Employee', email='timed@example.com', department=department,
+        )
+
+    def buckets(self, histogram, **labels):
+        for sample_labels, value in histogram.samples():
+            if sample_labels == labels:
+                return value['buckets']
+        return {}
+
+    def test_server_timing_and_route_histograms(self):
+        labels = {'route': 'employee-list', 'method': 'GET'}
+        requests = instrumentation.requests_total.value(status='200', **labels)
+        before = self.buckets(instrumentation.request_queries, **labels)
+        response = self.client.get(reverse('employee-list'))
+        self.assertRegex(
+            response['Server-Timing'],
+            r'^db;dur=[\d.]+;desc="2 queries", serialize;dur=[\d.]+, render;dur=[\d.]+, total;dur=[\d.]+$',
+        )
+        self.assertEqual(instrumentation.requests_total.value(status='200', **labels), requests + 1)
+        after = self.buckets(instrumentation.request_queries, **labels)
+        self.assertEqual(after['1'] - before.get('1', 0), 0)
+        self.assertEqual(after['2'] - before.get('2', 0), 1)
+
+        response = self.client.get(reverse('metrics'), {'format': 'prometheus'})
+        self.assertEqual(response['Content-Type'], 'text/plain; charset=utf-8')
+        body = response.content.decode()
+        self.assertIn('# TYPE http_request_queries histogram', body)
+        self.assertIn(f'http_request_queries_bucket{{route="employee-list",method="GET",le="2"}} {after["2"]}', body)
+
+    def test_slow_requests_log_their_sql(self):
+        with self.settings(SLOW_REQUEST_MS=1, SLOW_REQUEST_SAMPLE_RATE=1.0):
+            with self.assertLogs('employees.requests', 'WARNING') as logs:
+                self.client.get(reverse('employee-list'))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual((record['route'], record['status'], record['queries']), ('employee-list', 200, 2))
+        self.assertEqual(len(record['sql']), 2)
+        self.assertIn('FROM "employees"', record['sql'][1]['sql'])
+
+        with self.settings(SLOW_REQUEST_MS=1, SLOW_REQUEST_SAMPLE_RATE=0.0):
+            with self.assertNoLogs('employees.requests', 'WARNING'):
+                self.client.get(reverse('employee-list'))
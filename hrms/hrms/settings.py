@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 
 from pathlib import Path
 import os
+from corsheaders.defaults import default_headers
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -49,12 +51,17 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'corsheaders',
     'employees',
 ]
 
 MIDDLEWARE = [
+    # First, so its timings include the rest of the middleware
+    'employees.middleware.RequestMetricsMiddleware',
+    # Only used with DB_REPLICA_HOSTS; sets the read-your-writes cookie after writes
+    'employees.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -90,7 +97,8 @@ WSGI_APPLICATION = 'hrms.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        # Django's PostgreSQL backend plus connection metrics (employees/db/base.py)
+        'ENGINE': 'employees.db',
         'NAME': os.getenv('DB_NAME', 'hrms_lite'),
         'USER': os.getenv('DB_USER', 'avnadmin'),
         'PASSWORD': os.getenv('DB_PASSWORD', ''),
@@ -99,6 +107,126 @@ DATABASES = {
     }
 }
 
+# How connections are managed (see docs/PERFORMANCE.md):
+#   direct     - open and close a connection for every request (Django's default)
+#   persistent - keep each worker's connection for DB_CONN_MAX_AGE seconds, checked before reuse
+#   pool       - psycopg 3 connection pool per worker, DB_POOL_MIN_SIZE..DB_POOL_MAX_SIZE connections
+#   pgbouncer  - persistent connections to a PgBouncer in transaction pooling mode
+DB_CONNECTION_MODE = os.getenv('DB_CONNECTION_MODE', 'direct')
+DB_CONNECTION_MODES = ['direct', 'persistent', 'pool', 'pgbouncer']
+if DB_CONNECTION_MODE not in DB_CONNECTION_MODES:
+    raise ImproperlyConfigured(
+        f"DB_CONNECTION_MODE must be one of {', '.join(DB_CONNECTION_MODES)}, not {DB_CONNECTION_MODE!r}."
+    )
+
+if DB_CONNECTION_MODE in ('persistent', 'pgbouncer'):
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', '60'))
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+elif DB_CONNECTION_MODE == 'pool':
+    # Requires psycopg 3 with the pool extra; CONN_MAX_AGE must stay 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+            # Seconds a request waits for a free connection before failing
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+        },
+    }
+
+if DB_CONNECTION_MODE == 'pgbouncer':
+    # Named cursors do not survive PgBouncer handing the server connection to
+    # another client between transactions
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+
+# Streaming replicas of the default database, as comma-separated host[:port][/name]
+# (port and name default to the default database's). Safe API reads go to one of
+# them (employees/db/router.py); each becomes the alias replica1, replica2, ...
+# A second database on the same server also works, for trying it out locally.
+DB_REPLICAS = []
+for number, replica in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), 1):
+    address, _, name = replica.strip().partition('/')
+    host, _, port = address.partition(':')
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'NAME': name or DATABASES['default']['NAME'],
+        # Tests read the default test database through it
+        'TEST': {'MIRROR': 'default'},
+    }
+    DB_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['employees.db.router.ReplicaRouter']
+
+# Seconds a client reads from the default database after a write (read-your-writes)
+DB_REPLICA_PIN_SECONDS = int(os.getenv('DB_REPLICA_PIN_SECONDS', '10'))
+# Replicas further behind than this are skipped
+DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv('DB_REPLICA_MAX_LAG_SECONDS', '5'))
+# Seconds between a process's checks of each replica's lag
+DB_REPLICA_CHECK_SECONDS = float(os.getenv('DB_REPLICA_CHECK_SECONDS', '5'))
+# A lag checked that long ago can have grown by as much since; within the pin,
+# a client whose pin has ended only reads from replicas that have its writes
+if DB_REPLICA_MAX_LAG_SECONDS + DB_REPLICA_CHECK_SECONDS > DB_REPLICA_PIN_SECONDS:
+    raise ImproperlyConfigured(
+        'DB_REPLICA_MAX_LAG_SECONDS + DB_REPLICA_CHECK_SECONDS must not be more than DB_REPLICA_PIN_SECONDS.'
+    )
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# Set REDIS_URL to share cached reference data between gunicorn workers
+# (requires the 'redis' package).
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+REDIS_URL = os.getenv('REDIS_URL', '')
+if REDIS_URL:
+    CACHES['shared'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    }
+
+# Read-through cache for departments and employee lookups (employees/cache.py).
+# Invalidations bump a namespace version. With REDIS_URL it is kept in Redis
+# and checked by every cached read, so no worker serves an entry once the write
+# that invalidated it has committed. Without Redis it is kept in the
+# reference_cache_versions table and each worker reads it at most once per
+# REFERENCE_CACHE_VERSION_CHECK_SECONDS, so another worker's entries can be
+# stale for that long. Only while Redis is unreachable can they be stale for up
+# to REFERENCE_CACHE_LOCAL_TTL seconds.
+REFERENCE_CACHE_ENABLED = os.getenv('REFERENCE_CACHE_ENABLED', 'True').lower() == 'true'
+REFERENCE_CACHE_LOCAL_SIZE = int(os.getenv('REFERENCE_CACHE_LOCAL_SIZE', '1024'))
+REFERENCE_CACHE_LOCAL_TTL = int(os.getenv('REFERENCE_CACHE_LOCAL_TTL', '300'))
+REFERENCE_CACHE_SHARED_ALIAS = 'shared' if REDIS_URL else None
+REFERENCE_CACHE_SHARED_TTL = int(os.getenv('REFERENCE_CACHE_SHARED_TTL', '3600'))
+REFERENCE_CACHE_VERSION_CHECK_SECONDS = float(os.getenv('REFERENCE_CACHE_VERSION_CHECK_SECONDS', '5'))
+
+# Responses kept for Idempotency-Key replays (employees/api/idempotency.py). A
+# retry can reach any worker, and two retries can race, so the store must be
+# shared by every worker and claim a key atomically: Redis when REDIS_URL is
+# set, otherwise the idempotency_keys table (created by createcachetable),
+# whose INSERT ... ON CONFLICT adds nothing for the second of two requests
+# with the same key (employees/db/cache.py).
+if REDIS_URL:
+    CACHES['idempotency'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+        'KEY_PREFIX': 'hrms',
+    }
+else:
+    CACHES['idempotency'] = {
+        'BACKEND': 'employees.db.cache.UpsertDatabaseCache',
+        'LOCATION': 'idempotency_keys',
+    }
+IDEMPOTENCY_CACHE_ALIAS = 'idempotency'
+# How long a response can be replayed, and how long a request in progress holds its key
+IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', '86400'))
+IDEMPOTENCY_LOCK_TIMEOUT = int(os.getenv('IDEMPOTENCY_LOCK_TIMEOUT', '30'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -142,10 +270,20 @@ CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS', '').split(',') if os.ge
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Let the frontend send Idempotency-Key on writes
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+
+# Let the frontend read the conditional GET validators and see replayed writes
+CORS_EXPOSE_HEADERS = ['ETag', 'Last-Modified', 'Idempotent-Replayed']
+
+# Render JSON with orjson (employees/api/renderers.py); the output bytes are the
+# same as DRF's JSONRenderer. Falls back to it when orjson is not installed.
+FAST_JSON_RENDERER = os.getenv('FAST_JSON_RENDERER', 'True').lower() == 'true'
+
 # Django REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'employees.api.renderers.ORJSONRenderer' if FAST_JSON_RENDERER else 'rest_framework.renderers.JSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
@@ -153,3 +291,79 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'employees.api.pagination.StandardResultsSetPagination',
     'EXCEPTION_HANDLER': 'employees.api.exceptions.custom_exception_handler',
 }
+
+# Total returned in cursor (?cursor=) pagination mode unless ?count= is given:
+# 'none' skips it, 'estimate' uses planner statistics, 'exact' runs COUNT(*)
+PAGINATION_CURSOR_COUNT_MODE = os.getenv('PAGINATION_CURSOR_COUNT_MODE', 'none')
+
+# Maximum number of rows accepted by POST /api/v1/attendance/bulk/
+ATTENDANCE_BULK_MAX_ROWS = int(os.getenv('ATTENDANCE_BULK_MAX_ROWS', '10000'))
+
+# Rows fetched per round trip by the server-side cursor behind GET /api/v1/attendance/export/
+ATTENDANCE_EXPORT_CHUNK_SIZE = int(os.getenv('ATTENDANCE_EXPORT_CHUNK_SIZE', '2000'))
+
+# Rows validated and inserted together by the employee import (POST /api/v1/employees/import/)
+EMPLOYEE_IMPORT_CHUNK_SIZE = int(os.getenv('EMPLOYEE_IMPORT_CHUNK_SIZE', '2000'))
+
+# Days the change feed (GET /api/v1/changes/) keeps the tombstones of deleted objects;
+# pruned by `manage.py prune_change_log`, run daily
+CHANGE_LOG_RETENTION_DAYS = int(os.getenv('CHANGE_LOG_RETENTION_DAYS', '30'))
+
+# Background jobs (employees/jobs.py), run by `manage.py run_worker`. Their input and
+# result files are kept under JOB_RESULT_DIR, which the API and the workers must share.
+JOB_RESULT_DIR = os.getenv('JOB_RESULT_DIR', '/tmp/hrms-jobs')
+# Jobs run at once by each worker process (--concurrency)
+JOB_WORKER_CONCURRENCY = int(os.getenv('JOB_WORKER_CONCURRENCY', '2'))
+# Seconds an idle worker thread waits before looking for a job again
+JOB_POLL_SECONDS = float(os.getenv('JOB_POLL_SECONDS', '1'))
+# Attempts of a failing job, and the delay before its first retry (doubled for each further one)
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+JOB_RETRY_DELAY_SECONDS = float(os.getenv('JOB_RETRY_DELAY_SECONDS', '30'))
+# Seconds between writes of a running job's progress and heartbeat; a job without a
+# heartbeat for JOB_STALE_SECONDS has lost its worker and is queued again
+JOB_HEARTBEAT_SECONDS = float(os.getenv('JOB_HEARTBEAT_SECONDS', '2'))
+JOB_STALE_SECONDS = float(os.getenv('JOB_STALE_SECONDS', '60'))
+if JOB_STALE_SECONDS < 3 * JOB_HEARTBEAT_SECONDS:
+    raise ImproperlyConfigured('JOB_STALE_SECONDS must be at least 3 * JOB_HEARTBEAT_SECONDS.')
+# Days finished jobs and their files are kept; pruned by `manage.py prune_jobs`, run daily
+JOB_RETENTION_DAYS = int(os.getenv('JOB_RETENTION_DAYS', '7'))
+
+# Serve the employee and attendance lists from .values() rows instead of model
+# instances and serializers (employees/api/rows.py); the responses are identical
+FAST_LIST_SERIALIZATION = os.getenv('FAST_LIST_SERIALIZATION', 'True').lower() == 'true'
+
+# Serve the read endpoints with async views (employees/api/async_views.py).
+# Only useful under an ASGI server (see docker-compose.asgi.yml); under WSGI
+# each async view would run in its own event loop.
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', 'False').lower() == 'true'
+
+# Milliseconds of sleep added before every database query, to load test the
+# API against a slow database (utility/load_test.py). Keep at 0 in production.
+DB_SIMULATED_LATENCY_MS = int(os.getenv('DB_SIMULATED_LATENCY_MS', '0'))
+
+# Per-request timing (employees/middleware.py): per-route histograms on the
+# metrics endpoint, a Server-Timing header and the employees.requests log
+REQUEST_METRICS_ENABLED = os.getenv('REQUEST_METRICS_ENABLED', 'True').lower() == 'true'
+SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', 'True').lower() == 'true'
+
+# Requests slower than this many milliseconds log their SQL at WARNING (0 disables);
+# SLOW_REQUEST_SAMPLE_RATE is the fraction of them that are logged
+SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', '500'))
+SLOW_REQUEST_SAMPLE_RATE = float(os.getenv('SLOW_REQUEST_SAMPLE_RATE', '1.0'))
+# Statements kept per request for the slow-request log
+SLOW_REQUEST_MAX_QUERIES = int(os.getenv('SLOW_REQUEST_MAX_QUERIES', '100'))
+
+# INFO logs one JSON line per request; WARNING keeps only the slow-request log
+REQUEST_LOG_LEVEL = os.getenv('REQUEST_LOG_LEVEL', 'WARNING')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'employees.requests': {'handlers': ['console'], 'level': REQUEST_LOG_LEVEL, 'propagate': False},
+        'employees.jobs': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useSearchParams } from 'react-router-dom';
 import { attendanceApi, employeesApi } from '../services/api';
 import Button from '../components/common/Button';
@@ -12,7 +12,9 @@ import ErrorMessage from '../components/common/ErrorMessage';
 import Pagination from '../components/common/Pagination';
 import StatCard from '../components/common/StatCard';
 import { getErrorMessage, formatDate } from '../utils/helpers';
-import { ATTENDANCE_STATUS_OPTIONS, PAGINATION_DEFAULT_PAGE_SIZE } from '../utils/constants';
+import {
+  ATTENDANCE_STATUS_OPTIONS, EMPLOYEE_SEARCH_DEBOUNCE_MS, EMPLOYEE_SEARCH_LIMIT, PAGINATION_DEFAULT_PAGE_SIZE,
+} from '../utils/constants';
 import { validateDate, validateStatus, validateForm } from '../utils/validation';
 
 const Attendance = () => {
@@ -21,11 +23,16 @@ const Attendance = () => {
   const [employees, setEmployees] = useState([]);
   const [loading, setLoading] = useState(false);
   const [employeesLoading, setEmployeesLoading] = useState(true);
+  const [employeeSearch, setEmployeeSearch] = useState('');
+  // Numbers each employee fetch, so a slow response cannot overwrite a newer one
+  const employeesRequest = useRef(0);
   const [error, setError] = useState(null);
   const [isModalOpen, setIsModalOpen] = useState(false);
 
   // The selected employee drives everything — attendance is fetched for this employee
   const [selectedEmployeeId, setSelectedEmployeeId] = useState('');
+  // Its option, kept selectable while the typeahead shows other employees
+  const [selectedEmployee, setSelectedEmployee] = useState(null);
   const [filters, setFilters] = useState({ start_date: '', end_date: '' });
 
   const [formData, setFormData] = useState({ date: formatDate(new Date()), status: 'PRESENT' });
@@ -35,29 +42,45 @@ const Attendance = () => {
   const [deleteConfirm, setDeleteConfirm] = useState(null);
   const [pagination, setPagination] = useState({ page: 1, pageSize: PAGINATION_DEFAULT_PAGE_SIZE, count: 0 });
 
-  // Fetch the list of employees for the selector
-  const fetchEmployees = async () => {
+  // Options for the selector: the first page of employees, or the typeahead
+  // results for the search text, so the picker never loads every employee
+  const toOption = (emp) => ({
+    value: emp.employee_id,
+    label: `${emp.full_name} (${emp.employee_id})`,
+  });
+
+  const fetchEmployees = async (text = '') => {
+    const request = ++employeesRequest.current;
     setEmployeesLoading(true);
     try {
-      const response = await employeesApi.list({ page_size: 100 });
-      const results = response.data.results || [];
-      setEmployees(results.map((emp) => ({
-        value: emp.employee_id,
-        label: `${emp.full_name} (${emp.employee_id})`,
-      })));
-      // After employees are loaded, check for employee_id in URL query params
-      const employeeIdFromUrl = searchParams.get('employee_id');
-      if (employeeIdFromUrl) {
-        // Verify the employee_id exists in the loaded employees list
-        const employeeExists = results.some(emp => emp.employee_id === employeeIdFromUrl);
-        if (employeeExists) {
-          setSelectedEmployeeId(employeeIdFromUrl);
-        }
+      const response = text
+        ? await employeesApi.search(text, { limit: EMPLOYEE_SEARCH_LIMIT })
+        : await employeesApi.list({ page_size: EMPLOYEE_SEARCH_LIMIT });
+      if (request === employeesRequest.current) {
+        setEmployees((response.data.results || []).map(toOption));
       }
     } catch (err) {
       console.error('Failed to fetch employees:', err);
     } finally {
-      setEmployeesLoading(false);
+      if (request === employeesRequest.current) {
+        setEmployeesLoading(false);
+      }
+    }
+  };
+
+  // Select the employee named by ?employee_id= in the URL, if it exists
+  const selectEmployeeFromUrl = async () => {
+    const employeeIdFromUrl = searchParams.get('employee_id');
+    if (!employeeIdFromUrl) return;
+    try {
+      const response = await employeesApi.search(employeeIdFromUrl, { limit: 1 });
+      const match = (response.data.results || []).find((emp) => emp.employee_id === employeeIdFromUrl);
+      if (match) {
+        setSelectedEmployee(toOption(match));
+        setSelectedEmployeeId(match.employee_id);
+      }
+    } catch (err) {
+      console.error('Failed to look up employee:', err);
     }
   };
 
@@ -82,11 +105,18 @@ const Attendance = () => {
     }
   };
 
-  useEffect(() => { 
-    fetchEmployees(); 
+  useEffect(() => {
+    selectEmployeeFromUrl();
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, []);
 
+  // Query the typeahead once typing pauses
+  useEffect(() => {
+    const timer = setTimeout(() => fetchEmployees(employeeSearch.trim()), EMPLOYEE_SEARCH_DEBOUNCE_MS);
+    return () => clearTimeout(timer);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [employeeSearch]);
+
   // Re-fetch attendance whenever the selected employee changes
   useEffect(() => {
     if (selectedEmployeeId) {
@@ -219,7 +249,10 @@ const Attendance = () => {
   const hasActiveFilters = filters.start_date || filters.end_date;
 
   // Find the display label for the selected employee
-  const selectedEmployeeLabel = employees.find((e) => e.value === selectedEmployeeId)?.label || '';
+  const selectedEmployeeLabel = selectedEmployee?.label || '';
+  const employeeOptions = selectedEmployee && !employees.some((e) => e.value === selectedEmployee.value)
+    ? [selectedEmployee, ...employees]
+    : employees;
 
   return (
     <div className="space-y-6">
@@ -229,6 +262,16 @@ const Attendance = () => {
         <div className="flex-1">
           <div className="bg-white rounded-xl border border-gray-200 shadow-sm p-5">
             <div className="flex flex-col sm:flex-row sm:items-end gap-4">
+              <div className="flex-1 max-w-xs">
+                <Input
+                  label="Find Employee"
+                  name="employeeSearch"
+                  value={employeeSearch}
+                  onChange={(e) => setEmployeeSearch(e.target.value)}
+                  placeholder="Name, email or employee ID"
+                  autoComplete="off"
+                />
+              </div>
               <div className="flex-1 max-w-md">
                 <Select
                   label="Select Employee"
@@ -236,6 +279,7 @@ const Attendance = () => {
                   value={selectedEmployeeId}
                   onChange={(e) => {
                     setSelectedEmployeeId(e.target.value);
+                    setSelectedEmployee(employeeOptions.find((option) => option.value === e.target.value) || null);
                     // Update URL query param when employee changes
                     if (e.target.value) {
                       setSearchParams({ employee_id: e.target.value });
@@ -243,7 +287,7 @@ const Attendance = () => {
                       setSearchParams({});
                     }
                   }}
-                  options={employees}
+                  options={employeeOptions}
                   placeholder="Choose an employee to view attendance"
                   disabled={employeesLoading}
                 />
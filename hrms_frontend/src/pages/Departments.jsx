@@ -99,6 +99,22 @@ const Departments = () => {
         </div>
       ),
     },
+    {
+      header: 'Employees',
+      accessor: 'employee_count',
+      render: (row) => <span className="text-gray-900">{row.employee_count}</span>,
+    },
+    {
+      header: 'Today',
+      accessor: 'present_today',
+      render: (row) => (
+        <span className="text-gray-500">
+          <span className="text-emerald-700">{row.present_today} present</span>
+          {' · '}
+          <span className="text-red-700">{row.absent_today} absent</span>
+        </span>
+      ),
+    },
     {
       header: 'Created',
       accessor: 'created_at',
@@ -4,6 +4,8 @@ const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000
 
 const apiClient = axios.create({
   baseURL: API_BASE_URL,
+  // Sends the cookie that keeps reads on the primary database just after a write
+  withCredentials: true,
   headers: {
     'Content-Type': 'application/json',
   },
@@ -69,9 +71,20 @@ export const employeesApi = {
   get: (id) => {
     return apiClient.get(`/employees/${id}/`);
   },
+  // Ranked typeahead over name, email and employee ID (not paginated)
+  search: (text, params = {}) => {
+    return apiClient.get('/employees/search/', { params: { search: text, ...params } });
+  },
   create: (data) => {
     return apiClient.post('/employees/', data);
   },
+  // CSV or NDJSON file of employee_id, full_name, email and department (by name)
+  import: (file, params = {}) => {
+    const form = new FormData();
+    form.append('file', file);
+    // Overrides the JSON default, which would make axios send the form as JSON
+    return apiClient.post('/employees/import/', form, { params, headers: { 'Content-Type': 'multipart/form-data' } });
+  },
   delete: (id) => {
     return apiClient.delete(`/employees/${id}/`);
   },
@@ -88,6 +101,13 @@ export const attendanceApi = {
   delete: (employeeId, id) => {
     return apiClient.delete(`/employees/${employeeId}/attendance/${id}/`);
   },
+  board: (params = {}) => {
+    return apiClient.get('/attendance/board/', { params });
+  },
+  // employee_id, present_on and absent_on may be arrays; they are sent as repeated keys
+  calendar: (params = {}) => {
+    return apiClient.get('/attendance/calendar/', { params, paramsSerializer: { indexes: null } });
+  },
 };
 
 export default apiClient;
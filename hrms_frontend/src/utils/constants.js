@@ -11,3 +11,7 @@ export const ATTENDANCE_STATUS_OPTIONS = [
 export const PAGINATION_DEFAULT_PAGE_SIZE = 10;
 export const PAGINATION_MAX_PAGE_SIZE = 100;
 
+// Employee picker typeahead (GET /employees/search/)
+export const EMPLOYEE_SEARCH_LIMIT = 20;
+export const EMPLOYEE_SEARCH_DEBOUNCE_MS = 250;
+
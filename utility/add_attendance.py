@@ -1,111 +1,85 @@
-import requests
-import random
-from datetime import datetime, timedelta
+"""
+Seed weekday attendance through the API, or directly through the ORM.
 
-URL = "http://localhost:8000/api/v1/attendance/"
-EMPLOYEES_URL = "http://localhost:8000/api/v1/employees/"
+    python utility/add_attendance.py --days 30 --concurrency 16
+    python utility/add_attendance.py --days 730 --mode bulk --batch-size 1000
+    python utility/add_attendance.py --days 730 --direct
 
-DAYS_BACK = 10
-# Set seed for reproducible results
-random.seed(42)
+--mode nested posts one record at a time to /employees/<employee_id>/attendance/;
+--mode bulk sends --batch-size records per request to /attendance/bulk/.
+Statuses are generated from --seed, so re-running reports existing days as
+duplicates (409 in nested mode, "conflict" in bulk mode).
+"""
+import argparse
+from itertools import islice
+from datetime import date, timedelta
 
+from loadgen import ApiClient, Stats, run_concurrently, setup_django
 
-def fetch_employees():
-    """Fetch the first 20 employees from the API"""
-    try:
-        response = requests.get(f"{EMPLOYEES_URL}?page_size=20")
-        if response.status_code == 200:
-            data = response.json()
-            employees = data.get('results', [])
-            return employees
-        else:
-            print(f"❌ Failed to fetch employees: {response.status_code}")
-            return []
-    except Exception as e:
-        print(f"⚠️ Error fetching employees: {e}")
-        return []
+from employees.fake_data import DEFAULT_SEED, attendance_rows, batched
 
 
-def get_last_n_days(n):
-    """Generate list of dates for the last n days"""
-    today = datetime.now().date()
-    dates = []
-    for i in range(n):
-        date = today - timedelta(days=i)
-        dates.append(date.strftime("%Y-%m-%d"))
-    return dates
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000/api/v1")
+    parser.add_argument("--employees", type=int, help="Only the first N employees (default: all)")
+    parser.add_argument("--days", type=int, default=10, help="Days ending at --end-date (default: 10)")
+    parser.add_argument("--end-date", type=date.fromisoformat, default=date.today(),
+                        help="Last day, YYYY-MM-DD (default: today)")
+    parser.add_argument("--mode", choices=["nested", "bulk"], default="nested")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Records per bulk request (default: 1000)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight (default: 16)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--direct", action="store_true",
+                        help="Bulk-load through the ORM (hrms/.env database) instead of the API")
+    args = parser.parse_args()
+    start_date = args.end_date - timedelta(days=args.days - 1)
 
+    if args.direct:
+        setup_django()
+        from employees import seeding
+        from employees.models import Employee
+        employee_ids = Employee.objects.order_by("pk").values_list("employee_id", flat=True)
+        if args.employees:
+            employee_ids = employee_ids[:args.employees]
+        sent = seeding.seed_attendance(list(employee_ids), start_date, args.end_date, seed=args.seed)
+        print(f"Loaded {sent} attendance rows (existing days were skipped)")
+        return
 
-def create_attendance(employee_id, date, status):
-    """Create an attendance record via API"""
-    payload = {
-        "employee": employee_id,
-        "date": date,
-        "status": status
-    }
-    
-    try:
-        response = requests.post(URL, json=payload)
-        
-        if response.status_code in (200, 201):
-            return True, None
-        elif response.status_code == 409:
-            # Duplicate record - already exists
-            return False, "duplicate"
-        else:
-            return False, f"error_{response.status_code}"
-    except Exception as e:
-        return False, f"exception_{str(e)}"
+    stats = Stats()
+    client = ApiClient(args.base_url, stats, args.concurrency)
+    employees = client.iterate("/employees/", "GET /employees/")
+    employee_ids = [e["employee_id"] for e in islice(employees, args.employees)]
+    if not employee_ids:
+        raise SystemExit("No employees found. Create some first with add_employees.py")
+    print(f"Seeding {args.days} days for {len(employee_ids)} employees "
+          f"({args.mode} mode, concurrency {args.concurrency})...")
 
+    rows = attendance_rows(employee_ids, start_date, args.end_date, args.seed)
 
-def main():
-    print("Fetching employees from API...")
-    employees = fetch_employees()
-    
-    if not employees:
-        print("❌ No employees found. Please create employees first using add_employees.py")
-        return
-    
-    # Limit to first 20 employees
-    employees = employees[:20]
-    
-    print(f"Creating attendance records for {len(employees)} employees for the last {DAYS_BACK} days...\n")
-    
-    dates = get_last_n_days(DAYS_BACK)
-    total_records = len(employees) * len(dates)
-    
-    success_count = 0
-    duplicate_count = 0
-    failure_count = 0
-    
-    for employee in employees:
-        employee_id = employee["id"]
-        employee_name = employee.get("full_name", "Unknown")
-        employee_emp_id = employee.get("employee_id", "N/A")
-        
-        for date in dates:
-            # Randomly assign status: 85% PRESENT, 15% ABSENT
-            status = "PRESENT" if random.random() < 0.85 else "ABSENT"
-            
-            success, error = create_attendance(employee_id, date, status)
-            
-            if success:
-                success_count += 1
-            elif error == "duplicate":
-                duplicate_count += 1
-            else:
-                failure_count += 1
-                print(f"❌ Failed: {employee_name} ({employee_emp_id}) on {date} - {error}")
-        
-        print(f"✅ Processed: {employee_name} ({employee_emp_id}) - ID: {employee_id}")
-    
-    print("\n--- Summary ---")
-    print(f"Total records attempted: {total_records}")
-    print(f"✅ Successfully created: {success_count}")
-    print(f"⚠️  Already existed (duplicates): {duplicate_count}")
-    print(f"❌ Failed: {failure_count}")
+    if args.mode == "nested":
+        def create(row):
+            employee_id, day, status = row
+            client.post(f"/employees/{employee_id}/attendance/", "POST /employees/{id}/attendance/",
+                        json={"date": day.isoformat(), "status": status})
+
+        run_concurrently(create, rows, args.concurrency)
+    else:
+        def create_batch(batch):
+            records = [
+                {"employee_id": employee_id, "date": day.isoformat(), "status": status}
+                for employee_id, day, status in batch
+            ]
+            response = client.post("/attendance/bulk/", "POST /attendance/bulk/",
+                                    json={"conflict_policy": "skip", "records": records})
+            if response is not None and response.status_code == 200:
+                for outcome, count in response.json()["summary"].items():
+                    stats.count("bulk records", outcome, count)
+
+        run_concurrently(create_batch, batched(rows, args.batch_size), args.concurrency)
+
+    stats.report()
 
 
 if __name__ == "__main__":
     main()
-
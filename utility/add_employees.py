@@ -1,57 +1,63 @@
-import requests
-import random
-from faker import Faker
-
-URL = "http://localhost:8000/api/v1/employees/"
-TOTAL_EMPLOYEES = 20
-
-fake = Faker()
-Faker.seed(42)
-
-def create_employee(employee_number):
-    first_name = fake.first_name()
-    last_name = fake.last_name()
-    department = random.randint(1, 4)
-
-    # Ensure unique email using faker's unique generator
-    email = fake.unique.email()
-    
-    # Generate employee_id (e.g., EMP001, EMP002, etc.)
-    employee_id = f"EMP{employee_number:03d}"
-
-    return {
-        "employee_id": employee_id,
-        "full_name": f"{first_name} {last_name}",
-        "email": email,
-        "department": department
-    }
+"""
+Seed departments and employees through the API, or directly through the ORM.
 
-def main():
-    print(f"Seeding {TOTAL_EMPLOYEES} employees...\n")
+    python utility/add_employees.py --count 1000 --concurrency 16
+    python utility/add_employees.py --count 100000 --direct
+
+Employees are numbered EMP000001, EMP000002, ... and generated from --seed,
+so re-running the script reports the existing ones as duplicates (409).
+"""
+import argparse
 
-    success_count = 0
-    failure_count = 0
+from loadgen import ApiClient, Stats, run_concurrently, setup_django
 
-    for i in range(1, TOTAL_EMPLOYEES + 1):
-        employee = create_employee(i)
+from employees.fake_data import DEFAULT_SEED, department_names, employee_rows
 
-        try:
-            response = requests.post(URL, json=employee)
 
-            if response.status_code in (200, 201):
-                print(f"✅ Created: {employee['full_name']} ({employee['employee_id']}) - Dept {employee['department']}")
-                success_count += 1
-            else:
-                print(f"❌ Failed ({response.status_code}): {response.text}")
-                failure_count += 1
+def ensure_departments(client, count):
+    """Return the ids of the first `count` seed departments, creating missing ones"""
+    names = department_names(count)
+    existing = {d["name"]: d["id"] for d in client.iterate("/departments/", "GET /departments/")}
+    for name in names:
+        if name not in existing:
+            response = client.post("/departments/", "POST /departments/", json={"name": name})
+            if response is None or response.status_code != 201:
+                raise SystemExit(f"Could not create department {name!r}")
+            existing[name] = response.json()["id"]
+    return [existing[name] for name in names]
 
-        except Exception as e:
-            print(f"⚠️ Request error: {e}")
-            failure_count += 1
 
-    print("\n--- Summary ---")
-    print(f"Success: {success_count}")
-    print(f"Failed: {failure_count}")
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000/api/v1")
+    parser.add_argument("--count", type=int, default=20, help="Employees to create (default: 20)")
+    parser.add_argument("--start", type=int, default=1, help="Number of the first employee (default: 1)")
+    parser.add_argument("--departments", type=int, default=4, help="Departments to spread them over (default: 4)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight (default: 16)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--direct", action="store_true",
+                        help="Bulk-load through the ORM (hrms/.env database) instead of the API")
+    args = parser.parse_args()
+
+    if args.direct:
+        setup_django()
+        from employees import seeding
+        departments = seeding.seed_departments(args.departments)
+        created = seeding.seed_employees(args.count, departments, start=args.start, seed=args.seed)
+        print(f"Created {created} employees ({args.count - created} already existed)")
+        return
+
+    stats = Stats()
+    client = ApiClient(args.base_url, stats, args.concurrency)
+    department_ids = ensure_departments(client, args.departments)
+    print(f"Seeding {args.count} employees with concurrency {args.concurrency}...")
+
+    def create(employee):
+        client.post("/employees/", "POST /employees/", json=employee)
+
+    run_concurrently(create, employee_rows(args.count, department_ids, args.start, args.seed), args.concurrency)
+    stats.report()
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
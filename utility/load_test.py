@@ -0,0 +1,81 @@
+"""
+Concurrent load test for the read endpoints.
+
+Sends --requests GETs, --concurrency at a time, to each endpoint and prints
+throughput and latency percentiles. Run it against the WSGI and the ASGI
+deployment started with the same DB_SIMULATED_LATENCY_MS to compare how many
+slow-database requests each can keep in flight (see docs/PERFORMANCE.md).
+
+    python utility/load_test.py --base-url http://localhost:8000/api/v1 --concurrency 50
+"""
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from loadgen import percentile
+
+
+def discover_endpoints(session, base_url):
+    """Build the endpoint list from the first employee in the database"""
+    response = session.get(f"{base_url}/employees/", params={"page_size": 1})
+    response.raise_for_status()
+    results = response.json()["results"]
+    if not results:
+        raise SystemExit("No employees found; seed some data first (utility/add_employees.py)")
+    employee = results[0]
+    return {
+        "employee list": f"{base_url}/employees/?page_size=50",
+        "employee detail": f"{base_url}/employees/{employee['id']}/",
+        "department list": f"{base_url}/departments/",
+        "attendance list": f"{base_url}/employees/{employee['employee_id']}/attendance/?page_size=50",
+    }
+
+
+def run(url, total, concurrency):
+    """GET url `total` times, `concurrency` at a time; return (elapsed, latencies, errors)"""
+    local = threading.local()
+
+    def fetch(_):
+        # One pooled session per thread; requests.Session is not thread-safe
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        started = time.perf_counter()
+        try:
+            ok = session.get(url, timeout=60).status_code == 200
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - started, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(fetch, range(total)))
+    elapsed = time.perf_counter() - started
+    return elapsed, [latency for latency, _ in results], sum(1 for _, ok in results if not ok)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000/api/v1")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    endpoints = discover_endpoints(requests.Session(), args.base_url.rstrip("/"))
+    print(f"{args.requests} requests per endpoint, concurrency {args.concurrency}\n")
+    print(f"{'endpoint':<18}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'errors':>8}")
+    for name, url in endpoints.items():
+        elapsed, latencies, errors = run(url, args.requests, args.concurrency)
+        ms = [latency * 1000 for latency in latencies]
+        print(
+            f"{name:<18}{args.requests / elapsed:>9.1f}{statistics.median(ms):>9.0f}"
+            f"{percentile(ms, 95):>9.0f}{percentile(ms, 99):>9.0f}{max(ms):>9.0f}{errors:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
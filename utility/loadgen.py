@@ -0,0 +1,135 @@
+"""
+Shared pieces of the seeding scripts and load tests in this directory.
+
+- ApiClient: pooled HTTP sessions (one per thread) that time every request
+- Stats: per-endpoint throughput and latency percentiles
+- run_concurrently: a thread pool that never queues more than it needs
+- setup_django: import path and settings for the --direct (ORM) mode
+"""
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "hrms"
+# The data generators live with the backend; they do not need Django configured
+sys.path.insert(0, str(BACKEND_DIR))
+
+
+def setup_django():
+    """Configure Django from hrms/.env so the ORM can be used directly."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hrms.settings")
+    import django
+    django.setup()
+
+
+def percentile(values, p):
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(p / 100 * len(values)) - 1))
+    return values[index]
+
+
+class Stats:
+    """Thread-safe latency and outcome counts per endpoint label"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.outcomes = defaultdict(lambda: defaultdict(int))
+        self.started = time.perf_counter()
+
+    def count(self, label, outcome, amount=1):
+        """Count an outcome that is not a request, e.g. records within a bulk request"""
+        with self._lock:
+            self.outcomes[label][outcome] += amount
+
+    def record(self, label, seconds, outcome):
+        with self._lock:
+            self.latencies[label].append(seconds * 1000)
+            self.outcomes[label][outcome] += 1
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        print(f"\n{'endpoint':<40}{'requests':>10}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+        for label, ms in self.latencies.items():
+            print(
+                f"{label:<40}{len(ms):>10}{len(ms) / elapsed:>9.1f}{statistics.median(ms):>9.0f}"
+                f"{percentile(ms, 95):>9.0f}{percentile(ms, 99):>9.0f}"
+            )
+            outcomes = ", ".join(f"{name}: {count}" for name, count in sorted(self.outcomes[label].items()))
+            print(f"{'':<4}{outcomes}")
+        for label in self.outcomes.keys() - self.latencies.keys():
+            outcomes = ", ".join(f"{name}: {count}" for name, count in sorted(self.outcomes[label].items()))
+            print(f"{label:<40}{outcomes}")
+        print(f"\nElapsed: {elapsed:.1f}s")
+
+
+class ApiClient:
+    """Keep-alive sessions, one per thread, recording every request in Stats"""
+
+    def __init__(self, base_url, stats, concurrency, timeout=60):
+        self.base_url = base_url.rstrip("/")
+        self.stats = stats
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._local = threading.local()
+
+    @property
+    def session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=0)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        return session
+
+    def request(self, method, path, label, **kwargs):
+        """Send a request; returns the response, or None if it could not be sent."""
+        url = path if path.startswith("http") else f"{self.base_url}{path}"
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            self.stats.record(label, time.perf_counter() - started, f"error: {type(e).__name__}")
+            return None
+        self.stats.record(label, time.perf_counter() - started, str(response.status_code))
+        return response
+
+    def get(self, path, label, **kwargs):
+        return self.request("GET", path, label, **kwargs)
+
+    def post(self, path, label, **kwargs):
+        return self.request("POST", path, label, **kwargs)
+
+    def iterate(self, path, label, page_size=100):
+        """Yield every result of a list endpoint, following keyset (?cursor=) pages."""
+        response = self.get(path, label, params={"cursor": "", "page_size": page_size})
+        while response is not None and response.status_code == 200:
+            data = response.json()
+            yield from data["results"]
+            if not data["next"]:
+                return
+            response = self.get(data["next"], label)
+        raise SystemExit(f"Listing {path} failed: {response.status_code if response is not None else 'no response'}")
+
+
+def run_concurrently(func, items, concurrency):
+    """Call func(item) for every item with `concurrency` threads, queueing at most 2x that."""
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        pending = set()
+        for item in items:
+            if len(pending) >= concurrency * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+            pending.add(pool.submit(func, item))
+        for future in pending:
+            future.result()